@@ -0,0 +1,16 @@
+"""Benchmarks for Wob.
+
+Run them with::
+
+    python -m benchmarks [--filter SUBSTRING] [--output results.json]
+                         [--baseline baseline.json] [--tolerance 0.25]
+
+Results are written as JSON; passing an earlier run's JSON as ``--baseline``
+compares the two, and exits with a non-zero status if any benchmark's best
+timing got slower by more than the tolerance (or by more than the runs'
+noise, if that's more).
+
+Besides timings, each benchmark reports the memory blocks a single call
+allocates (those still alive when it returns, its result included), and its
+peak memory use.
+"""
@@ -0,0 +1,83 @@
+import argparse as _argparse
+import sys as _sys
+
+from . import runner as _runner
+# Imported for their side effect of registering benchmarks.
+from . import headers as _headers  # noqa: F401
+from . import paths as _paths  # noqa: F401
+from . import routing as _routing  # noqa: F401
+from . import wsgi as _wsgi  # noqa: F401
+
+
+def _parse_args(argv):
+    parser = _argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Run Wob\'s benchmarks.',
+    )
+    parser.add_argument(
+        '--filter', help='Only run benchmarks with this in their name.',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='The number of timing runs to take of each benchmark.',
+    )
+    parser.add_argument(
+        '--output', help='Write the results, as JSON, to this file.',
+    )
+    parser.add_argument(
+        '--baseline', help='Compare the results against this JSON file.',
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='How much slower than the baseline, as a fraction, a benchmark'
+        ' may be before it counts as a regression; more, if the runs were'
+        ' noisier than that. (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--list', action='store_true', help='List the benchmarks and exit.',
+    )
+    return parser.parse_args(argv)
+
+
+def _report(name, result):
+    print('{:<48} {:>12.1f} ns {:>8.1f} blocks {:>10.1f} peak bytes'.format(
+        name,
+        result['ns_per_call_min'],
+        result['blocks_per_call'],
+        result['peak_bytes_per_call'],
+    ))
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.list:
+        for name in _runner.benchmark_names():
+            print(name)
+        return 0
+
+    results = _runner.run(
+        name_filter=args.filter, repeat=args.repeat, report=_report,
+    )
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(_runner.to_json(results))
+            output.write('\n')
+
+    if not args.baseline:
+        return 0
+
+    comparisons = _runner.compare(
+        _runner.load_results(args.baseline), results, args.tolerance,
+    )
+    print()
+    regressions = 0
+    for comparison in comparisons:
+        print('{:<48} {:>12.1f} -> {:>12.1f} ns  x{:.2f}{}'.format(
+            comparison.name, comparison.baseline_ns, comparison.current_ns,
+            comparison.ratio, '  REGRESSED' if comparison.regressed else '',
+        ))
+        regressions += comparison.regressed
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    _sys.exit(main())
@@ -0,0 +1,118 @@
+"""Benchmarks of wob.http.message.Headers."""
+
+from wob.http import message as _message
+
+from .runner import benchmark
+
+
+REQUEST_HEADERS = (
+    ('Host', 'www.example.com'),
+    ('User-Agent', 'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101'
+                   ' Firefox/118.0'),
+    ('Accept', 'text/html,application/xhtml+xml,application/xml;q=0.9,'
+               'image/avif,image/webp,*/*;q=0.8'),
+    ('Accept-Language', 'en-US,en;q=0.5'),
+    ('Accept-Encoding', 'gzip, deflate, br'),
+    ('Connection', 'keep-alive'),
+    ('Cookie', 'session=0123456789abcdef; theme=dark'),
+    ('Upgrade-Insecure-Requests', '1'),
+    ('Sec-Fetch-Dest', 'document'),
+    ('Sec-Fetch-Mode', 'navigate'),
+    ('Sec-Fetch-Site', 'none'),
+    ('Sec-Fetch-User', '?1'),
+    ('Keep-Alive', 'timeout=5'),
+    ('X-Forwarded-For', '203.0.113.7, 10.0.0.1'),
+    ('X-Forwarded-Proto', 'https'),
+    ('X-Request-Id', '5f0c6a6e-3c56-4d55-9d6b-0d0e1e2f3a4b'),
+)
+
+# Headers that proxies must strip before forwarding a message.
+HOP_BY_HOP = (
+    'Connection', 'Keep-Alive', 'Proxy-Authenticate', 'Proxy-Authorization',
+    'TE', 'Trailer', 'Transfer-Encoding', 'Upgrade',
+)
+
+
+def wsgi_environment_items():
+    for name, value in REQUEST_HEADERS:
+        yield 'HTTP_' + name.upper().replace('-', '_'), value
+
+
+@benchmark('headers.construct')
+def _construct():
+    def run():
+        return _message.Headers(REQUEST_HEADERS)
+    return run
+
+
+@benchmark('headers.getitem')
+def _getitem():
+    headers = _message.Headers(REQUEST_HEADERS)
+
+    def run():
+        return headers['accept-encoding']
+    return run
+
+
+@benchmark('headers.contains[miss]')
+def _contains_miss():
+    headers = _message.Headers(REQUEST_HEADERS)
+
+    def run():
+        return 'Authorization' in headers
+    return run
+
+
+@benchmark('headers.set_header')
+def _set_header():
+    headers = _message.Headers(REQUEST_HEADERS)
+
+    def run():
+        headers.set_header('X-Request-Id', 'abc')
+    return run
+
+
+@benchmark('headers.strip_hop_by_hop')
+def _strip_hop_by_hop():
+    def run():
+        headers = _message.Headers(REQUEST_HEADERS)
+        for name in HOP_BY_HOP:
+            headers.remove_header(name)
+        return headers
+    return run
+
+
+@benchmark('headers.copy')
+def _copy():
+    headers = _message.Headers(REQUEST_HEADERS)
+
+    def run():
+        return headers.copy()
+    return run
+
+
+@benchmark('headers.items')
+def _items():
+    headers = _message.Headers(REQUEST_HEADERS)
+
+    def run():
+        return list(headers.items())
+    return run
+
+
+@benchmark('headers.wsgi.getitem')
+def _wsgi_getitem():
+    environ = dict(wsgi_environment_items())
+
+    def run():
+        return _message.WsgiHeaders(environ)['User-Agent']
+    return run
+
+
+@benchmark('headers.wsgi.eager')
+def _wsgi_eager():
+    environ = dict(wsgi_environment_items())
+
+    def run():
+        return _message.headers_from_wsgi_environment(environ)
+    return run
@@ -0,0 +1,67 @@
+"""Benchmarks of wob.http.path."""
+
+from wob.http import path as _path
+
+from .runner import benchmark
+
+
+_TEXT = '/api/v1/users/1234/posts/5678'
+_MESSY_TEXT = '//api/./v1//users/1234/../1234/posts/5678/'
+
+
+@benchmark('path.construct')
+def _construct():
+    def run():
+        return _path.Path(_TEXT)
+    return run
+
+
+@benchmark('path.components')
+def _components():
+    def run():
+        return _path.Path(_TEXT).components
+    return run
+
+
+@benchmark('path.canonicalize[canonical]')
+def _canonicalize_canonical():
+    def run():
+        return _path.Path(_TEXT).canonicalize()
+    return run
+
+
+@benchmark('path.canonicalize[messy]')
+def _canonicalize_messy():
+    def run():
+        return _path.Path(_MESSY_TEXT).canonicalize()
+    return run
+
+
+@benchmark('path.canonicalize[cached]')
+def _canonicalize_cached():
+    path = _path.Path(_MESSY_TEXT)
+    path.canonicalize()
+
+    def run():
+        return path.canonicalize()
+    return run
+
+
+@benchmark('path.eq')
+def _eq():
+    first = _path.Path(_TEXT)
+    second = _path.Path(_MESSY_TEXT)
+
+    def run():
+        return first == second
+    return run
+
+
+@benchmark('path.strip_prefix')
+def _strip_prefix():
+    path = _path.Path(_TEXT).canonicalize()
+    prefix = _path.Path('/api/v1')
+
+    def run():
+        return path.strip_prefix(prefix)
+    return run
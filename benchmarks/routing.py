@@ -0,0 +1,143 @@
+"""Benchmarks of wob.routing.router.Router."""
+
+import os as _os
+import tempfile as _tempfile
+
+from wob.http import request as _request
+from wob.routing import compiled as _compiled
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+from .runner import benchmark
+
+
+ROUTE_COUNTS = (10, 100, 1000, 10000)
+
+
+def endpoint(request, **kwargs):
+    return kwargs
+
+
+def build_router(route_count, **router_kwargs):
+    """Build a router with route_count routes.
+
+    Most routes are of the form "/api/v1/resource{N}/<item_id:int>"; the last
+    is a wildcard, "/files/**", so that matching it means passing over every
+    other route.
+    """
+    builder = _router.RouteTableBuilder()
+    for index in range(route_count - 1):
+        builder.add_route(
+            _rpath.path_rule('/api/v1/resource{}/<item_id:int>'.format(index)),
+            {'GET': endpoint},
+        )
+    builder.add_route(_rpath.path_rule('/files/**'), {'GET': endpoint})
+    router = _router.Router(**router_kwargs)
+    router.swap_table(builder.build())
+    return router
+
+
+def request(path, method='GET'):
+    return _request.Request(method, '/', path, None)
+
+
+def _match_benchmark(route_count, path_for_count):
+    def setup():
+        router = build_router(route_count)
+        request_ = request(path_for_count(route_count))
+
+        def run():
+            return router.match_request(request_)
+        return run
+    return setup
+
+
+_POSITIONS = (
+    ('hit_first', lambda count: '/api/v1/resource0/42'),
+    ('hit_last', lambda count: '/api/v1/resource{}/42'.format(count - 2)),
+    ('miss', lambda count: '/api/v1/nothing/42'),
+    ('wildcard', lambda count: '/files/css/site.css'),
+)
+
+for _route_count in ROUTE_COUNTS:
+    for _position, _path_for_count in _POSITIONS:
+        benchmark('router.match[{},{}]'.format(_route_count, _position))(
+            _match_benchmark(_route_count, _path_for_count)
+        )
+
+
+@benchmark('router.match[1000,hit_last,cached]')
+def _match_cached():
+    router = build_router(1000, match_cache_size=128)
+    request_ = request('/api/v1/resource998/42')
+
+    def run():
+        return router.match_request(request_)
+    return run
+
+
+@benchmark('router.compile[1000]')
+def _compile():
+    router = build_router(1000)
+
+    def run():
+        return _router.RouteTable(router.table.routes).compile()
+    return run
+
+
+@benchmark('path_rule.parse')
+def _path_rule():
+    rule = '/api/v1/users/<user_id:int>/posts/<slug:string>'
+
+    def run():
+        return _rpath.path_rule(rule)
+    return run
+
+
+@benchmark('router.match_paths[1000,x1000 sorted]')
+def _match_paths():
+    router = build_router(1000)
+    paths = sorted(
+        '/api/v1/resource{}/{}'.format(index % 999, index)
+        for index in range(1000)
+    )
+
+    def run():
+        return list(router.match_paths(paths))
+    return run
+
+
+@benchmark('path_rule.build_path')
+def _build_path():
+    rule = _rpath.path_rule('/api/v1/users/<user_id:int>/posts/<slug:string>')
+
+    def run():
+        return rule.build_path(user_id=1234, slug='hello-world')
+    return run
+
+
+@benchmark('path_rule.build_path[static]')
+def _build_path_static():
+    rule = _rpath.path_rule('/api/v1/about/')
+
+    def run():
+        return rule.build_path()
+    return run
+
+
+@benchmark('router.build[1000]')
+def _build():
+    def run():
+        return build_router(1000)
+    return run
+
+
+@benchmark('compiled.load_table[1000]')
+def _load_table():
+    # What a worker does instead of router.build[1000], with a saved table.
+    path = _os.path.join(_tempfile.mkdtemp(), 'routes.pickle')
+    _compiled.save_table(build_router(1000), path, 'key')
+
+    def run():
+        return _compiled.load_table(_router.Router(), path, 'key')
+    return run
@@ -0,0 +1,196 @@
+"""Registering, running and comparing benchmarks."""
+
+import collections as _collections
+import gc as _gc
+import json as _json
+import platform as _platform
+import sys as _sys
+import time as _time
+import tracemalloc as _tracemalloc
+
+
+_BENCHMARKS = _collections.OrderedDict()
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The decorated function is called once to set up the benchmark, and must
+    return a function of no arguments; that function is what gets timed.
+    """
+    def decorator(setup):
+        if name in _BENCHMARKS:
+            raise ValueError('Duplicate benchmark name {!r}.'.format(name))
+        _BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def benchmark_names():
+    return list(_BENCHMARKS)
+
+
+# Each timing run is calibrated to take about this long.
+_TARGET_RUN_SECONDS = 0.05
+
+
+def _calibrate(function):
+    loops = 1
+    while True:
+        elapsed = _time_loops(function, loops)
+        if elapsed >= _TARGET_RUN_SECONDS or loops >= 10 ** 7:
+            return loops
+        loops *= 10 if elapsed < _TARGET_RUN_SECONDS / 10 else 2
+
+
+def _time_loops(function, loops):
+    range_ = range(loops)
+    gc_was_enabled = _gc.isenabled()
+    _gc.disable()
+    try:
+        start = _time.perf_counter()
+        for _ in range_:
+            function()
+        return _time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            _gc.enable()
+
+
+# Allocations are measured over this many calls, one at a time; the least of
+# them is reported.
+_ALLOCATION_CALLS = 20
+
+
+def _measure_allocations(function):
+    """Measure the memory blocks a call allocates, and its peak usage.
+
+    Each call is measured on its own, between two snapshots, with its result
+    still alive (so blocks that belong to the result, e.g., a Request and its
+    Path objects, are counted); the result is dropped before the next call,
+    so that it doesn't count against that one. The least of the calls is
+    reported, which leaves out one-off work like a cache filling up, or a
+    list that holds the heap's objects growing.
+
+    :returns: The blocks, and the peak bytes, of a call.
+    """
+    function()  # Warm up any caches.
+    filters = [_tracemalloc.Filter(False, _tracemalloc.__file__)]
+    least_blocks = least_peak = None
+    _gc.collect()
+    _tracemalloc.start()
+    try:
+        for _ in range(_ALLOCATION_CALLS):
+            before = _tracemalloc.take_snapshot().filter_traces(filters)
+            _tracemalloc.reset_peak()
+            base_memory, _ = _tracemalloc.get_traced_memory()
+            result = function()
+            _, peak_memory = _tracemalloc.get_traced_memory()
+            after = _tracemalloc.take_snapshot().filter_traces(filters)
+            del result
+            blocks = sum(
+                stat.count_diff
+                for stat in after.compare_to(before, 'filename')
+            )
+            # The snapshots themselves aren't traced, but the "before" one
+            # is still alive when the peak is taken.
+            peak = max(peak_memory - base_memory, 0)
+            if least_blocks is None or blocks < least_blocks:
+                least_blocks = blocks
+            if least_peak is None or peak < least_peak:
+                least_peak = peak
+    finally:
+        _tracemalloc.stop()
+    return max(least_blocks, 0), least_peak
+
+
+def run(name_filter=None, repeat=5, report=None):
+    """Run the registered benchmarks, and return their results.
+
+    :param name_filter:
+        If given, only benchmarks with this substring in their name are run.
+    :param repeat: The number of timing runs to take of each benchmark.
+    :param report: If given, called with the name and result of each
+        benchmark as it finishes.
+    """
+    results = _collections.OrderedDict()
+    for name, setup in _BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+        function = setup()
+        loops = _calibrate(function)
+        timings = sorted(
+            _time_loops(function, loops) / loops * 1e9
+            for _ in range(repeat)
+        )
+        blocks, peak_bytes = _measure_allocations(function)
+        result = _collections.OrderedDict((
+            ('ns_per_call_min', round(timings[0], 1)),
+            ('ns_per_call_median', round(timings[len(timings) // 2], 1)),
+            ('loops', loops),
+            ('repeat', repeat),
+            ('blocks_per_call', blocks),
+            ('peak_bytes_per_call', peak_bytes),
+        ))
+        results[name] = result
+        if report is not None:
+            report(name, result)
+    return results
+
+
+def to_json(results):
+    return _json.dumps(
+        _collections.OrderedDict((
+            ('python', _sys.version.split()[0]),
+            ('implementation', _platform.python_implementation()),
+            ('machine', _platform.machine()),
+            ('benchmarks', results),
+        )),
+        indent=2,
+    )
+
+
+def load_results(file_name):
+    with open(file_name) as file_:
+        return _json.load(file_)['benchmarks']
+
+
+Comparison = _collections.namedtuple(
+    'Comparison', ('name', 'baseline_ns', 'current_ns', 'ratio', 'regressed'),
+)
+
+
+def compare(baseline, current, tolerance):
+    """Compare the best timings of two sets of results.
+
+    The best (least) of a benchmark's timing runs is the one least disturbed
+    by whatever else the machine was doing, so it's what is compared. How
+    far a run's median is above its best says how noisy it was; a benchmark
+    has regressed if its best is slower than the baseline's by more than the
+    fraction ``tolerance``, and by more than the noise of both runs.
+
+    :returns:
+        A list of Comparison tuples, one for each benchmark present in both.
+    """
+    comparisons = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        baseline_ns = baseline[name]['ns_per_call_min']
+        current_ns = result['ns_per_call_min']
+        ratio = current_ns / baseline_ns if baseline_ns else float('inf')
+        allowed = max(
+            tolerance, _noise(baseline[name]) + _noise(result),
+        )
+        comparisons.append(Comparison(
+            name, baseline_ns, current_ns, ratio, ratio > 1 + allowed,
+        ))
+    return comparisons
+
+
+def _noise(result):
+    """How far a result's median timing is above its best, as a fraction."""
+    best = result['ns_per_call_min']
+    if not best:
+        return 0.0
+    return max(result['ns_per_call_median'] / best - 1, 0.0)
@@ -0,0 +1,93 @@
+"""End-to-end benchmarks of a WSGI request, from environ to response body."""
+
+from wob.http import errors as _errors
+from wob.http import request as _request
+from wob.http import response as _response
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+from . import headers as _headers
+from .runner import benchmark
+
+
+def _user(request, user_id):
+    return _response.text_response(u'user {}'.format(user_id))
+
+
+def _build_application():
+    router = _router.Router()
+    for index in range(50):
+        router.add_route(
+            _rpath.path_rule('/api/v1/resource{}/<item_id:int>'.format(index)),
+            {'GET': _user},
+        )
+    router.add_route(
+        _rpath.path_rule('/api/v1/users/<user_id:int>'), {'GET': _user},
+    )
+    router.compile()
+
+    def application(environ, start_response):
+        request = _request.request_from_wsgi(environ)
+        try:
+            response = router.route_request(request)
+        except _errors.HttpError as error:
+            response = _errors.to_simple_text_response(error)
+        return response.return_from_wsgi_app(start_response, environ)
+
+    return application
+
+
+def environment(path, method='GET'):
+    """A WSGI environment like one a typical server would produce."""
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'www.example.com',
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '10.0.0.1',
+        'CONTENT_TYPE': '',
+        'CONTENT_LENGTH': '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': None,
+        'wsgi.errors': None,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    environ.update(_headers.wsgi_environment_items())
+    return environ
+
+
+def _start_response(status, headers):
+    pass
+
+
+def _round_trip_benchmark(path, method='GET'):
+    def setup():
+        application = _build_application()
+        environ = environment(path, method)
+
+        def run():
+            body = application(environ, _start_response)
+            result = b''.join(body)
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+            return result
+        return run
+    return setup
+
+
+benchmark('wsgi.round_trip[200]')(
+    _round_trip_benchmark('/api/v1/users/1234')
+)
+benchmark('wsgi.round_trip[404]')(
+    _round_trip_benchmark('/wp-login.php')
+)
+benchmark('wsgi.round_trip[405]')(
+    _round_trip_benchmark('/api/v1/users/1234', method='POST')
+)
@@ -0,0 +1,48 @@
+import unittest
+
+from wob import cache
+
+
+class LruCacheTestCase(unittest.TestCase):
+    def test_eviction_order(self):
+        lru = cache.LruCache(2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        self.assertEqual(1, lru.get('a'))
+        lru.put('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(1, lru.get('a'))
+        self.assertEqual(3, lru.get('c'))
+        self.assertEqual(cache.CacheInfo(3, 1, 2, 2), lru.info())
+
+    def test_clear(self):
+        lru = cache.LruCache(2)
+        lru.put('a', 1)
+        lru.clear()
+        self.assertEqual(0, len(lru))
+        self.assertEqual('missing', lru.get('a', 'missing'))
+
+    def test_maxweight(self):
+        lru = cache.LruCache(
+            10, maxweight=10, weigh=lambda key, value: len(value),
+        )
+        lru.put('a', b'aaaa')
+        lru.put('b', b'bbbb')
+        lru.put('c', b'cccc')
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(8, lru.weight)
+        # Too heavy to cache at all, and replaces nothing.
+        lru.put('d', b'd' * 11)
+        self.assertIsNone(lru.get('d'))
+        self.assertEqual(b'bbbb', lru.get('b'))
+        lru.put('b', b'b')
+        self.assertEqual(5, lru.weight)
+        lru.clear()
+        self.assertEqual(0, lru.weight)
+
+    def test_maxsize_must_be_positive(self):
+        self.assertRaises(ValueError, cache.LruCache, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import doctest
+import gzip
+import io
+import unittest
+import zlib
+
+from wob.http import compression
+from wob.http import message
+from wob.http import request
+from wob.http import response
+
+
+def load_tests(loader, tests, pattern):
+    _ = loader, pattern
+    tests.addTests(doctest.DocTestSuite(compression))
+    return tests
+
+
+_TEXT = b'{"greeting": "hello, world"}\n' * 200
+
+
+def _request(accept_encoding='gzip, deflate'):
+    headers = message.Headers()
+    if accept_encoding is not None:
+        headers.add_header('Accept-Encoding', accept_encoding)
+    return request.Request('GET', '/', '/', headers)
+
+
+def _response(body=_TEXT, content_type='application/json', status_code=200):
+    return response.new_response(body, content_type, status_code=status_code)
+
+
+def _body(resp):
+    return b''.join(bytes(chunk) for chunk in resp.iter_body())
+
+
+class CompressorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.compressor = compression.Compressor()
+
+    def test_gzip(self):
+        original = _response()
+        compressed = self.compressor(_request(), original)
+        self.assertEqual('gzip', compressed.headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', compressed.headers['Vary'])
+        self.assertEqual(_TEXT, gzip.GzipFile(
+            fileobj=io.BytesIO(compressed.body),
+        ).read())
+        self.assertEqual(
+            str(len(compressed.body)),
+            dict(compressed.header_list())['Content-Length'],
+        )
+        # The original response is left alone.
+        self.assertEqual(_TEXT, original.body)
+        self.assertNotIn('Content-Encoding', original.headers)
+
+    def test_deflate(self):
+        compressed = self.compressor(_request('deflate'), _response())
+        self.assertEqual('deflate', compressed.headers['Content-Encoding'])
+        self.assertEqual(_TEXT, zlib.decompress(compressed.body))
+
+    def test_not_accepted(self):
+        for accept_encoding in (None, 'br', 'gzip;q=0, deflate;q=0'):
+            resp = self.compressor(_request(accept_encoding), _response())
+            self.assertEqual(_TEXT, resp.body)
+            self.assertNotIn('Content-Encoding', resp.headers)
+            self.assertEqual('Accept-Encoding', resp.headers['Vary'])
+
+    def test_skipped(self):
+        for resp in (
+                _response(b'{}'),
+                _response(content_type='image/png'),
+                _response(content_type='application/zip'),
+                _response(status_code=204)):
+            self.assertIs(resp, self.compressor(_request(), resp))
+
+        resp = _response()
+        resp.headers.add_header('Content-Encoding', 'br')
+        self.assertIs(resp, self.compressor(_request(), resp))
+
+    def test_streaming(self):
+        closed = []
+
+        class _Chunks(object):
+            def __iter__(self):
+                for _ in range(3):
+                    yield _TEXT
+
+            def close(self):
+                closed.append(True)
+
+        resp = self.compressor(_request(), _response(_Chunks()))
+        self.assertIsNone(resp.content_length)
+        self.assertEqual(
+            _TEXT * 3, zlib.decompress(_body(resp), 16 + zlib.MAX_WBITS),
+        )
+        resp.close()
+        self.assertEqual([True], closed)
+
+    def test_frozen_responses_are_compressed_once(self):
+        frozen = _response().freeze()
+        first = self.compressor(_request(), frozen)
+        second = self.compressor(_request(), frozen)
+        self.assertIs(first.body, second.body)
+        self.assertEqual(1, self.compressor.cache.misses)
+        self.assertEqual(1, self.compressor.cache.hits)
+
+    def test_strong_etag_is_weakened(self):
+        resp = _response()
+        resp.headers.add_header('ETag', '"abc"')
+        compressed = self.compressor(_request(), resp)
+        self.assertEqual('W/"abc"', compressed.headers['ETag'])
+
+    def test_add_vary(self):
+        headers = message.Headers([('Vary', 'Cookie')])
+        compression.add_vary(headers, 'Accept-Encoding')
+        compression.add_vary(headers, 'accept-encoding')
+        self.assertEqual('Cookie, Accept-Encoding', headers['Vary'])
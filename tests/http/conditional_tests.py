@@ -0,0 +1,160 @@
+import doctest
+import unittest
+
+from wob.http import conditional
+from wob.http import errors
+from wob.http import message
+from wob.http import request
+from wob.http import response
+
+
+def load_tests(loader, tests, pattern):
+    _ = loader, pattern
+    tests.addTests(doctest.DocTestSuite(conditional))
+    return tests
+
+
+# Sun, 06 Nov 1994 08:49:37 GMT
+_LAST_MODIFIED = 784111777
+
+
+def _request(method='GET', **headers):
+    return request.Request(method, '/', '/', message.Headers(
+        (name.replace('_', '-'), value) for name, value in headers.items()
+    ))
+
+
+class EvaluateTestCase(unittest.TestCase):
+    def test_no_preconditions(self):
+        self.assertIsNone(conditional.evaluate(_request(), '"a"', 0))
+
+    def test_if_none_match(self):
+        self.assertEqual(304, conditional.evaluate(
+            _request(If_None_Match='"b", W/"a"'), '"a"',
+        ))
+        self.assertEqual(304, conditional.evaluate(
+            _request(If_None_Match='*'), '"a"',
+        ))
+        self.assertIsNone(conditional.evaluate(
+            _request(If_None_Match='"b"'), '"a"',
+        ))
+        self.assertEqual(412, conditional.evaluate(
+            _request('PUT', If_None_Match='"a"'), '"a"',
+        ))
+
+    def test_if_modified_since(self):
+        since = conditional.http_date(_LAST_MODIFIED)
+        self.assertEqual(304, conditional.evaluate(
+            _request(If_Modified_Since=since), last_modified=_LAST_MODIFIED,
+        ))
+        self.assertIsNone(conditional.evaluate(
+            _request(If_Modified_Since=since),
+            last_modified=_LAST_MODIFIED + 1,
+        ))
+        # If-None-Match takes precedence.
+        self.assertIsNone(conditional.evaluate(
+            _request(If_Modified_Since=since, If_None_Match='"b"'),
+            '"a"', _LAST_MODIFIED,
+        ))
+        for invalid in ('yesterday', 'Sun, 06 Nov 99999 08:49:37 GMT'):
+            self.assertIsNone(conditional.evaluate(
+                _request(If_Modified_Since=invalid),
+                last_modified=_LAST_MODIFIED,
+            ))
+
+    def test_if_match(self):
+        self.assertIsNone(conditional.evaluate(
+            _request('PUT', If_Match='"a"'), '"a"',
+        ))
+        # If-Match uses the strong comparison.
+        self.assertEqual(412, conditional.evaluate(
+            _request('PUT', If_Match='W/"a"'), 'W/"a"',
+        ))
+        self.assertEqual(412, conditional.evaluate(
+            _request('PUT', If_Unmodified_Since=conditional.http_date(0)),
+            last_modified=_LAST_MODIFIED,
+        ))
+
+
+class CheckTestCase(unittest.TestCase):
+    def test_not_modified(self):
+        req = _request(If_None_Match='"v2"')
+        with self.assertRaises(errors.NotModified) as context:
+            conditional.check(
+                req, etag='"v2"', last_modified=_LAST_MODIFIED,
+            )
+
+        resp = errors.to_simple_text_response(context.exception)
+        self.assertEqual('304 Not Modified', resp.status_line)
+        self.assertEqual(b'', resp.body)
+        self.assertEqual(
+            [
+                ('ETag', '"v2"'),
+                ('Last-Modified', 'Sun, 06 Nov 1994 08:49:37 GMT'),
+            ],
+            resp.header_list(),
+        )
+
+    def test_modified(self):
+        conditional.check(_request(If_None_Match='"v1"'), etag='"v2"')
+        with self.assertRaises(errors.PreconditionFailed):
+            conditional.check(_request('PUT', If_Match='"v1"'), etag='"v2"')
+
+
+class ConditionalGetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.conditional_get = conditional.ConditionalGet()
+
+    def test_adds_weak_etag(self):
+        resp = self.conditional_get(
+            _request(), response.text_response(u'hello'),
+        )
+        self.assertEqual(
+            conditional.weak_etag(b'hello'), resp.headers['ETag'],
+        )
+
+    def test_not_modified(self):
+        original = response.text_response(u'hello')
+        original.headers.add_header('Cache-Control', 'max-age=60')
+        resp = self.conditional_get(
+            _request(If_None_Match=conditional.weak_etag(b'hello')), original,
+        )
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(b'', resp.body)
+        self.assertEqual(
+            [
+                ('Cache-Control', 'max-age=60'),
+                ('ETag', conditional.weak_etag(b'hello')),
+            ],
+            resp.header_list(),
+        )
+
+    def test_last_modified(self):
+        original = response.text_response(u'hello', headers=[
+            ('Last-Modified', conditional.http_date(_LAST_MODIFIED)),
+        ])
+        resp = self.conditional_get(_request(
+            If_Modified_Since=conditional.http_date(_LAST_MODIFIED + 60),
+        ), original)
+        self.assertEqual(304, resp.status_code)
+        self.assertNotIn('ETag', resp.headers)
+
+    def test_frozen_etags_are_cached(self):
+        frozen = response.text_response(u'hello').freeze()
+        self.conditional_get(_request(), frozen)
+        self.conditional_get(_request(), frozen)
+        self.assertEqual(1, self.conditional_get.cache.hits)
+
+    def test_unsafe_methods_pass_through(self):
+        original = response.text_response(u'created')
+        resp = self.conditional_get(
+            _request('POST', If_Match='"other"'), original,
+        )
+        self.assertIs(original, resp)
+        self.assertNotIn('ETag', resp.headers)
+
+    def test_other_statuses_pass_through(self):
+        resp = errors.to_simple_text_response(errors.NotFound())
+        self.assertIs(resp, self.conditional_get(
+            _request(If_None_Match='*'), resp,
+        ))
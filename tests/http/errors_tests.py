@@ -0,0 +1,73 @@
+import unittest
+
+from wob.http import errors
+from wob.http import message
+
+
+class SimpleTextResponseTestCase(unittest.TestCase):
+    def test_canned_response(self):
+        response = errors.to_simple_text_response(errors.NotFound())
+        self.assertEqual('404 Not Found', response.status_line)
+        self.assertEqual(b'404 Not Found\n', response.body)
+        self.assertEqual(
+            [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Length', '14'),
+            ],
+            response.header_list(),
+        )
+        self.assertIs(
+            response, errors.to_simple_text_response(errors.NotFound()),
+        )
+
+    def test_canned_response_is_frozen(self):
+        response = errors.to_simple_text_response(errors.Gone())
+        with self.assertRaises(AttributeError):
+            response.status_code = 200
+        self.assertRaises(
+            TypeError, response.headers.add_header, 'X-Thing', 'a',
+        )
+
+        response_copy = response.copy()
+        response_copy.headers.add_header('X-Thing', 'a')
+        response_copy.status_code = 200
+        self.assertNotIn('X-Thing', response.headers)
+
+    def test_method_not_allowed(self):
+        error = errors.MethodNotAllowed(['POST', 'GET'])
+        self.assertEqual(405, error.status_code)
+        self.assertEqual('Method Not Allowed', error.reason_phrase)
+        response = errors.to_simple_text_response(error)
+        self.assertEqual('GET, POST', response.headers['Allow'])
+        self.assertIs(
+            response,
+            errors.to_simple_text_response(
+                errors.MethodNotAllowed(['GET', 'POST']),
+            ),
+        )
+
+    def test_custom_reason_phrase(self):
+        error = errors.HttpError(404, 'Nothing Here')
+        response = errors.to_simple_text_response(error)
+        self.assertEqual('404 Nothing Here', response.status_line)
+        self.assertEqual(b'404 Nothing Here\n', response.body)
+
+    def test_extra_headers_override(self):
+        class Teapot(errors.HttpError):
+            status_code = 418
+            reason_phrase = "I'm a teapot"
+
+            def __init__(self):
+                super(Teapot, self).__init__(None)
+
+            def extra_headers(self):
+                return message.Headers((('X-Tea', 'earl grey'),))
+
+        response = errors.to_simple_text_response(Teapot())
+        self.assertEqual("418 I'm a teapot", response.status_line)
+        self.assertEqual('earl grey', response.headers['X-Tea'])
+        response.headers.add_header('X-Thing', 'a')
+
+
+if __name__ == '__main__':
+    unittest.main()
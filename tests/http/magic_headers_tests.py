@@ -0,0 +1,192 @@
+import doctest
+import time
+import unittest
+
+from wob.http import magic_headers
+from wob.http import message
+from wob.http import request
+
+
+def load_tests(loader, tests, pattern):
+    _ = loader, pattern
+    tests.addTests(doctest.DocTestSuite(magic_headers))
+    return tests
+
+
+class AcceptTestCase(unittest.TestCase):
+    def test_order_and_parameters(self):
+        accept = magic_headers.parse_accept(
+            'text/html;level=1;q=0.7, application/json, TEXT/*;q=0.2;ext=1',
+        )
+        self.assertEqual(
+            [
+                ('application/json', 1.0, ()),
+                ('text/html', 0.7, (('level', '1'),)),
+                ('text/*', 0.2, ()),
+            ],
+            list(accept),
+        )
+
+    def test_most_specific_range_wins(self):
+        accept = magic_headers.parse_accept(
+            'text/*;q=0.3, text/html;q=0.7, text/html;level=1, */*;q=0.5',
+        )
+        self.assertEqual(1.0, accept.quality('text/html;level=1'))
+        self.assertEqual(0.7, accept.quality('text/html'))
+        self.assertEqual(0.3, accept.quality('text/plain'))
+        self.assertEqual(0.5, accept.quality('image/png'))
+
+    def test_refused(self):
+        accept = magic_headers.parse_accept('text/html, */*;q=0')
+        self.assertEqual(0.0, accept.quality('image/png'))
+        self.assertIsNone(accept.best(['image/png']))
+
+    def test_absent(self):
+        accept = magic_headers.parse_accept(None)
+        self.assertFalse(accept.present)
+        self.assertEqual('image/png', accept.best(['image/png', 'text/html']))
+
+    def test_invalid_quality(self):
+        accept = magic_headers.parse_accept('a/b;q=x, c/d;q=2, e/f;q=nan')
+        self.assertEqual(
+            [0.0, 0.0, 0.0], [item.quality for item in accept],
+        )
+
+    def test_quoted_parameters(self):
+        accept = magic_headers.parse_accept('a/b;x="1,2;3", c/d')
+        self.assertEqual(
+            [('x', '1,2;3')], list(list(accept)[0].parameters),
+        )
+        self.assertEqual(2, len(accept))
+
+    def test_unterminated_quotes(self):
+        # An unterminated quoted string runs to the end, and is left as is.
+        accept = magic_headers.parse_accept('a/b;x="1, c/d, e/f')
+        self.assertEqual(
+            [('x', '"1, c/d, e/f')], list(list(accept)[0].parameters),
+        )
+        # Quadratic (or worse) to split with backtracking.
+        value = 'x' + '"\\' * (magic_headers.MAX_VALUE_LENGTH * 4)
+        for parse in (
+                magic_headers.parse_accept,
+                magic_headers.parse_cache_control):
+            start = time.time()
+            parse(value)
+            self.assertLess(time.time() - start, 1.0)
+
+    def test_encoding_identity(self):
+        parse = magic_headers.parse_accept_encoding
+        self.assertEqual(1.0, parse('gzip').quality('identity'))
+        self.assertEqual(0.0, parse('gzip, *;q=0').quality('identity'))
+        self.assertEqual(0.0, parse('identity;q=0').quality('identity'))
+        self.assertEqual('deflate', parse('gzip;q=0, *').best(
+            ['gzip', 'deflate'],
+        ))
+
+    def test_language(self):
+        accept_language = magic_headers.parse_accept_language(
+            'fr-CH, fr;q=0.9, en;q=0.8, *;q=0.5',
+        )
+        self.assertEqual(1.0, accept_language.quality('fr-ch'))
+        self.assertEqual(0.9, accept_language.quality('fr-FR'))
+        self.assertEqual(0.8, accept_language.quality('en-US'))
+        self.assertEqual(0.5, accept_language.quality('de'))
+        self.assertEqual('fr', accept_language.best(['en', 'fr']))
+
+    def test_memoized(self):
+        parse = magic_headers.parse_accept_charset
+        value = 'utf-8, iso-8859-1;q=0.5, memoized-test'
+        self.assertIs(parse(value), parse(value))
+        self.assertIn(value, parse.cache.keys())
+
+
+class CacheControlTestCase(unittest.TestCase):
+    def test_directives(self):
+        cache_control = magic_headers.parse_cache_control(
+            'No-Store, max-age=60, private="Set-Cookie, X-A", max-age=5',
+        )
+        self.assertTrue(cache_control.no_store)
+        self.assertFalse(cache_control.no_cache)
+        self.assertEqual(60, cache_control.max_age)
+        self.assertEqual('Set-Cookie, X-A', cache_control.get('private'))
+        self.assertEqual(
+            set(['no-store', 'max-age', 'private']), set(cache_control),
+        )
+
+    def test_invalid_max_age(self):
+        for value in (
+                None, 'max-age', 'max-age=-1', 'max-age=1.5',
+                u'max-age=\u00b2'):
+            self.assertIsNone(
+                magic_headers.parse_cache_control(value).max_age,
+            )
+
+
+class UserAgentTestCase(unittest.TestCase):
+    def test_products_and_comments(self):
+        user_agent = magic_headers.parse_user_agent(
+            'Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101'
+            ' (nested (comment) \\) here) Firefox/115.0 bot',
+        )
+        self.assertEqual(
+            (
+                ('Mozilla', '5.0', ('X11; Linux x86_64',)),
+                ('Gecko', '20100101', ('nested (comment) \\) here',)),
+                ('Firefox', '115.0', ()),
+                ('bot', None, ()),
+            ),
+            user_agent.products,
+        )
+        self.assertEqual('Mozilla', user_agent.name)
+
+    def test_absent(self):
+        user_agent = magic_headers.parse_user_agent(None)
+        self.assertEqual((), user_agent.products)
+        self.assertIsNone(user_agent.name)
+        self.assertEqual('', str(user_agent))
+
+
+class RequestAccessorsTestCase(unittest.TestCase):
+    def test_parsed_once_per_value(self):
+        request_ = request.Request('GET', '/', '/', message.Headers([
+            ('Accept', 'text/html'),
+            ('Accept-Encoding', 'gzip'),
+            ('Accept-Language', 'en'),
+            ('Accept-Charset', 'utf-8'),
+            ('Cache-Control', 'no-cache'),
+            ('User-Agent', 'curl/8.1.2'),
+        ]))
+        self.assertIs(request_.accept, request_.accept)
+        self.assertEqual('text/html', request_.accept.best(['text/html']))
+        self.assertEqual(1.0, request_.accept_encoding.quality('gzip'))
+        self.assertEqual(1.0, request_.accept_language.quality('en-GB'))
+        self.assertEqual(0.0, request_.accept_charset.quality('latin-1'))
+        self.assertTrue(request_.cache_control.no_cache)
+        self.assertEqual('curl', request_.user_agent.name)
+
+        request_.headers.set_header('Accept', 'application/json')
+        self.assertEqual(0.0, request_.accept.quality('text/html'))
+
+    def test_copy_keeps_its_own_headers(self):
+        request_ = request.Request('GET', '/', '/', message.Headers([
+            ('Accept', 'text/html'),
+        ]))
+        self.assertEqual(1.0, request_.accept.quality('text/html'))
+        copy = request_.copy()
+        copy.headers.set_header('Accept', 'image/png')
+        self.assertEqual(0.0, copy.accept.quality('text/html'))
+        self.assertEqual(1.0, request_.accept.quality('text/html'))
+
+    def test_wsgi_headers(self):
+        request_ = request.WsgiRequest({
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': '/',
+            'HTTP_USER_AGENT': 'agent/1',
+        })
+        self.assertEqual('1', request_.user_agent.version)
+        self.assertFalse(request_.accept.present)
+
+
+if __name__ == '__main__':
+    unittest.main()
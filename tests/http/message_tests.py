@@ -0,0 +1,189 @@
+import doctest
+import unittest
+
+from wob.http import message
+
+
+def load_tests(loader, tests, pattern):
+    _ = loader, pattern
+    tests.addTests(doctest.DocTestSuite(message))
+    return tests
+
+
+class HeadersTestCase(unittest.TestCase):
+    def _headers(self):
+        return message.Headers((
+            ('Host', 'example.com'),
+            ('Accept', 'text/html'),
+            ('Connection', 'keep-alive'),
+            ('accept', 'application/json'),
+            ('X-Thing', 'a'),
+        ))
+
+    def test_order_and_duplicates(self):
+        headers = self._headers()
+        self.assertEqual(5, len(headers))
+        self.assertEqual(
+            ['Host', 'Accept', 'Connection', 'accept', 'X-Thing'],
+            list(headers),
+        )
+        self.assertEqual(
+            ['text/html', 'application/json'],
+            list(headers.get_all_headers('ACCEPT')),
+        )
+        self.assertEqual('text/html, application/json', headers['Accept'])
+        self.assertIsNone(headers.get('Missing'))
+        self.assertRaises(KeyError, lambda: headers['Missing'])
+
+    def test_remove_header(self):
+        headers = self._headers()
+        headers.remove_header('Accept')
+        headers.remove_header('Missing')
+        self.assertNotIn('Accept', headers)
+        self.assertEqual(
+            [
+                ('Host', 'example.com'),
+                ('Connection', 'keep-alive'),
+                ('X-Thing', 'a'),
+            ],
+            list(headers.items()),
+        )
+        self.assertEqual(3, len(headers))
+
+        del headers['connection']
+        self.assertEqual(['Host', 'X-Thing'], list(headers))
+        with self.assertRaises(KeyError):
+            del headers['connection']
+
+    def test_remove_index(self):
+        headers = self._headers()
+        headers.remove_index(1)
+        headers.remove_index(-1)
+        self.assertEqual(['Host', 'Connection', 'accept'], list(headers))
+        self.assertEqual('application/json', headers['Accept'])
+        self.assertRaises(IndexError, headers.remove_index, 3)
+
+    def test_set_header(self):
+        headers = self._headers()
+        headers.set_header('ACCEPT', '*/*')
+        headers.set_header('X-New', 'b')
+        self.assertEqual(
+            [
+                ('Host', 'example.com'),
+                ('ACCEPT', '*/*'),
+                ('Connection', 'keep-alive'),
+                ('X-Thing', 'a'),
+                ('X-New', 'b'),
+            ],
+            list(headers.items()),
+        )
+
+    def test_many_removals(self):
+        headers = message.Headers(
+            ('X-Header-{}'.format(i), str(i)) for i in range(100)
+        )
+        for i in range(0, 100, 2):
+            headers.remove_header('X-Header-{}'.format(i))
+        self.assertEqual(50, len(headers))
+        self.assertEqual(
+            [str(i) for i in range(1, 100, 2)],
+            [value for _, value in headers.items()],
+        )
+        self.assertEqual('51', headers['x-header-51'])
+
+    def test_many_removals_by_index(self):
+        class CountingHeaders(message.Headers):
+            __slots__ = ('compactions',)
+
+            def _compact(self):
+                self.compactions += 1
+                super(CountingHeaders, self)._compact()
+
+        headers = CountingHeaders(
+            ('X-Header-{}'.format(i), str(i)) for i in range(100)
+        )
+        headers.compactions = 0
+        for i in range(50):
+            headers.remove_index(i)
+        self.assertEqual(
+            [str(i) for i in range(1, 100, 2)],
+            [value for _, value in headers.items()],
+        )
+        # Compacted when holes make up half of the storage, not on every
+        # removal after the first.
+        self.assertLessEqual(headers.compactions, 2)
+
+    def test_copy(self):
+        headers = self._headers()
+        headers.remove_header('Connection')
+        headers_copy = headers.copy()
+        self.assertEqual(headers, headers_copy)
+        headers_copy.add_header('X-Thing', 'b')
+        self.assertEqual('a', headers['X-Thing'])
+        self.assertEqual('a, b', headers_copy['X-Thing'])
+
+    def test_copy_shares_storage_until_modified(self):
+        headers = self._headers()
+        headers_copy = headers.copy()
+        self.assertIs(headers._names, headers_copy._names)
+
+        # Modifying either one leaves the other alone.
+        headers.remove_header('accept')
+        self.assertIsNot(headers._names, headers_copy._names)
+        self.assertNotIn('Accept', headers)
+        self.assertEqual('text/html, application/json', headers_copy['Accept'])
+        headers_copy.set_header('X-Thing', 'b')
+        self.assertEqual('a', headers.get('X-Thing'))
+        self.assertEqual('b', headers_copy.get('X-Thing'))
+
+
+class WsgiHeadersTestCase(unittest.TestCase):
+    def _environ(self):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'CONTENT_TYPE': 'text/plain',
+            'HTTP_HOST': 'example.com',
+            'HTTP_X_FORWARDED_FOR': '10.0.0.1, 10.0.0.2',
+        }
+
+    def test_lookup(self):
+        headers = message.WsgiHeaders(self._environ())
+        self.assertEqual('example.com', headers['host'])
+        self.assertEqual('10.0.0.1, 10.0.0.2', headers['X-Forwarded-For'])
+        self.assertIn('x-forwarded-for', headers)
+        self.assertNotIn('Content-Type', headers)
+        self.assertNotIn('X_Forwarded_For', headers)
+        self.assertIsNone(headers.get('Accept'))
+        self.assertRaises(KeyError, lambda: headers['Accept'])
+        self.assertEqual(2, len(headers))
+        self.assertEqual(
+            sorted(['Host', 'X-Forwarded-For']), sorted(headers),
+        )
+
+    def test_matches_eager_headers(self):
+        environ = self._environ()
+        self.assertEqual(
+            message.headers_from_wsgi_environment(environ),
+            message.WsgiHeaders(environ),
+        )
+
+    def test_copy_on_write(self):
+        environ = self._environ()
+        headers = message.WsgiHeaders(environ)
+        headers_copy = headers.copy()
+        headers_copy.set_header('Host', 'example.org')
+        headers_copy.remove_header('X-Forwarded-For')
+
+        self.assertEqual('example.org', headers_copy['Host'])
+        self.assertNotIn('X-Forwarded-For', headers_copy)
+        self.assertEqual('example.com', headers['Host'])
+        self.assertEqual('example.com', environ['HTTP_HOST'])
+        self.assertIn('HTTP_X_FORWARDED_FOR', environ)
+
+    def test_malformed_key(self):
+        headers = message.WsgiHeaders({'HTTP_': 'x'})
+        self.assertRaises(ValueError, list, headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
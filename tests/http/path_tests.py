@@ -30,6 +30,29 @@ class PathTestCase(unittest.TestCase):
         self.assertSequenceEqual(('',), list(path.Path('/').components))
         self.assertSequenceEqual(('',), list(path.Path('///').components))
 
+    def test_canonicalize(self):
+        canonical = path.Path('//a/./b/../c/').canonicalize()
+        self.assertEqual('/a/c', str(canonical))
+        self.assertEqual(('', 'a', 'c'), canonical.components)
+        self.assertIs(canonical, canonical.canonicalize())
+
+        already_canonical = path.Path('/a/c')
+        self.assertIs(already_canonical, already_canonical.canonicalize())
+
+        self.assertRaises(ValueError, path.Path('/a/../..').canonicalize)
+
+    def test_startswith(self):
+        self.assertTrue(path.Path('/a/b/c').startswith(path.Path('/a/b')))
+        self.assertTrue(path.Path('/a/b').startswith(path.Path('/')))
+        self.assertFalse(path.Path('/a/b').startswith(path.Path('/a/b/c')))
+        self.assertFalse(path.Path('/ab/c').startswith(path.Path('/a')))
+
+    def test_strip_prefix(self):
+        full = path.Path('/a/b/c').canonicalize()
+        self.assertEqual('/b/c', str(full.strip_prefix(path.Path('/a'))))
+        self.assertEqual('/', str(full.strip_prefix(full)))
+        self.assertRaises(ValueError, full.strip_prefix, path.Path('/b'))
+
 
 if __name__ == '__main__':
     unittest.main()
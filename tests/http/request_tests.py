@@ -0,0 +1,128 @@
+import io
+import socket
+import unittest
+
+from wob.http import errors
+from wob.http import message
+from wob.http import request
+
+
+def _wsgi_request(body, content_length=None, **environment):
+    environment.update({
+        'REQUEST_METHOD': 'POST',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': '/upload',
+        'wsgi.input': io.BytesIO(body),
+    })
+    if content_length is not None:
+        environment['CONTENT_LENGTH'] = str(content_length)
+    return request.WsgiRequest(environment)
+
+
+class _TrickleStream(object):
+    """A stream without readinto(), that returns a few bytes at a time."""
+
+    def __init__(self, data, step):
+        self.data = data
+        self.step = step
+
+    def read(self, size):
+        chunk = self.data[:min(size, self.step)]
+        self.data = self.data[len(chunk):]
+        return chunk
+
+
+class _TimingOutStream(object):
+    def readinto(self, buffer):
+        raise socket.timeout()
+
+
+class RequestBodyTestCase(unittest.TestCase):
+    def test_read_body(self):
+        req = _wsgi_request(b'hello, world', content_length=5)
+        self.assertEqual(5, req.content_length)
+        body = req.read_body()
+        self.assertIsInstance(body, bytearray)
+        self.assertEqual(b'hello', body)
+
+    def test_iter_body_reuses_buffer(self):
+        req = _wsgi_request(b'abcdefghij', content_length=10)
+        chunks = []
+        buffers = set()
+        for chunk in req.iter_body(chunk_size=4):
+            self.assertIsInstance(chunk, memoryview)
+            chunks.append(bytes(chunk))
+            buffers.add(id(chunk.obj))
+        self.assertEqual([b'abcd', b'efgh', b'ij'], chunks)
+        self.assertEqual(1, len(buffers))
+
+    def test_stream_without_readinto(self):
+        req = request.Request(
+            'POST', '/', '/',
+            message.Headers([('Content-Length', '10')]),
+            _TrickleStream(b'0123456789', 3),
+        )
+        self.assertEqual(b'0123456789', req.read_body(chunk_size=4))
+
+    def test_no_length(self):
+        # Without a Content-Length, wsgi.input isn't read, unless the server
+        # says that it ends with the body.
+        self.assertEqual(b'', _wsgi_request(b'body').read_body())
+        req = _wsgi_request(b'body', **{'wsgi.input_terminated': True})
+        self.assertEqual(b'body', req.read_body())
+        with self.assertRaises(errors.LengthRequired):
+            _wsgi_request(b'body').read_body(require_length=True)
+
+    def test_payload_too_large(self):
+        req = _wsgi_request(b'x' * 100, content_length=100)
+        # Refused from the Content-Length alone, before anything is read.
+        with self.assertRaises(errors.PayloadTooLarge):
+            req.body_reader(max_size=99)
+        self.assertEqual(0, req.wsgi_environment['wsgi.input'].tell())
+
+        req = _wsgi_request(
+            b'x' * 100, **{'wsgi.input_terminated': True}
+        )
+        with self.assertRaises(errors.PayloadTooLarge):
+            req.read_body(max_size=50, chunk_size=16)
+
+        req = _wsgi_request(b'x' * 100, content_length=100)
+        req.max_body_size = 10
+        with self.assertRaises(errors.PayloadTooLarge):
+            req.read_body()
+        self.assertEqual(100, len(req.read_body(max_size=None)))
+
+    def test_truncated_body(self):
+        req = _wsgi_request(b'short', content_length=10)
+        with self.assertRaises(errors.BadRequest):
+            req.read_body()
+
+    def test_huge_content_length(self):
+        # Not allocated up front; the client hangs up long before.
+        req = _wsgi_request(b'short', content_length=2 ** 62)
+        with self.assertRaises(errors.BadRequest):
+            req.read_body(max_size=None)
+
+        req = _wsgi_request(b'x' * 100, content_length=100)
+        self.assertEqual(b'x' * 100, req.read_body(chunk_size=4))
+
+    def test_content_length(self):
+        self.assertEqual(12, _wsgi_request(b'', content_length=' 12 ')
+                         .content_length)
+        self.assertIsNone(_wsgi_request(b'', content_length='')
+                          .content_length)
+        for value in ('-1', '1.5', 'ten', '\u0661'):
+            with self.assertRaises(errors.BadRequest):
+                _wsgi_request(b'', content_length=value).content_length
+
+    def test_timeout(self):
+        req = request.Request(
+            'POST', '/', '/',
+            message.Headers([('Content-Length', '10')]),
+            _TimingOutStream(),
+        )
+        with self.assertRaises(errors.RequestTimeout):
+            req.read_body()
+        req = _wsgi_request(b'x' * 100, content_length=100)
+        with self.assertRaises(errors.RequestTimeout):
+            req.read_body(timeout=-1)
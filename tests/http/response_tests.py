@@ -0,0 +1,130 @@
+import io
+import mmap
+import os
+import pickle
+import tempfile
+import unittest
+
+from wob.http import message
+from wob.http import response
+
+
+class _StartResponse(object):
+    def __call__(self, status, headers):
+        self.status = status
+        self.headers = headers
+
+
+class _FileWrapper(object):
+    def __init__(self, file_, block_size):
+        self.file = file_
+        self.block_size = block_size
+
+
+class ResponseBodyTestCase(unittest.TestCase):
+    def _response(self, body, chunk_size=None):
+        return response.Response(
+            200, 'OK', message.Headers(), body, chunk_size=chunk_size,
+        )
+
+    def _send(self, resp, environ=None):
+        start_response = _StartResponse()
+        body = resp.return_from_wsgi_app(start_response, environ)
+        return start_response, body
+
+    def test_bytes(self):
+        start_response, body = self._send(self._response(b'hello'))
+        self.assertEqual('200 OK', start_response.status)
+        self.assertEqual(
+            [('Content-Length', '5')], start_response.headers,
+        )
+        self.assertEqual((b'hello',), body)
+
+    def test_existing_content_length_is_kept(self):
+        resp = self._response(b'hello')
+        resp.headers.add_header('Content-Length', '5')
+        start_response, _ = self._send(resp)
+        self.assertEqual([('Content-Length', '5')], start_response.headers)
+
+    def test_memoryview(self):
+        resp = self._response(memoryview(b'abcdefg')[1:], chunk_size=4)
+        self.assertEqual(6, resp.content_length)
+        chunks = list(resp.iter_body())
+        self.assertTrue(all(isinstance(c, memoryview) for c in chunks))
+        start_response, body = self._send(resp)
+        self.assertEqual([b'bcde', b'fg'], list(body))
+        self.assertEqual(
+            [('Content-Length', '6')], start_response.headers,
+        )
+
+    def test_mmap(self):
+        mapping = mmap.mmap(-1, 10)
+        mapping.write(b'0123456789')
+        resp = self._response(mapping, chunk_size=6)
+        start_response, body = self._send(resp)
+        self.assertEqual([b'012345', b'6789'], list(body))
+        body.close()
+        self.assertTrue(mapping.closed)
+
+    def test_generator(self):
+        closed = []
+
+        def generate():
+            try:
+                yield b'a'
+                yield b'b'
+            finally:
+                closed.append(True)
+
+        start_response, body = self._send(self._response(generate()))
+        self.assertEqual([], start_response.headers)
+        self.assertEqual([b'a', b'b'], list(body))
+        body.close()
+        self.assertEqual([True], closed)
+
+    def test_file(self):
+        with tempfile.NamedTemporaryFile(delete=False) as file_:
+            file_.write(b'x' * 10)
+        self.addCleanup(os.unlink, file_.name)
+
+        with open(file_.name, 'rb') as body_file:
+            body_file.seek(3)
+            resp = self._response(body_file, chunk_size=4)
+            start_response, body = self._send(resp)
+            self.assertEqual(
+                [('Content-Length', '7')], start_response.headers,
+            )
+            self.assertEqual([b'xxxx', b'xxx'], list(body))
+            body.close()
+            self.assertTrue(body_file.closed)
+
+        with open(file_.name, 'rb') as body_file:
+            environ = {'wsgi.file_wrapper': _FileWrapper}
+            resp = self._response(body_file, chunk_size=4)
+            _, body = self._send(resp, environ)
+            self.assertIsInstance(body, _FileWrapper)
+            self.assertIs(body_file, body.file)
+            self.assertEqual(4, body.block_size)
+
+    def test_file_without_descriptor(self):
+        resp = self._response(io.BytesIO(b'abc'))
+        self.assertIsNone(resp.content_length)
+        _, body = self._send(resp)
+        self.assertEqual([b'abc'], list(body))
+
+
+
+class FrozenResponseTestCase(unittest.TestCase):
+    def test_pickle(self):
+        frozen = response.text_response(u'hello').freeze()
+        unpickled = pickle.loads(pickle.dumps(frozen, pickle.HIGHEST_PROTOCOL))
+        self.assertIsInstance(unpickled, response.FrozenResponse)
+        self.assertEqual('200 OK', unpickled.status_line)
+        self.assertEqual(frozen.header_list(), unpickled.header_list())
+        self.assertEqual(b'hello', unpickled.body)
+        with self.assertRaises(AttributeError):
+            unpickled.body = b''
+
+
+if __name__ == '__main__':
+    unittest.main()
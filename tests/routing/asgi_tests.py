@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+
+from wob.http import asgi as _http_asgi
+from wob.http import errors as _errors
+from wob.http import response as _response
+from wob.routing import asgi as _asgi
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+def _scope(path, method='GET', root_path=''):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'root_path': root_path,
+        'headers': [(b'host', b'example.com')],
+    }
+
+
+async def _no_body():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+def _call(application, scope):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, _no_body, send))
+    return sent
+
+
+class AsgiApplicationTestCase(unittest.TestCase):
+    def setUp(self):
+        def hello(request, name):
+            return _response.text_response(
+                u'hello {} via {}'.format(name, request.headers['Host'])
+            )
+
+        async def slow(request):
+            await asyncio.sleep(0)
+            return _response.text_response(u'done')
+
+        async def stream(request):
+            async def chunks():
+                yield b'a'
+                yield b'b'
+            return _response.new_response(chunks(), 'text/plain')
+
+        router = _router.Router()
+        router.add_route(
+            _rpath.path_rule('/hello/<name:string>'), {'GET': hello},
+        )
+        router.add_route(_rpath.path_rule('/slow'), {'GET': slow})
+        router.add_route(_rpath.path_rule('/stream'), {'GET': stream})
+        self.application = _asgi.AsgiApplication(router)
+
+    def test_sync_endpoint(self):
+        scope = _scope('/app/hello/bob', root_path='/app')
+        start, body = _call(self.application, scope)
+        self.assertEqual(200, start['status'])
+        self.assertIn(
+            (b'Content-Type', b'text/plain; charset=utf-8'), start['headers'],
+        )
+        self.assertEqual(b'hello bob via example.com', body['body'])
+        self.assertFalse(body.get('more_body', False))
+
+    def test_root_path(self):
+        for path, root_path, expected in (
+                ('/app/hello', '/app', '/hello'),
+                ('/app', '/app', '/'),
+                ('/app/hello', '/app/', '/hello'),
+                ('/hello', '/app', '/hello'),
+                ('/apple', '/app', '/apple')):
+            request = _http_asgi.request_from_asgi(
+                _scope(path, root_path=root_path),
+            )
+            self.assertEqual(expected, request.path.text, (path, root_path))
+
+        start, _ = _call(self.application, _scope('/apple', root_path='/app'))
+        self.assertEqual(404, start['status'])
+
+    def test_query_string(self):
+        scope = _scope('/hello')
+        self.assertEqual(
+            '', _http_asgi.request_from_asgi(scope).query_string,
+        )
+        scope['query_string'] = b'a=1&b=%C3%A9'
+        self.assertEqual(
+            'a=1&b=%C3%A9', _http_asgi.request_from_asgi(scope).query_string,
+        )
+
+    def test_read_body(self):
+        scope = _scope('/upload', method='POST')
+        scope['headers'].append((b'content-length', b'5'))
+        request = _http_asgi.request_from_asgi(scope)
+        self.assertRaises(TypeError, request.read_body)
+        self.assertRaises(TypeError, request.iter_body)
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'hello'}
+
+        request = _http_asgi.request_from_asgi(scope, receive)
+        request.max_body_size = 4
+        with self.assertRaises(_errors.PayloadTooLarge):
+            asyncio.run(_http_asgi.read_body(request))
+        self.assertEqual(b'hello', asyncio.run(
+            _http_asgi.read_body(request, max_size=None),
+        ))
+
+    def test_async_endpoint(self):
+        start, body = _call(self.application, _scope('/slow'))
+        self.assertEqual(200, start['status'])
+        self.assertEqual(b'done', body['body'])
+
+    def test_streaming_body(self):
+        sent = _call(self.application, _scope('/stream'))
+        self.assertEqual(
+            [b'a', b'b', b''], [message['body'] for message in sent[1:]],
+        )
+        self.assertEqual(
+            [True, True, False],
+            [message.get('more_body', False) for message in sent[1:]],
+        )
+
+    def test_not_found(self):
+        start, body = _call(self.application, _scope('/missing'))
+        self.assertEqual(404, start['status'])
+        self.assertEqual(b'404 Not Found\n', body['body'])
+
+    def test_response_filters_apply_to_async_endpoints(self):
+        def add_header(request, response):
+            response.headers.add_header('X-Filtered', 'yes')
+            return response
+
+        self.application.router.add_response_filter(add_header)
+        start, body = _call(self.application, _scope('/slow'))
+        self.assertIn((b'X-Filtered', b'yes'), start['headers'])
+        self.assertEqual(b'done', body['body'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from wob.http import request as _request
+from wob.routing import compiled as _compiled
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+# The endpoints are pickled by reference, so they must be module-level.
+
+def _user(request, user_id):
+    return 'user', user_id
+
+
+def _files(request, remaining):
+    return 'files', remaining.text
+
+
+def _anything(request):
+    return 'anything'
+
+
+def _request_for(path, method='GET'):
+    return _request.Request(method, '/', path, None)
+
+
+class CompiledTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'routes.pickle')
+        self.source = os.path.join(self.directory, 'routes.py')
+        with open(self.source, 'w') as file_:
+            file_.write('# routes\n')
+        self.builds = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _build_router(self):
+        self.builds += 1
+        router = _router.Router()
+        router.add_route(
+            _rpath.path_rule('/users/<user_id:int>'), {'GET': _user},
+            name='user',
+        )
+        router.add_route(_rpath.path_rule('/files/**'), {'GET': _files})
+        router.add_route(
+            _rpath.path_rule('/any'), {_router.ANY_METHOD: _anything},
+        )
+        return router
+
+    def _compiled_router(self):
+        return _compiled.compiled_router(
+            self._build_router, self.path, [self.source],
+        )
+
+    def test_load(self):
+        self._compiled_router()
+        router = self._compiled_router()
+        self.assertEqual(1, self.builds)
+
+        self.assertEqual(
+            ('user', 7),
+            router.route_request(_request_for('/users/7')),
+        )
+        self.assertEqual(
+            ('files', '/a/b'),
+            router.route_request(_request_for('/files/a/b')),
+        )
+        self.assertEqual(
+            'anything',
+            router.route_request(_request_for('/any', 'DELETE')),
+        )
+        self.assertEqual('/users/3', router.build_path('user', user_id=3))
+
+    def test_rebuilt_when_sources_change(self):
+        self._compiled_router()
+        with open(self.source, 'a') as file_:
+            file_.write('# more routes\n')
+        self._compiled_router()
+        self.assertEqual(2, self.builds)
+        self._compiled_router()
+        self.assertEqual(2, self.builds)
+
+    def test_load_missing_or_corrupt(self):
+        router = _router.Router()
+        self.assertFalse(_compiled.load_table(router, self.path, 'key'))
+        with open(self.path, 'wb') as file_:
+            file_.write(b'not a pickle')
+        with self.assertLogs(_compiled.__name__, 'WARNING'):
+            self.assertFalse(_compiled.load_table(router, self.path, 'key'))
+        self.assertEqual({}, router.routes)
+
+    def test_load_other_key(self):
+        _compiled.save_table(self._build_router(), self.path, 'old')
+        router = _router.Router()
+        self.assertFalse(_compiled.load_table(router, self.path, 'new'))
+        self.assertTrue(_compiled.load_table(router, self.path, 'old'))
+
+    def test_unpicklable_table_is_built(self):
+        def build_router():
+            self.builds += 1
+            router = _router.Router()
+            router.add_route(
+                _rpath.path_rule('/'), {'GET': lambda request: 'root'},
+            )
+            return router
+
+        for _ in range(2):
+            with self.assertLogs(_compiled.__name__, 'WARNING'):
+                router = _compiled.compiled_router(
+                    build_router, self.path, [self.source],
+                )
+            self.assertEqual('root', router.route_request(_request_for('/')))
+        self.assertEqual(2, self.builds)
+        self.assertEqual(['routes.py'], os.listdir(self.directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import unittest
+
+from wob.http import errors as _errors
+from wob.http import request as _request
+from wob.http import response as _response
+from wob.routing import metrics as _metrics
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+def _request_for(path, method='GET'):
+    return _request.Request(method, '/', path, None)
+
+
+def _ok(request, **kwargs):
+    return _response.text_response(u'ok')
+
+
+def _gone(request, **kwargs):
+    raise _errors.Gone()
+
+
+async def _async_ok(request):
+    await asyncio.sleep(0)
+    return _response.text_response(u'ok')
+
+
+class RouteMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metrics = _metrics.RouteMetrics(buckets=(0.5, 1.0))
+        self.router = _router.Router(metrics=self.metrics)
+        self.user_rule = _rpath.path_rule('/users/<user_id:int>')
+        self.router.add_route(self.user_rule, {'GET': _ok, 'DELETE': _gone})
+        self.router.add_route(_rpath.path_rule('/async'), {'GET': _async_ok})
+
+    def _route(self, path, method='GET'):
+        try:
+            return self.router.route_request(_request_for(path, method))
+        except _errors.HttpError as error:
+            return error
+
+    def test_counts(self):
+        self._route('/users/1')
+        self._route('/users/2')
+        self._route('/users/2', 'DELETE')
+        self._route('/users/2', 'POST')
+        self._route('/missing')
+
+        snapshot = self.metrics.snapshot()
+        get_stats = snapshot[(self.user_rule, 'GET')]
+        self.assertEqual(2, get_stats.requests)
+        self.assertEqual({}, dict(get_stats.errors))
+        self.assertEqual(2, get_stats.match_seconds.count)
+        self.assertEqual(2, get_stats.endpoint_seconds.count)
+        self.assertEqual(
+            {410: 1}, dict(snapshot[(self.user_rule, 'DELETE')].errors),
+        )
+        self.assertEqual(
+            {405: 1}, dict(snapshot[(self.user_rule, 'POST')].errors),
+        )
+        self.assertEqual({404: 1}, dict(snapshot[(None, 'GET')].errors))
+
+    def test_threads_are_added_up(self):
+        threads = [
+            threading.Thread(target=self._route, args=('/users/1',))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(4, snapshot[(self.user_rule, 'GET')].requests)
+
+    def test_exited_threads_are_folded_in(self):
+        self._route('/users/1')
+        for _ in range(10):
+            thread = threading.Thread(target=self._route, args=('/users/1',))
+            thread.start()
+            thread.join()
+        # Only this thread's stats are still kept separately.
+        self.assertEqual(1, len(self.metrics._live_thread_stats))
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(11, snapshot[(self.user_rule, 'GET')].requests)
+        self.assertEqual(
+            11, snapshot[(self.user_rule, 'GET')].match_seconds.count,
+        )
+
+    def test_unknown_methods(self):
+        for method in ('BREW', 'WHEN', 'GET'):
+            self._route('/users/1', method)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(
+            [(self.user_rule, 'GET'), (self.user_rule, 'OTHER')],
+            sorted(snapshot, key=lambda key: key[1]),
+        )
+        self.assertEqual(
+            {405: 2}, dict(snapshot[(self.user_rule, 'OTHER')].errors),
+        )
+
+    def test_async_endpoint(self):
+        async def route():
+            return await self._route('/async')
+
+        response = asyncio.run(route())
+        self.assertEqual(200, response.status_code)
+        (stats,) = self.metrics.snapshot().values()
+        self.assertEqual(1, stats.endpoint_seconds.count)
+
+    def test_async_endpoint_error(self):
+        async def gone(request):
+            await asyncio.sleep(0)
+            raise _errors.Gone()
+
+        self.router.add_route(_rpath.path_rule('/async-gone'), {'GET': gone})
+        with self.assertRaises(_errors.Gone):
+            asyncio.run(self._route('/async-gone'))
+        snapshot = self.metrics.snapshot()
+        stats = [
+            route_stats for (route, _), route_stats in snapshot.items()
+            if str(route) == '/async-gone'
+        ][0]
+        self.assertEqual({410: 1}, dict(stats.errors))
+        self.assertEqual(1, stats.endpoint_seconds.count)
+
+    def test_prometheus_text(self):
+        self._route('/users/1')
+        self._route('/missing')
+        response = self.metrics.prometheus_endpoint(_request_for('/metrics'))
+        text = response.body.decode('utf-8')
+        self.assertIn(
+            'wob_route_requests_total'
+            '{method="GET",route="/users/<user_id:int>"} 1\n',
+            text,
+        )
+        self.assertIn(
+            'wob_route_errors_total'
+            '{method="GET",route="<unmatched>",status="404"} 1\n',
+            text,
+        )
+        self.assertIn(
+            'wob_route_endpoint_seconds_bucket'
+            '{le="+Inf",method="GET",route="/users/<user_id:int>"} 1\n',
+            text,
+        )
+        self.assertIn(
+            'wob_route_match_seconds_count'
+            '{method="GET",route="<unmatched>"} 1\n',
+            text,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
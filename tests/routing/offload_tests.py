@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+import unittest
+
+from wob.http import errors as _errors
+from wob.http import message as _message
+from wob.http import request as _request
+from wob.http import response as _response
+from wob.routing import offload as _offload
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+# The endpoints are pickled by reference, so they must be module-level.
+
+def _describe(request, report_id):
+    return _response.text_response(u'{} {} {} {}'.format(
+        os.getpid(), request.path.text, request.headers.get('X-Report'),
+        report_id,
+    ))
+
+
+def _sleep(request):
+    time.sleep(0.5)
+    return _response.text_response(u'done')
+
+
+def _gone(request):
+    raise _errors.Gone()
+
+
+def _fail(request):
+    raise KeyError('nope')
+
+
+def _request_for(path, **headers):
+    return _request.Request('GET', '/', path, _message.Headers(
+        (name.replace('_', '-'), value) for name, value in headers.items()
+    ))
+
+
+class OffloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = _offload.OffloadPool(
+            processes=1, timeout=0.2, max_pending=1,
+        )
+        self.router = _router.Router(offload_pool=self.pool)
+        self.router.add_route(
+            _rpath.path_rule('/reports/<report_id:int>'),
+            {'GET': _describe}, cpu_bound=True,
+        )
+        self.router.add_route(
+            _rpath.path_rule('/sleep'), {'GET': _sleep}, cpu_bound=True,
+        )
+        self.router.add_route(
+            _rpath.path_rule('/gone'), {'GET': _gone}, cpu_bound=True,
+        )
+        self.router.add_route(
+            _rpath.path_rule('/fail'), {'GET': _fail}, cpu_bound=True,
+        )
+
+    def tearDown(self):
+        self.pool.close()
+
+    def _wait_until_idle(self):
+        for _ in range(100):
+            if self.pool.pending == 0:
+                return
+            time.sleep(0.05)
+        self.fail('The pool is still busy.')
+
+    def test_runs_in_another_process(self):
+        response = self.router.route_request(
+            _request_for('/reports/7', X_Report='quarterly'),
+        )
+        pid, path, header, report_id = response.body.decode().split()
+        self.assertNotEqual(str(os.getpid()), pid)
+        self.assertEqual('/reports/7', path)
+        self.assertEqual('quarterly', header)
+        self.assertEqual('7', report_id)
+        self.assertEqual(0, self.pool.pending)
+
+    def test_http_errors_are_raised_again(self):
+        with self.assertRaises(_errors.Gone):
+            self.router.route_request(_request_for('/gone'))
+
+    def test_other_errors(self):
+        with self.assertRaises(_offload.OffloadError) as context:
+            self.router.route_request(_request_for('/fail'))
+        self.assertIn('KeyError', context.exception.args[0])
+
+    def test_timeout(self):
+        with self.assertRaises(_errors.GatewayTimeout):
+            self.router.route_request(_request_for('/sleep'))
+        # The call keeps its place until it is done.
+        self.assertEqual(1, self.pool.pending)
+        self._wait_until_idle()
+
+    def test_backpressure(self):
+        self.pool.timeout = None
+        thread = threading.Thread(
+            target=self.router.route_request, args=(_request_for('/sleep'),),
+        )
+        thread.start()
+        for _ in range(100):
+            if self.pool.pending:
+                break
+            time.sleep(0.01)
+        with self.assertRaises(_errors.ServiceUnavailable):
+            self.router.route_request(_request_for('/reports/1'))
+        thread.join()
+        self.assertEqual(0, self.pool.pending)
+
+    def test_needs_a_pool(self):
+        with self.assertRaises(ValueError):
+            _router.Router().add_route(
+                _rpath.path_rule('/'), {'GET': _describe}, cpu_bound=True,
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import doctest
+import unittest
+import uuid
+
+import six as _6
+
+from wob.http import path as _path
+from wob.routing import path
+
+
+def load_tests(loader, tests, pattern):
+    _ = loader, pattern
+    tests.addTests(doctest.DocTestSuite(path))
+    return tests
+
+
+class PathRuleTestCase(unittest.TestCase):
+    def test_match(self):
+        rule = path.path_rule('/users/<user_id:int>/files/**')
+        self.assertEqual(
+            {'user_id': 7, 'remaining': _path.Path('/a/b')},
+            rule.match(_path.Path('/users/7/files/a/b')),
+        )
+        self.assertIsNone(rule.match(_path.Path('/users/x/files/a')))
+        self.assertIsNone(rule.match(_path.Path('/users/7')))
+
+    def test_str(self):
+        self.assertEqual('/', str(path.path_rule('/')))
+        self.assertEqual('/a/b/', str(path.path_rule('/a/b/')))
+        self.assertEqual(
+            '/a/<name:string>', str(path.path_rule('/a/<name:string>')),
+        )
+
+
+class BuildPathTestCase(unittest.TestCase):
+    def test_static(self):
+        rule = path.path_rule('/about/team/')
+        self.assertEqual('/about/team/', rule.build_path())
+        self.assertEqual('/', path.path_rule('/').build_path())
+        self.assertRaises(TypeError, rule.build_path, extra=1)
+
+    def test_handlers(self):
+        rule = path.path_rule('/users/<user_id:int>/posts/<slug:string>')
+        self.assertEqual(
+            '/users/12/posts/hello%20world%3F',
+            rule.build_path(user_id=12, slug='hello world?'),
+        )
+        self.assertEqual(
+            '/users/1/posts/a%2Fb', rule.build_path(user_id=1, slug='a/b'),
+        )
+        self.assertRaises(TypeError, rule.build_path, user_id=12)
+        self.assertRaises(
+            TypeError, rule.build_path, user_id=12, slug='a', extra=1,
+        )
+        self.assertRaises(ValueError, rule.build_path, user_id=1, slug='..')
+
+    def test_remaining_components(self):
+        rule = path.path_rule('/static/**')
+        self.assertEqual(
+            '/static/css/site.css', rule.build_path(remaining='/css/site.css'),
+        )
+        self.assertEqual(
+            '/static/a', rule.build_path(remaining=_path.Path('//a/')),
+        )
+        self.assertEqual('/static', rule.build_path(remaining='/'))
+
+    def test_round_trip(self):
+        rule = path.path_rule('/a/<name:string>/<number:int>/**')
+        values = {
+            'name': u'caf\xe9 & bar',
+            'number': 3,
+            'remaining': _path.Path('/x/y'),
+        }
+        built = _path.Path(
+            _6.moves.urllib.parse.unquote(rule.build_path(**values))
+        )
+        self.assertEqual(values, rule.match(built))
+
+
+class ComponentHandlerTestCase(unittest.TestCase):
+    def _handler(self, spec):
+        return path.path_rule('/' + spec).path_component_handlers[1]
+
+    def test_int(self):
+        handler = self._handler('<n:int>')
+        for component in ('0', '42', '-7'):
+            self.assertTrue(handler.check(component))
+        # int() takes all of these, but a path component shouldn't.
+        for component in ('', '+5', ' 5', '1_000', '0x1', '\u0663'):
+            self.assertFalse(handler.check(component))
+
+    def test_int_range(self):
+        handler = self._handler('<n:int(min=1, max=10)>')
+        self.assertFalse(handler.check('-1'))
+        self.assertEqual(10, handler.parse('10'))
+        self.assertRaises(ValueError, handler.parse, '0')
+        self.assertRaises(ValueError, handler.parse, '11')
+
+    def test_max_length(self):
+        handler = self._handler('<name:string(max_length=3)>')
+        self.assertTrue(handler.check('abc'))
+        self.assertFalse(handler.check('abcd'))
+
+    def test_regex(self):
+        handler = self._handler('<slug:regex([a-z]+(-[a-z]+)*)>')
+        self.assertTrue(handler.check('hello-world'))
+        self.assertFalse(handler.check('hello-'))
+        self.assertFalse(handler.check('hello-world!'))
+        self.assertEqual('hello', handler.parse('hello'))
+
+    def test_subclass_without_super_init(self):
+        class HexHandler(path.PathComponentHandler):
+            pattern = '[0-9a-f]+'
+
+            def __init__(self, name):
+                self.name = name
+
+            def parse(self, component):
+                return int(component, 16)
+
+        self.assertTrue(HexHandler('n').check('ff'))
+        self.assertFalse(HexHandler('n').check('fg'))
+        self.assertEqual(HexHandler('n'), HexHandler('n'))
+        handler = HexHandler('n')
+        handler.check('ff')
+        self.assertEqual(HexHandler('n'), handler)
+
+    def test_uuid(self):
+        handler = self._handler('<id:uuid>')
+        value = uuid.uuid4()
+        self.assertTrue(handler.check(str(value)))
+        self.assertEqual(value, handler.parse(str(value)))
+        self.assertFalse(handler.check(value.hex))
+        self.assertFalse(handler.check(str(value).replace('-', 'g', 1)))
+
+    def test_str(self):
+        rule = '/a/<n:int(min=1)>/<s:regex([a-z]{2,3})>'
+        self.assertEqual(rule, str(path.path_rule(rule)))
+
+    def test_invalid_specs(self):
+        for spec in (
+                '<n:int(min)>', '<n:int(minimum=1)>', '<n:int(min=x)>',
+                '<s:regex()>', '<n:int:x>', '<n:int(min=1>'):
+            self.assertRaises(ValueError, path.path_rule, '/' + spec)
+
+    def test_equality(self):
+        self.assertEqual(
+            self._handler('<n:int(min=1)>'), self._handler('<n:int(min=1)>'),
+        )
+        self.assertNotEqual(
+            self._handler('<n:int(min=1)>'), self._handler('<n:int>'),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
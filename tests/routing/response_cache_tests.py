@@ -0,0 +1,172 @@
+import threading
+import unittest
+
+from wob.http import message as _message
+from wob.http import request as _request
+from wob.http import response as _response
+from wob.routing import path as _rpath
+from wob.routing import response_cache as _response_cache
+from wob.routing import router as _router
+
+
+def _request_for(path, method='GET', **headers):
+    return _request.Request(method, '/', path, _message.Headers(
+        (name.replace('_', '-'), value) for name, value in headers.items()
+    ))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.cache = _response_cache.ResponseCache(ttl=60)
+        self.router = _router.Router()
+
+        def article(request, article_id):
+            self.calls.append(article_id)
+            return _response.text_response(u'article {}'.format(article_id))
+
+        def localized(request):
+            self.calls.append(request.headers.get('Accept-Language'))
+            return _response.text_response(
+                request.headers.get('Accept-Language', u'none'),
+                headers=[('Vary', 'Accept-Language')],
+            )
+
+        def private(request):
+            self.calls.append('private')
+            return _response.text_response(
+                u'secret', headers=[('Cache-Control', 'private')],
+            )
+
+        self.article = article
+        self.router.add_route(
+            _rpath.path_rule('/articles/<article_id:int>'),
+            {'GET': self.cache.cached(article), 'POST': article},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/localized'),
+            {'GET': self.cache.cached(localized)},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/private'), {'GET': self.cache.cached(private)},
+        )
+
+    def _get(self, path, method='GET', **headers):
+        return self.router.route_request(
+            _request_for(path, method, **headers),
+        )
+
+    def test_hit(self):
+        first = self._get('/articles/1')
+        second = self._get('/articles/1')
+        self.assertIs(first, second)
+        self.assertIsInstance(first, _response.FrozenResponse)
+        self.assertEqual(b'article 1', first.body)
+        self.assertEqual([1], self.calls)
+
+        self._get('/articles/2')
+        self.assertEqual([1, 2], self.calls)
+
+    def test_query_string(self):
+        def wsgi_get(query_string):
+            return self.router.route_request(_request.WsgiRequest({
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': '/articles/1',
+                'QUERY_STRING': query_string,
+            }))
+
+        wsgi_get('')
+        wsgi_get('page=2')
+        wsgi_get('page=2')
+        wsgi_get('page=3')
+        self.assertEqual([1, 1, 1], self.calls)
+
+        # Any request, not only those from a WSGI environment.
+        for query_string in ('page=2', 'page=3', 'page=3'):
+            self.router.route_request(_request.Request(
+                'GET', '/', '/articles/2', None, query_string=query_string,
+            ))
+        self.assertEqual([1, 1, 1, 2, 2], self.calls)
+
+    def test_only_get_and_head(self):
+        self._get('/articles/1', 'POST')
+        self._get('/articles/1', 'POST')
+        self.assertEqual([1, 1], self.calls)
+
+    def test_vary(self):
+        self.assertEqual(
+            b'en', self._get('/localized', Accept_Language='en').body,
+        )
+        self.assertEqual(
+            b'fr', self._get('/localized', Accept_Language='fr').body,
+        )
+        self._get('/localized', Accept_Language='en')
+        self._get('/localized', Accept_Language='fr')
+        self.assertEqual(['en', 'fr'], self.calls)
+
+    def test_uncacheable(self):
+        self._get('/private')
+        self._get('/private')
+        self.assertEqual(['private', 'private'], self.calls)
+
+    def test_ttl(self):
+        cached = self.cache.cached(self.article, ttl=-1)
+        cached(_request_for('/articles/3'), article_id=3)
+        cached(_request_for('/articles/3'), article_id=3)
+        self.assertEqual([3, 3], self.calls)
+
+    def test_invalidate(self):
+        self._get('/articles/1')
+        self._get('/articles/2')
+        self._get('/localized')
+        self.assertEqual(1, self.cache.invalidate(path_prefix='/articles/1'))
+        self.assertEqual(1, self.cache.invalidate(route=self.article))
+        self._get('/articles/1')
+        self._get('/articles/2')
+        self._get('/localized')
+        self.assertEqual([1, 2, None, 1, 2], self.calls)
+
+    def test_max_bytes(self):
+        cache = _response_cache.ResponseCache(maxsize=100, max_bytes=2048)
+        cached = cache.cached(
+            lambda request: _response.new_response(b'x' * 1000, None),
+        )
+        for index in range(5):
+            cached(_request_for('/{}'.format(index)))
+        self.assertLessEqual(cache.entries.weight, 2048)
+
+    def test_concurrent_misses_coalesce(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow(request):
+            calls.append(True)
+            started.set()
+            release.wait()
+            return _response.text_response(u'slow')
+
+        cached = self.cache.cached(slow)
+        results = []
+
+        def call():
+            results.append(cached(_request_for('/slow')))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,522 @@
+import io
+import os
+import threading
+import unittest
+
+import wob
+from wob.http import errors as _errors
+from wob.http import message as _message
+from wob.http import path as _path
+from wob.http import request as _request
+from wob.http import response as _response
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+def _request_for(path, method='GET'):
+    return _request.Request(method, '/', path, None)
+
+
+def _endpoint(name):
+    def endpoint(request, **kwargs):
+        return name, kwargs
+    endpoint.__name__ = name
+    return endpoint
+
+
+class RouterMatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = _router.Router()
+        self.router.add_route(
+            _rpath.path_rule('/'), {'GET': _endpoint('root')},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/users/<user_id:int>'),
+            {'GET': _endpoint('user'), 'DELETE': _endpoint('delete_user')},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/users/me'), {'GET': _endpoint('me')},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/users/<name:string>'),
+            {'GET': _endpoint('user_by_name')},
+        )
+        self.router.add_route(
+            _rpath.path_rule('/static/**'),
+            {_router.ANY_METHOD: _endpoint('static')},
+        )
+
+    def _match(self, path, method='GET'):
+        return self.router.match_request(_request_for(path, method))
+
+    def test_root(self):
+        match = self._match('/')
+        self.assertEqual('root', match.endpoint.__name__)
+        self.assertEqual({}, match.match)
+
+    def test_typed_component(self):
+        match = self._match('/users/12')
+        self.assertEqual('user', match.endpoint.__name__)
+        self.assertEqual({'user_id': 12}, match.match)
+
+    def test_first_added_rule_wins(self):
+        # "/users/me" was added after "/users/<user_id:int>", but that rule
+        # does not match; "/users/<name:string>" was added after "/users/me",
+        # so it loses.
+        match = self._match('/users/me')
+        self.assertEqual('me', match.endpoint.__name__)
+
+        match = self._match('/users/alice')
+        self.assertEqual('user_by_name', match.endpoint.__name__)
+        self.assertEqual({'name': 'alice'}, match.match)
+
+    def test_remaining_components(self):
+        match = self._match('/static/css/site.css', method='POST')
+        self.assertEqual('static', match.endpoint.__name__)
+        self.assertEqual('/css/site.css', str(match.match['remaining']))
+
+        match = self._match('/static')
+        self.assertEqual('/', str(match.match['remaining']))
+
+    def test_no_method(self):
+        match = self._match('/users/me', method='POST')
+        self.assertIsInstance(match, _router._NoMethod)
+        self.assertEqual(['GET'], sorted(match.method_handlers))
+
+    def test_no_path(self):
+        self.assertIs(_router.NO_PATH, self._match('/nope'))
+        self.assertIs(_router.NO_PATH, self._match('/users/1/posts'))
+
+    def test_add_route_recompiles(self):
+        self.assertIs(_router.NO_PATH, self._match('/nope'))
+        self.router.add_route(
+            _rpath.path_rule('/nope'), {'GET': _endpoint('nope')},
+        )
+        self.assertEqual('nope', self._match('/nope').endpoint.__name__)
+
+    def test_agrees_with_path_rule_match(self):
+        paths = (
+            '/', '/users', '/users/1', '/users/me', '/users/x/y',
+            '/static', '/static/a/b', '/other',
+        )
+        for path in paths:
+            request = _request_for(path)
+            expected = _router.NO_PATH
+            for path_rule, method_handlers in self.router.routes.items():
+                match = path_rule.match(request.path)
+                if match is not None:
+                    expected = match
+                    break
+            result = self.router.match_request(request)
+            if expected is _router.NO_PATH:
+                self.assertIs(_router.NO_PATH, result)
+            else:
+                self.assertEqual(
+                    {k: str(v) for k, v in expected.items()},
+                    {k: str(v) for k, v in result.match.items()},
+                )
+
+    def test_check_prunes_without_parsing(self):
+        parsed = []
+
+        class CountingHandler(_rpath.IntegerHandler):
+            def parse(self, component):
+                parsed.append(component)
+                return super(CountingHandler, self).parse(component)
+
+        router = _router.Router()
+        router.add_route(
+            _rpath.path_rule(
+                '/items/<item_id:counting>', {'counting': CountingHandler},
+            ),
+            {'GET': _endpoint('item')},
+        )
+        router.add_route(
+            _rpath.path_rule('/items/<name:string>'),
+            {'GET': _endpoint('named_item')},
+        )
+        match = router.match_request(_request_for('/items/lamp'))
+        self.assertEqual('named_item', match.endpoint.__name__)
+        self.assertEqual([], parsed)
+        match = router.match_request(_request_for('/items/3'))
+        self.assertEqual({'item_id': 3}, match.match)
+        self.assertEqual(['3'], parsed)
+
+
+class RouterMatchCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = _router.Router(match_cache_size=16)
+        self.router.add_route(
+            _rpath.path_rule('/users/<user_id:int>'),
+            {'GET': _endpoint('user')},
+        )
+
+    def _match(self, path, method='GET'):
+        return self.router.match_request(_request_for(path, method))
+
+    def test_hits_and_misses(self):
+        first = self._match('/users/1')
+        self.assertIs(first, self._match('//users/./1/'))
+        self.assertIs(_router.NO_PATH, self._match('/nope'))
+        self.assertIs(_router.NO_PATH, self._match('/nope'))
+        no_method = self._match('/users/1', 'PUT')
+        self.assertIsInstance(no_method, _router._NoMethod)
+
+        info = self.router.match_cache.info()
+        self.assertEqual(2, info.hits)
+        self.assertEqual(3, info.misses)
+        self.assertEqual(3, info.currsize)
+
+    def test_add_route_invalidates(self):
+        self.assertIs(_router.NO_PATH, self._match('/nope'))
+        self.router.add_route(
+            _rpath.path_rule('/nope'), {'GET': _endpoint('nope')},
+        )
+        self.assertEqual(0, len(self.router.match_cache))
+        self.assertEqual('nope', self._match('/nope').endpoint.__name__)
+
+
+class RouterTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = _router.Router()
+        self.router.add_route(
+            _rpath.path_rule('/users/<user_id:int>'),
+            {'GET': _endpoint('user')}, name='user',
+        )
+
+    def test_tables_are_snapshots(self):
+        table = self.router.table
+        self.assertIs(table, self.router.table)
+        self.router.add_route(
+            _rpath.path_rule('/posts'), {'GET': _endpoint('posts')},
+        )
+        new_table = self.router.table
+        self.assertIsNot(table, new_table)
+        self.assertEqual(1, len(table))
+        self.assertIsNone(table.compile().lookup(('', 'posts')))
+        self.assertEqual(
+            ['/users/<user_id:int>', '/posts'],
+            [str(path_rule) for path_rule, _ in new_table.routes],
+        )
+
+        routes = self.router.routes
+        routes.clear()
+        self.assertEqual(2, len(self.router.routes))
+
+    def test_tables_are_compiled_when_published(self):
+        self.router.add_route(
+            _rpath.path_rule('/posts'), {'GET': _endpoint('posts')},
+        )
+        table = self.router.table
+        self.assertIsNotNone(table._tree)
+        self.router.match_request(_request_for('/posts'))
+        self.assertIs(table, self.router.table)
+
+    def test_builder(self):
+        builder = _router.RouteTableBuilder(self.router.table)
+        for index in range(3):
+            builder.add_route(
+                _rpath.path_rule('/section{}'.format(index)),
+                {'GET': _endpoint('section')}, name='section{}'.format(index),
+            )
+        self.assertRaises(
+            ValueError, builder.add_route,
+            _rpath.path_rule('/other'), {}, name='user',
+        )
+        # Nothing changes until the table is swapped in.
+        self.assertEqual(1, len(self.router.table))
+        self.router.swap_table(builder.build())
+        self.assertEqual(4, len(self.router.table))
+        self.assertEqual('/section2', self.router.build_path('section2'))
+        self.assertEqual('/users/1', self.router.build_path('user', user_id=1))
+
+    def test_swap_table(self):
+        other = _router.Router()
+        other.add_route(
+            _rpath.path_rule('/posts/<post_id:int>'),
+            {'GET': _endpoint('post')}, name='post',
+        )
+        self.router.swap_table(other.table)
+        self.assertIs(
+            _router.NO_PATH,
+            self.router.match_request(_request_for('/users/1')),
+        )
+        self.assertEqual(
+            'post',
+            self.router.match_request(
+                _request_for('/posts/1')
+            ).endpoint.__name__,
+        )
+        self.assertEqual('/posts/3', self.router.build_path('post', post_id=3))
+        self.assertRaises(KeyError, self.router.build_path, 'user')
+
+    def test_add_routes_while_matching(self):
+        request = _request_for('/users/1')
+        errors = []
+        done = threading.Event()
+
+        def match():
+            try:
+                while not done.is_set():
+                    self.router.match_request(request)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=match) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        try:
+            for index in range(200):
+                self.router.add_route(
+                    _rpath.path_rule('/section{}/**'.format(index)),
+                    {'GET': _endpoint('section')},
+                )
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(201, len(self.router.table))
+        self.assertEqual(
+            'section',
+            self.router.match_request(
+                _request_for('/section199/a')
+            ).endpoint.__name__,
+        )
+
+
+class RouterBuildPathTestCase(unittest.TestCase):
+    def test_build_path(self):
+        router = _router.Router()
+        user_rule = _rpath.path_rule('/users/<user_id:int>')
+        router.add_route(user_rule, {'GET': _endpoint('user')}, name='user')
+        self.assertEqual('/users/5', router.build_path('user', user_id=5))
+        self.assertRaises(KeyError, router.build_path, 'missing')
+
+        # Re-adding the same rule under its name is fine; reusing the name
+        # for another rule isn't.
+        router.add_route(user_rule, {'GET': _endpoint('user')}, name='user')
+        self.assertRaises(
+            ValueError, router.add_route,
+            _rpath.path_rule('/other'), {}, name='user',
+        )
+
+
+def _module_endpoint(request, **kwargs):
+    return kwargs
+
+
+class RouterMatchPathsTestCase(unittest.TestCase):
+    paths = (
+        '/', '/users', '/users/1', '/users/me', '/users/alice',
+        '/users/1/posts', '/static', '/static/a/b', '/static/a/c',
+        '/static/../users/2', 'relative', '/..', '/nope',
+    )
+
+    def _router(self):
+        router = _router.Router()
+        router.add_route(_rpath.path_rule('/'), {'GET': _module_endpoint})
+        router.add_route(
+            _rpath.path_rule('/users/<user_id:int>'),
+            {'GET': _module_endpoint},
+        )
+        router.add_route(
+            _rpath.path_rule('/users/me'), {'POST': _module_endpoint},
+        )
+        router.add_route(
+            _rpath.path_rule('/users/<name:string>'),
+            {'GET': _module_endpoint},
+        )
+        router.add_route(
+            _rpath.path_rule('/static/**'), {'GET': _module_endpoint},
+        )
+        return router
+
+    def _summary(self, result):
+        if result is _router.NO_PATH:
+            return 'NO_PATH'
+        return (
+            type(result).__name__,
+            str(result.path_rule),
+            sorted((k, str(v)) for k, v in result.match.items()),
+        )
+
+    def _expected(self, router, path, method='GET'):
+        if path == 'relative' or path == '/..':
+            return 'NO_PATH'
+        return self._summary(router.match_request(_request_for(path, method)))
+
+    def test_matches_match_request(self):
+        router = self._router()
+        for paths in (self.paths, sorted(self.paths)):
+            for method in ('GET', 'POST'):
+                results = list(router.match_paths(paths, method=method))
+                self.assertEqual(
+                    [self._expected(router, path, method) for path in paths],
+                    [self._summary(result) for result in results],
+                )
+
+    def test_process_pool(self):
+        router = self._router()
+        paths = self.paths * 3
+        results = list(router.match_paths(paths, processes=2, chunk_size=4))
+        self.assertEqual(
+            [self._expected(router, path) for path in paths],
+            [self._summary(result) for result in results],
+        )
+
+    def test_path_rule_match_many(self):
+        rule = _rpath.path_rule('/users/<user_id:int>')
+        self.assertEqual(
+            [{'user_id': 1}, None, None, {'user_id': 2}],
+            list(rule.match_many(['/users/1', '/users/x', 'users/1',
+                                  '/a/../users/2'])),
+        )
+
+
+class RouterMountTestCase(unittest.TestCase):
+    def _seen(self, request, **kwargs):
+        return (
+            str(request.application_path), str(request.path),
+            getattr(request, 'mount_values', {}), kwargs,
+        )
+
+    def setUp(self):
+        self.files = _router.Router()
+        self.files.add_route(
+            _rpath.path_rule('/<name:string>'), {'GET': self._seen},
+        )
+        self.users = _router.Router()
+        self.users.add_route(_rpath.path_rule('/'), {'GET': self._seen})
+        self.users.mount(_rpath.path_rule('/<user_id:int>/files'), self.files)
+        self.router = _router.Router()
+        self.router.mount(_rpath.path_rule('/users'), self.users)
+
+    def _route(self, path, method='GET'):
+        request = _request.Request(
+            method, '/', path, _message.Headers([('Host', 'example.com')]),
+        )
+        return self.router.route_request(request)
+
+    def test_nested_mounts(self):
+        self.assertEqual(
+            ('/users/12/files', '/a.txt', {'user_id': 12}, {'name': 'a.txt'}),
+            self._route('/users/12/files/a.txt'),
+        )
+        self.assertEqual(('/users', '/', {}, {}), self._route('/users'))
+
+    def test_errors_from_mounted_router(self):
+        with self.assertRaises(_errors.NotFound):
+            self._route('/users/x/files/a.txt')
+        with self.assertRaises(_errors.MethodNotAllowed):
+            self._route('/users/12/files/a.txt', method='POST')
+
+    def test_sub_request_shares_headers(self):
+        request = _request.Request(
+            'GET', '/', '/users/12', _message.Headers([('Host', 'a')]),
+        )
+        sub_request = request.sub_request_for_application(
+            _path.Path('/users'),
+        )
+        self.assertEqual('/users', str(sub_request.application_path))
+        self.assertEqual('/12', str(sub_request.path))
+        self.assertIs(request.headers._names, sub_request.headers._names)
+        sub_request.headers.set_header('Host', 'b')
+        self.assertEqual('a', request.headers['Host'])
+
+
+class RouterResponseFilterTestCase(unittest.TestCase):
+    def test_filters_apply_in_order(self):
+        router = _router.Router()
+        router.add_route(
+            _rpath.path_rule('/'), {'GET': lambda request: ['endpoint']},
+        )
+        router.add_response_filter(
+            lambda request, response: response + ['first'],
+        )
+        router.add_response_filter(
+            lambda request, response: response + ['second'],
+        )
+        self.assertEqual(
+            ['endpoint', 'first', 'second'],
+            router.route_request(_request_for('/')),
+        )
+
+
+
+def _text_endpoint(request, user_id, remaining):
+    return _response.text_response(u'hello')
+
+
+class RouterAllocationTestCase(unittest.TestCase):
+    # The most memory blocks that wob's own code may leave allocated for a
+    # routed request and its response, while they're alive: each object on
+    # the request path costs a single block (no per-instance __dict__), plus
+    # whatever containers it holds.
+    MAX_BLOCKS = 22
+
+    def _wsgi_environment(self):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': '/users/7/files/a/b',
+            'HTTP_HOST': 'example.com',
+            'wsgi.input': io.BytesIO(),
+        }
+
+    def test_allocations(self):
+        try:
+            import tracemalloc
+        except ImportError:
+            raise unittest.SkipTest('tracemalloc needs Python 3.4 or later.')
+
+        router = _router.Router()
+        for index in range(20):
+            router.add_route(
+                _rpath.path_rule('/section{}/<user_id:int>'.format(index)),
+                {'GET': _text_endpoint},
+            )
+        router.add_route(
+            _rpath.path_rule('/users/<user_id:int>/files/**'),
+            {'GET': _text_endpoint},
+        )
+        # Warm up: compile the table, and fill the caches of header names.
+        router.route_request(_request.WsgiRequest(self._wsgi_environment()))
+        wsgi_environment = self._wsgi_environment()
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            request = _request.WsgiRequest(wsgi_environment)
+            response = router.route_request(request)
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(
+            True, os.path.join(os.path.dirname(wob.__file__), '*'),
+        )]
+        statistics = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), 'lineno',
+        )
+        blocks = sum(statistic.count_diff for statistic in statistics)
+        self.assertLessEqual(blocks, self.MAX_BLOCKS, '\n'.join(
+            str(statistic) for statistic in statistics
+            if statistic.count_diff
+        ))
+        self.assertEqual(b'hello', response.body)
+
+    def test_no_instance_dicts(self):
+        request = _request.WsgiRequest(self._wsgi_environment())
+        response = _response.text_response(u'hello')
+        for obj in (
+                request, request.headers, request.path, response,
+                response.headers, response.freeze(),
+                _router._RouteMatch(None, {}),
+                _router._NoMethod({}, None, {}),
+                _rpath.PathMatch({}, None)):
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import asyncio
+import unittest
+
+from wob.http import errors as _errors
+from wob.http import response as _response
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+from wob.server import http11 as _http11
+
+
+def _hello(request):
+    return _response.text_response(u'hello')
+
+
+def _echo(request):
+    return _response.new_response(
+        bytes(request.read_body()), 'application/octet-stream',
+    )
+
+
+def _stream(request):
+    return _response.new_response(iter([b'one', b'two']), 'text/plain')
+
+
+async def _slow(request):
+    await asyncio.sleep(0.05)
+    return _response.text_response(u'slow')
+
+
+def _gone(request):
+    raise _errors.Gone()
+
+
+class HttpServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.router = _router.Router()
+        for rule, endpoint in (
+                ('/', _hello), ('/echo', _echo), ('/stream', _stream),
+                ('/slow', _slow), ('/gone', _gone)):
+            self.router.add_route(_rpath.path_rule(rule), {
+                'GET': endpoint, 'HEAD': endpoint, 'POST': endpoint,
+            })
+
+    def _exchange(self, data, **server_options):
+        """Send data to a new server, and read until it closes."""
+        async def exchange():
+            server = _http11.HttpServer(
+                self.router, port=0, **server_options
+            )
+            await server.start()
+            try:
+                reader, writer = await asyncio.open_connection(
+                    *server.address
+                )
+                for piece in data:
+                    if isinstance(piece, float):
+                        await asyncio.sleep(piece)
+                    else:
+                        writer.write(piece)
+                received = await asyncio.wait_for(reader.read(), 5)
+                writer.close()
+                return received
+            finally:
+                server.close()
+
+        return asyncio.run(exchange())
+
+    def _responses(self, received):
+        """Split what was received into (status line, headers, body)s."""
+        responses = []
+        while received:
+            head, _, received = received.partition(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            headers = dict(line.split(': ', 1) for line in lines[1:])
+            if 'Content-Length' in headers:
+                length = int(headers['Content-Length'])
+                body, received = received[:length], received[length:]
+            elif headers.get('Transfer-Encoding') == 'chunked':
+                body = b''
+                while True:
+                    size, _, received = received.partition(b'\r\n')
+                    size = int(size, 16)
+                    body += received[:size]
+                    received = received[size + 2:]
+                    if not size:
+                        break
+            else:
+                body, received = received, b''
+            responses.append((lines[0], headers, body))
+        return responses
+
+    def test_keep_alive_and_pipelining(self):
+        received = self._exchange([
+            b'GET / HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'GET /slow HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nab',
+            0.05,
+            b'cde'
+            b'GET /gone HTTP/1.1\r\nConnection: close\r\n\r\n',
+        ])
+        responses = self._responses(received)
+        self.assertEqual(
+            [
+                ('HTTP/1.1 200 OK', b'hello'),
+                ('HTTP/1.1 200 OK', b'slow'),
+                ('HTTP/1.1 200 OK', b'abcde'),
+                ('HTTP/1.1 410 Gone', b'410 Gone'),
+            ],
+            [(status, body.strip()) for status, _, body in responses],
+        )
+        self.assertEqual('close', responses[-1][1]['Connection'])
+        self.assertIn('Date', responses[0][1])
+
+    def test_chunked(self):
+        received = self._exchange([
+            b'POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3;ext=1\r\nabc\r\n',
+            0.05,
+            b'2\r\nde\r\n0\r\nTrailer: x\r\n\r\n'
+            b'GET /stream HTTP/1.1\r\nConnection: close\r\n\r\n',
+        ])
+        (_, _, echoed), (_, headers, streamed) = self._responses(received)
+        self.assertEqual(b'abcde', echoed)
+        self.assertEqual('chunked', headers['Transfer-Encoding'])
+        self.assertEqual(b'onetwo', streamed)
+
+    def test_http_1_0(self):
+        received = self._exchange([b'GET /stream HTTP/1.0\r\n\r\n'])
+        [(status, headers, body)] = self._responses(received)
+        self.assertEqual('HTTP/1.1 200 OK', status)
+        self.assertEqual('close', headers['Connection'])
+        self.assertEqual(b'onetwo', body)
+
+    def test_head(self):
+        received = self._exchange([
+            b'HEAD / HTTP/1.1\r\nConnection: close\r\n\r\n',
+        ])
+        head, _, body = received.partition(b'\r\n\r\n')
+        self.assertIn(b'Content-Length: 5', head)
+        self.assertEqual(b'', body)
+
+    def test_expect_continue(self):
+        received = self._exchange([
+            b'POST /echo HTTP/1.1\r\nContent-Length: 2\r\n'
+            b'Expect: 100-continue\r\nConnection: close\r\n\r\n',
+            0.05,
+            b'hi',
+        ])
+        self.assertTrue(received.startswith(b'HTTP/1.1 100 Continue\r\n\r\n'))
+        self.assertTrue(received.endswith(b'hi'))
+
+    def test_malformed(self):
+        for request, status in (
+                (b'GET /\r\n\r\n', 400),
+                (b'GET / HTTP/2.0\r\n\r\n', 505),
+                (b'GET / HTTP/1.1\r\nHost : x\r\n\r\n', 400),
+                (b'GET / HTTP/1.1\r\nA: b\r\n c\r\n\r\n', 400),
+                (b'GET / HTTP/1.1\r\nContent-Length: x\r\n\r\n', 400),
+                (b'GET / HTTP/1.1\r\nContent-Length:\r\n\r\n', 400),
+                (b'POST /echo HTTP/1.1\r\nContent-Length: 1\r\n'
+                 b'Transfer-Encoding: chunked\r\n\r\n0\r\n\r\n', 400),
+                (b'POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+                 b'zz\r\n', 400),
+                (b'GET / HTTP/1.1\r\nA: ' + b'a' * 200 + b'\r\n\r\n', 431),
+                (b'POST /echo HTTP/1.1\r\nContent-Length: 101\r\n\r\n', 413)):
+            received = self._exchange(
+                [request], max_head_size=100, max_body_size=100,
+            )
+            [(status_line, headers, _)] = self._responses(received)
+            self.assertEqual(status, int(status_line.split()[1]), request)
+            self.assertEqual('close', headers['Connection'])
+
+    def test_empty_content_length_without_max_body_size(self):
+        received = self._exchange(
+            [b'POST /echo HTTP/1.1\r\nContent-Length: \r\n\r\n'],
+            max_body_size=None,
+        )
+        [(status, _, _)] = self._responses(received)
+        self.assertEqual('HTTP/1.1 400 Bad Request', status)
+
+    def test_idle_timeout(self):
+        received = self._exchange(
+            [b'GET / HTTP/1.1\r\n\r\n'], idle_timeout=0.1,
+        )
+        # Closed without a 408, since no request had been started.
+        statuses = [status for status, _, _ in self._responses(received)]
+        self.assertEqual(['HTTP/1.1 200 OK'], statuses)
+
+    def test_idle_timeout_in_head(self):
+        received = self._exchange(
+            [b'GET / HTTP/1.1\r\n'], idle_timeout=0.1, header_timeout=0.2,
+        )
+        [(status, _, _)] = self._responses(received)
+        self.assertEqual('HTTP/1.1 408 Request Timeout', status)
+
+    def test_header_timeout(self):
+        received = self._exchange(
+            [b'GET / HTTP/1.1\r\n', 0.05, b'Host: x\r\n'],
+            header_timeout=0.1,
+        )
+        [(status, _, _)] = self._responses(received)
+        self.assertEqual('HTTP/1.1 408 Request Timeout', status)
+
+
+if __name__ == '__main__':
+    unittest.main()
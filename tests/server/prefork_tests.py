@@ -0,0 +1,80 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import unittest
+
+from six.moves.urllib import request as _urllib_request
+
+from wob.http import response as _response
+from wob.routing import path as _rpath
+from wob.routing import router as _router
+
+
+def _pid(request):
+    return _response.text_response(u'{}'.format(os.getpid()))
+
+
+# Served by the server under test.
+router = _router.Router()
+router.add_route(_rpath.path_rule('/pid'), {'GET': _pid})
+
+
+@unittest.skipUnless(
+    sys.platform.startswith('linux'), 'The pre-fork server needs Linux',
+)
+class PreforkServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'wob', 'serve',
+                'tests.server.prefork_tests:router',
+                '--port', '0', '--workers', '3', '--max-requests', '2',
+            ],
+            stderr=subprocess.PIPE,
+        )
+        line = self.process.stderr.readline().decode('utf-8')
+        match = re.search(r'http://([^/]+)/', line)
+        if match is None:
+            self.process.kill()
+            self.process.wait()
+            self.fail('Unexpected output: {!r}'.format(line))
+        self.url = 'http://{}/pid'.format(match.group(1))
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process.stderr.close()
+
+    def _get_pid(self):
+        # Workers come and go, but the listening socket stays; no request
+        # should fail.
+        return int(_urllib_request.urlopen(self.url, timeout=10).read())
+
+    def test_serves_and_recycles_workers(self):
+        pids = [self._get_pid() for _ in range(12)]
+        # Three workers, each replaced after two requests.
+        self.assertGreaterEqual(len(set(pids)), 6)
+        self.assertNotIn(self.process.pid, pids)
+
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(0, self.process.wait(timeout=10))
+
+    def test_reload(self):
+        before = self._get_pid()
+        self.process.send_signal(signal.SIGHUP)
+        # The old workers stop as they finish; keep asking until a new one
+        # answers.
+        for _ in range(50):
+            if self._get_pid() != before:
+                break
+        else:
+            self.fail('No new worker answered after reloading.')
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(0, self.process.wait(timeout=10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Wob's command line; run ``python -m wob --help``."""
+
+import argparse as _argparse
+import logging as _logging
+
+from .server import prefork as _prefork
+
+
+def _parse_args(argv):
+    parser = _argparse.ArgumentParser(prog='python -m wob')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve = commands.add_parser(
+        'serve', help='Serve an application with a pre-forking server.',
+    )
+    serve.add_argument(
+        'application',
+        help='The application to serve, as "module:attribute"; either a WSGI'
+        ' application, or a Router.',
+    )
+    serve.add_argument(
+        '--host', default='127.0.0.1',
+        help='The address to listen on. (default: %(default)s)',
+    )
+    serve.add_argument(
+        '--port', type=int, default=8000,
+        help='The port to listen on. (default: %(default)s)',
+    )
+    serve.add_argument(
+        '--workers', type=int,
+        help='The number of worker processes. (default: one per CPU)',
+    )
+    serve.add_argument(
+        '--max-requests', type=int,
+        help='Replace each worker after it has served this many requests.',
+    )
+    serve.add_argument(
+        '--graceful-timeout', type=float, default=30.0,
+        help='How many seconds stopping workers get to finish their'
+        ' requests. (default: %(default)s)',
+    )
+    serve.add_argument(
+        '--access-log', action='store_true', help='Log every request.',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    _logging.basicConfig(
+        level=_logging.DEBUG if args.access_log else _logging.INFO,
+        format='[%(process)d] %(message)s',
+    )
+    server = _prefork.PreforkServer(
+        _prefork.application_loader(args.application),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        graceful_timeout=args.graceful_timeout,
+    )
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
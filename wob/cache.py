@@ -0,0 +1,111 @@
+"""A bounded, thread-safe, least-recently-used cache."""
+
+import collections as _collections
+import threading as _threading
+
+
+CacheInfo = _collections.namedtuple(
+    'CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'),
+)
+
+
+_MISSING = object()
+
+
+class LruCache(object):
+    """A mapping of at most ``maxsize`` entries, evicting the least recently
+    used entry when full.
+
+    Every operation takes a lock, so a cache may be shared between threads.
+    The ``hits`` and ``misses`` counters count calls to ``get()``, to help
+    with sizing the cache.
+
+    :param maxweight:
+        If given, the cache also holds entries weighing at most this much in
+        total, evicting the least recently used entries to stay under it; an
+        entry weighing more than this on its own is not cached at all.
+    :param weigh:
+        A function returning the weight of a ``(key, value)`` entry, e.g., its
+        size in bytes. Required with ``maxweight``.
+    """
+
+    def __init__(self, maxsize, maxweight=None, weigh=None):
+        if maxsize < 1:
+            raise ValueError('An LruCache must hold at least one entry.')
+        if maxweight is not None and weigh is None:
+            raise ValueError('An LruCache with a maxweight needs weigh.')
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.hits = 0
+        self.misses = 0
+        self.weight = 0
+        self._weigh = weigh
+        self._entries = _collections.OrderedDict()
+        # The weight of each entry, if there is a maxweight.
+        self._weights = {}
+        self._lock = _threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._entries.pop(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            # Re-inserting the entry marks it as the most recently used.
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxweight is None:
+            with self._lock:
+                self._entries.pop(key, None)
+                self._entries[key] = value
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return
+
+        weight = self._weigh(key, value)
+        with self._lock:
+            self._remove(key)
+            if weight > self.maxweight:
+                return
+            self._entries[key] = value
+            self._weights[key] = weight
+            self.weight += weight
+            while (len(self._entries) > self.maxsize
+                   or self.weight > self.maxweight):
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key, default=None):
+        """Remove an entry, and return its value (or default, if absent)."""
+        with self._lock:
+            value = self._entries.get(key, default)
+            self._remove(key)
+            return value
+
+    def keys(self):
+        """Return a list of the keys, from least to most recently used."""
+        with self._lock:
+            return list(self._entries)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        weight = self._weights.pop(key, None)
+        if weight is not None:
+            self.weight -= weight
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries),
+            )
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,34 @@
+"""HTTP messages: requests, responses, headers and errors.
+
+Importing the package imports none of its modules; each is imported the
+first time it's used, either with an import statement, or (on Python 3.7 and
+later) as an attribute of the package, e.g., ``wob.http.request``.
+"""
+
+import importlib as _importlib
+
+
+_SUBMODULES = frozenset((
+    'asgi',
+    'body',
+    'compression',
+    'conditional',
+    'errors',
+    'magic_headers',
+    'message',
+    'path',
+    'request',
+    'response',
+))
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return _importlib.import_module('.' + name, __name__)
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,123 @@
+"""Requests and responses for ASGI servers.
+
+This module requires Python 3.5 or later.
+"""
+
+from . import errors as _errors
+from . import message as _message
+from . import request as _request
+
+
+class AsgiRequest(_request.Request):
+    """A request built from an ASGI HTTP connection scope."""
+
+    __slots__ = ('asgi_scope', 'asgi_receive')
+
+    def __init__(self, asgi_scope, receive=None):
+        headers = _message.Headers(
+            (name.decode('latin1'), value.decode('latin1'))
+            for name, value in asgi_scope.get('headers', ())
+        )
+        method = asgi_scope['method']
+        root_path = asgi_scope.get('root_path', '')
+        path = asgi_scope['path']
+        # Some servers include the root path in the path, and some do not.
+        # It's only a prefix of whole components: "/app" isn't one of
+        # "/apple".
+        prefix = root_path.rstrip('/')
+        if prefix and (path == prefix or path.startswith(prefix + '/')):
+            path = path[len(prefix):] or '/'
+
+        super(AsgiRequest, self).__init__(
+            method, root_path or '/', path, headers,
+            query_string=asgi_scope.get('query_string', b'').decode('latin1'),
+        )
+        self.asgi_scope = asgi_scope
+        self.asgi_receive = receive
+
+    def body_reader(self, *args, **kwargs):
+        """Not supported: an ASGI request's body arrives asynchronously.
+
+        :raises TypeError: Always; use ``read_body()`` from this module.
+        """
+        raise TypeError(
+            "An ASGI request's body can't be read synchronously; use"
+            ' wob.http.asgi.read_body().'
+        )
+
+
+def request_from_asgi(scope, receive=None):
+    return AsgiRequest(scope, receive)
+
+
+async def read_body(request, max_size=_request._MAX_BODY_SIZE):
+    """Read the whole body of an ``AsgiRequest`` into a bytearray.
+
+    :param max_size:
+        The most bytes the body may have; the request's ``max_body_size`` by
+        default. Pass None for no limit, as with ``Request.body_reader()``.
+    :raises PayloadTooLarge: If the body is larger than that.
+    """
+    if max_size is _request._MAX_BODY_SIZE:
+        max_size = request.max_body_size
+    content_length = request.content_length
+    if (max_size is not None and content_length is not None
+            and content_length > max_size):
+        raise _errors.PayloadTooLarge()
+
+    body = bytearray()
+    while request.asgi_receive is not None:
+        message = await request.asgi_receive()
+        if message['type'] == 'http.disconnect':
+            raise _errors.BadRequest()
+        body += message.get('body', b'')
+        if max_size is not None and len(body) > max_size:
+            raise _errors.PayloadTooLarge()
+        if not message.get('more_body', False):
+            break
+    return body
+
+
+async def send_response(response, send):
+    """Send a Response through an ASGI ``send`` callable.
+
+    A bytes body is sent in a single message; any other body is streamed, one
+    message per chunk, as it is produced. Asynchronous iterables are accepted
+    as bodies here, in addition to everything ``Response`` accepts.
+    """
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [
+            (name.encode('latin1'), value.encode('latin1'))
+            for name, value in response.header_list()
+        ],
+    })
+
+    body = response.body
+    if isinstance(body, bytes):
+        await send({'type': 'http.response.body', 'body': body})
+        return
+
+    try:
+        if hasattr(body, '__aiter__'):
+            async for chunk in body:
+                await _send_chunk(send, chunk)
+        else:
+            for chunk in response.iter_body():
+                await _send_chunk(send, chunk)
+    finally:
+        if hasattr(body, 'aclose'):
+            await body.aclose()
+        else:
+            response.close()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _send_chunk(send, chunk):
+    if chunk:
+        await send({
+            'type': 'http.response.body',
+            'body': bytes(chunk),
+            'more_body': True,
+        })
@@ -0,0 +1,153 @@
+"""Reading request bodies in bounded chunks."""
+
+import re as _re
+import socket as _socket
+import timeit as _timeit
+
+from . import errors as _errors
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# The longest body, in chunks, that BodyReader.read() allocates all of its
+# buffer for before reading it.
+PREALLOCATE_CHUNKS = 16
+
+_timer = _timeit.default_timer
+
+_DIGITS = _re.compile('^[0-9]+$')
+
+
+class BodyReader(object):
+    """Reads a request body from a stream, enforcing limits on it.
+
+    :param stream:
+        A file-like object to read the body from, or None if the request has
+        no body that can be read. Streams with a ``readinto()`` method are
+        read straight into the reader's buffers.
+    :param content_length:
+        The length of the body, from the Content-Length header, or None if it
+        isn't known; in that case, the body is read until the stream ends.
+    :param max_size:
+        The most bytes the body may have, or None for no limit.
+        ``PayloadTooLarge`` is raised as soon as the body is known to be
+        larger (right away, if the Content-Length says so).
+    :param timeout:
+        The most seconds reading the body may take, or None for no limit.
+        It is checked between reads, so it can't interrupt a read that
+        blocks forever; the server's socket timeouts are for that. A socket
+        timeout while reading raises ``RequestTimeout``, too.
+    :param chunk_size: The most bytes read from the stream at a time.
+    :param require_length:
+        If true, ``LengthRequired`` is raised if the Content-Length isn't
+        known.
+    """
+
+    def __init__(
+            self, stream, content_length, max_size=None, timeout=None,
+            chunk_size=DEFAULT_CHUNK_SIZE, require_length=False):
+        if content_length is None and require_length:
+            raise _errors.LengthRequired()
+        if (max_size is not None and content_length is not None
+                and content_length > max_size):
+            raise _errors.PayloadTooLarge()
+
+        self.stream = stream
+        self.content_length = content_length
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        if timeout is None:
+            self._deadline = None
+        else:
+            self._deadline = _timer() + timeout
+        self._buffer = None
+
+    def _bytes_wanted(self, limit):
+        if self.stream is None:
+            return 0
+        if self.content_length is not None:
+            limit = min(limit, self.content_length - self.bytes_read)
+        return limit
+
+    def _read_into(self, view):
+        """Read from the stream into a memoryview; returns the byte count."""
+        try:
+            readinto = getattr(self.stream, 'readinto', None)
+            if readinto is not None:
+                count = readinto(view) or 0
+            else:
+                data = self.stream.read(len(view))
+                count = len(data)
+                view[:count] = data
+        except _socket.timeout:
+            raise _errors.RequestTimeout()
+
+        if count == 0 and self.content_length is not None:
+            # The client hung up before sending the whole body.
+            raise _errors.BadRequest()
+        self.bytes_read += count
+        if self.max_size is not None and self.bytes_read > self.max_size:
+            raise _errors.PayloadTooLarge()
+        if self._deadline is not None and _timer() > self._deadline:
+            raise _errors.RequestTimeout()
+        return count
+
+    def iter_chunks(self):
+        """Iterate over the body, a chunk at a time.
+
+        The chunks are memoryviews of a single buffer that is reused for
+        every chunk, so a chunk is only valid until the next one is
+        requested; copy it (e.g., with ``bytes()``) to keep it.
+        """
+        if self._buffer is None:
+            self._buffer = bytearray(self.chunk_size)
+        view = memoryview(self._buffer)
+        while True:
+            wanted = self._bytes_wanted(self.chunk_size)
+            if wanted <= 0:
+                return
+            count = self._read_into(view[:wanted])
+            if count == 0:
+                return
+            yield view[:count]
+
+    def read(self):
+        """Read the whole body.
+
+        If the body's length is known, and no more than
+        ``PREALLOCATE_CHUNKS`` chunks, it is read straight into a buffer of
+        that size, with no further copies. Longer bodies are gathered as
+        they arrive, so that a client can't make the server allocate more
+        memory than it sends, just by claiming a large Content-Length.
+
+        :returns: A bytearray of the body.
+        """
+        length = self._bytes_wanted(self.content_length or 0)
+        if (self.content_length is None
+                or length > self.chunk_size * PREALLOCATE_CHUNKS):
+            body = bytearray()
+            for chunk in self.iter_chunks():
+                body += chunk
+            return body
+
+        body = bytearray(length)
+        view = memoryview(body)
+        position = 0
+        while position < len(body):
+            end = min(position + self.chunk_size, len(body))
+            position += self._read_into(view[position:end])
+        return body
+
+
+def parse_content_length(value):
+    """Parse the value of a Content-Length header.
+
+    :returns: The length, or None if value is None or empty.
+    :raises BadRequest: If the value isn't a valid length.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if not _DIGITS.match(value):
+        raise _errors.BadRequest()
+    return int(value)
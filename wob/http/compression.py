@@ -0,0 +1,235 @@
+"""Compressing responses, as the client's Accept-Encoding allows.
+
+A ``Compressor`` is a response filter; add one to a router to compress every
+response it returns that is worth compressing::
+
+    router.add_response_filter(Compressor())
+
+Bodies of known size below ``min_size`` are left alone, as are responses that
+already have a Content-Encoding, and ones whose Content-Type is of a format
+that is compressed already (most images, audio and video, archives). Every
+other response gets ``Vary: Accept-Encoding``, since what is sent depends on
+that header.
+
+Streamed bodies (files, iterables, buffers) are compressed a chunk at a time,
+as they are sent. A ``bytes`` body is compressed all at once; the compressed
+bodies of ``FrozenResponse``s, which are built once and sent many times, are
+cached, so each is compressed only once per encoding.
+"""
+
+import zlib as _zlib
+
+from .. import cache as _cache
+from . import magic_headers as _magic_headers
+from . import response as _response
+
+
+# The content-codings a Compressor can produce, in order of preference.
+ENCODINGS = ('gzip', 'deflate')
+
+DEFAULT_MIN_SIZE = 1024
+
+# The window bits zlib needs for each content-coding. (HTTP's "deflate" is the
+# zlib format, not raw deflate.)
+_WBITS = {
+    'gzip': 16 + _zlib.MAX_WBITS,
+    'deflate': _zlib.MAX_WBITS,
+}
+
+# Types whose formats are compressed already; compressing them again only
+# wastes time.
+_COMPRESSED_TYPE_PREFIXES = ('image/', 'audio/', 'video/', 'font/woff')
+_COMPRESSED_TYPES = frozenset((
+    'application/gzip',
+    'application/x-gzip',
+    'application/zip',
+    'application/x-bzip2',
+    'application/x-xz',
+    'application/x-7z-compressed',
+    'application/x-rar-compressed',
+    'application/zstd',
+))
+# Exceptions to _COMPRESSED_TYPE_PREFIXES.
+_UNCOMPRESSED_TYPES = frozenset(('image/svg+xml', 'image/bmp'))
+
+# Responses with these statuses have no body, or a partial one.
+_NO_COMPRESSION_STATUSES = frozenset((204, 206, 304))
+
+
+class Compressor(object):
+    """A response filter that compresses responses.
+
+    :param min_size: Bodies known to be smaller than this are not compressed.
+    :param level: The zlib compression level, from 1 to 9.
+    :param encodings: The content-codings to offer, in order of preference.
+    :param cache_size:
+        The most compressed ``FrozenResponse`` bodies to cache, or None to
+        cache none.
+    :param cache_bytes:
+        The most bytes the cache may hold, counting both the original and the
+        compressed bodies.
+    """
+
+    def __init__(
+            self, min_size=DEFAULT_MIN_SIZE, level=6, encodings=ENCODINGS,
+            cache_size=256, cache_bytes=16 * 1024 * 1024):
+        self.min_size = min_size
+        self.level = level
+        self.encodings = tuple(encodings)
+        if cache_size is None:
+            self.cache = None
+        else:
+            self.cache = _cache.LruCache(
+                cache_size, maxweight=cache_bytes, weigh=_cache_entry_size,
+            )
+
+    def __call__(self, request, response):
+        return self.compress_response(request, response)
+
+    def compress_response(self, request, response):
+        """Compress a response, if the request and the response allow it.
+
+        :returns:
+            The response, if it isn't worth compressing; otherwise, a new
+            response, with a compressed body if the client accepts one of
+            ``encodings``. The response itself is not modified.
+        """
+        if not self._worth_compressing(response):
+            return response
+
+        encoding = negotiate_encoding(
+            request.headers.get('Accept-Encoding'), self.encodings,
+        )
+        new_response = response.copy()
+        add_vary(new_response.headers, 'Accept-Encoding')
+        if encoding is None:
+            return new_response
+
+        body = response.body
+        if isinstance(body, bytes):
+            if isinstance(response, _response.FrozenResponse):
+                compressed = self._cached_compress(body, encoding)
+            else:
+                compressed = compress(body, encoding, self.level)
+            if len(compressed) >= len(body):
+                return new_response
+            new_response.body = compressed
+        else:
+            new_response.body = _CompressedBody(
+                response.copy(), encoding, self.level,
+            )
+
+        headers = new_response.headers
+        headers.set_header('Content-Encoding', encoding)
+        headers.remove_header('Content-Length')
+        # The compressed body isn't byte-for-byte what a strong ETag was
+        # computed over.
+        etag = headers.get('ETag')
+        if etag is not None and etag.startswith('"'):
+            headers.set_header('ETag', 'W/' + etag)
+        return new_response
+
+    def _worth_compressing(self, response):
+        status_code = response.status_code
+        if status_code < 200 or status_code in _NO_COMPRESSION_STATUSES:
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        if hasattr(response.body, '__aiter__'):
+            return False
+        content_type = response.headers.get('Content-Type')
+        if content_type is not None and _is_compressed_type(content_type):
+            return False
+        content_length = response.content_length
+        return content_length is None or content_length >= self.min_size
+
+    def _cached_compress(self, body, encoding):
+        if self.cache is None:
+            return compress(body, encoding, self.level)
+        # Bytes cache their hashes, and a frozen response's body is the same
+        # object each time, so looking it up is cheap.
+        key = (encoding, body)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, self.level)
+            self.cache.put(key, compressed)
+        return compressed
+
+
+class _CompressedBody(object):
+    """A response body that compresses another response's body as it is
+    iterated over."""
+
+    def __init__(self, source, encoding, level):
+        self.source = source
+        self.encoding = encoding
+        self.level = level
+
+    def __iter__(self):
+        compressor = _compressobj(self.encoding, self.level)
+        for chunk in self.source.iter_body():
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def close(self):
+        self.source.close()
+
+
+def compress(data, encoding, level=6):
+    """Compress bytes with a content-coding from ``ENCODINGS``."""
+    compressor = _compressobj(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compressobj(encoding, level):
+    return _zlib.compressobj(level, _zlib.DEFLATED, _WBITS[encoding])
+
+
+def negotiate_encoding(accept_encoding, encodings=ENCODINGS):
+    """Pick the content-coding to send, given an Accept-Encoding header.
+
+    >>> negotiate_encoding('deflate, gzip;q=0.5')
+    'deflate'
+    >>> negotiate_encoding('gzip;q=0, *')
+    'deflate'
+    >>> negotiate_encoding('br') is None
+    True
+
+    :param accept_encoding: The header's value, or None if it is absent.
+    :param encodings: The content-codings available, in order of preference.
+    :returns:
+        The acceptable coding with the highest quality (preferring earlier
+        ``encodings`` among equals), or None if none is acceptable.
+    """
+    if not accept_encoding:
+        return None
+    return _magic_headers.parse_accept_encoding(accept_encoding).best(
+        encodings,
+    )
+
+
+def add_vary(headers, name):
+    """Add a header name to the Vary header, unless it is already there."""
+    vary = headers.get('Vary')
+    if vary is None:
+        headers.set_header('Vary', name)
+        return
+    names = [item.strip().lower() for item in vary.split(',')]
+    if name.lower() not in names and '*' not in names:
+        headers.set_header('Vary', '{}, {}'.format(vary, name))
+
+
+def _is_compressed_type(content_type):
+    mimetype = content_type.partition(';')[0].strip().lower()
+    if mimetype in _UNCOMPRESSED_TYPES:
+        return False
+    return (
+        mimetype in _COMPRESSED_TYPES
+        or mimetype.startswith(_COMPRESSED_TYPE_PREFIXES)
+    )
+
+
+def _cache_entry_size(key, compressed):
+    return len(key[1]) + len(compressed)
@@ -0,0 +1,285 @@
+"""Conditional requests: ETags, Last-Modified, and 304 Not Modified.
+
+There are two ways to use this. An endpoint that can tell what version of a
+resource it would send without rendering it can call ``check()`` first; if
+the client already has that version, ``check()`` raises ``NotModified``, and
+the rendering is skipped altogether::
+
+    def article(request, article_id):
+        article = load_article(article_id)
+        conditional.check(
+            request, etag=strong_etag(article.revision),
+            last_modified=article.updated_at,
+        )
+        return render(article)
+
+Otherwise, a ``ConditionalGet`` response filter answers conditional requests
+from the validators on the responses themselves, adding a weak ETag to any
+response with a bytes body that has neither validator::
+
+    router.add_response_filter(ConditionalGet())
+
+That saves sending the body, but not rendering it. Add it before any
+``Compressor``, so that a 304 isn't compressed for nothing. It only answers
+GET and HEAD requests: by the time it sees a response, the endpoint has
+already run, which is too late to refuse a PUT or DELETE. Endpoints for
+unsafe methods must call ``check()`` (or ``evaluate()``) before they act.
+
+Last-modified times are POSIX timestamps, in seconds.
+"""
+
+import calendar as _calendar
+import email.utils as _email_utils
+import hashlib as _hashlib
+import re as _re
+
+from .. import cache as _cache
+from . import errors as _errors
+from . import message as _message
+from . import response as _response
+
+
+# The headers a 304 response carries over from the response it stands for
+# (RFC 7232, section 4.1).
+NOT_MODIFIED_HEADERS = (
+    'Cache-Control', 'Content-Location', 'Date', 'ETag', 'Expires',
+    'Last-Modified', 'Vary',
+)
+
+_ENTITY_TAG = _re.compile(r'\s*((?:W/)?"[^"]*")\s*(?:,|$)')
+
+# Methods whose responses If-None-Match and If-Modified-Since apply to.
+_SAFE_METHODS = frozenset(('GET', 'HEAD'))
+
+
+def strong_etag(version):
+    """Make a strong ETag from a string that identifies a version exactly.
+
+    >>> strong_etag('r1234')
+    '"r1234"'
+    """
+    return '"{}"'.format(version)
+
+
+def weak_etag(body):
+    """Compute a weak ETag for a bytes body.
+
+    >>> weak_etag(b'hello')
+    'W/"5-aaf4c61ddcc5e8a2dabede0f3b482cd9aea9434d"'
+    """
+    return 'W/"{:x}-{}"'.format(len(body), _hashlib.sha1(body).hexdigest())
+
+
+def http_date(timestamp):
+    """Format a POSIX timestamp as an HTTP-date.
+
+    >>> http_date(784111777)
+    'Sun, 06 Nov 1994 08:49:37 GMT'
+    """
+    return _email_utils.formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value):
+    """Parse an HTTP-date into a POSIX timestamp, or None if it is invalid.
+
+    >>> parse_http_date('Sun, 06 Nov 1994 08:49:37 GMT')
+    784111777
+    """
+    try:
+        parsed = _email_utils.parsedate_tz(value)
+        if parsed is None:
+            return None
+        offset = parsed[9] or 0
+        return _calendar.timegm(parsed[:6] + (0, 0, 0)) - offset
+    except (ValueError, OverflowError):
+        # E.g., a year out of range.
+        return None
+
+
+def parse_entity_tags(value):
+    """Parse the value of an If-Match or If-None-Match header.
+
+    >>> parse_entity_tags('"a", W/"b"')
+    ['"a"', 'W/"b"']
+
+    :returns:
+        A list of the entity tags, ``['*']`` for "*", or None if the value is
+        malformed.
+    """
+    value = value.strip()
+    if value == '*':
+        return ['*']
+    tags = []
+    position = 0
+    while position < len(value):
+        match = _ENTITY_TAG.match(value, position)
+        if match is None:
+            return None
+        tags.append(match.group(1))
+        position = match.end()
+    return tags
+
+
+def _opaque_tag(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def _weak_match(etag, tags):
+    opaque_tag = _opaque_tag(etag)
+    return any(
+        tag == '*' or _opaque_tag(tag) == opaque_tag for tag in tags
+    )
+
+
+def _strong_match(etag, tags):
+    if etag is None or etag.startswith('W/'):
+        return '*' in tags
+    return any(tag == '*' or tag == etag for tag in tags)
+
+
+def evaluate(request, etag=None, last_modified=None):
+    """Evaluate a request's preconditions against a resource's validators.
+
+    This follows the order in RFC 7232, section 6. A request without any
+    preconditions always passes.
+
+    :param etag: The resource's current ETag, or None.
+    :param last_modified: When the resource was last modified, or None.
+    :returns:
+        None if the request should be handled normally, 304 if the client's
+        copy is up to date, or 412 if a precondition failed.
+    """
+    headers = request.headers
+    if_match = headers.get('If-Match')
+    if if_match is not None:
+        tags = parse_entity_tags(if_match)
+        if not tags or not _strong_match(etag, tags):
+            return 412
+    else:
+        if_unmodified_since = headers.get('If-Unmodified-Since')
+        if if_unmodified_since is not None and last_modified is not None:
+            since = parse_http_date(if_unmodified_since)
+            if since is not None and int(last_modified) > since:
+                return 412
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = parse_entity_tags(if_none_match)
+        if tags and etag is not None and _weak_match(etag, tags):
+            return 304 if request.method in _SAFE_METHODS else 412
+        return None
+
+    if_modified_since = headers.get('If-Modified-Since')
+    if (if_modified_since is not None and last_modified is not None
+            and request.method in _SAFE_METHODS):
+        since = parse_http_date(if_modified_since)
+        if since is not None and int(last_modified) <= since:
+            return 304
+    return None
+
+
+def check(request, etag=None, last_modified=None):
+    """Check a request's preconditions before rendering a response.
+
+    :param etag: The ETag the response would have, or None.
+    :param last_modified:
+        When the resource was last modified, as a POSIX timestamp, or None.
+    :raises NotModified:
+        If the client's copy is up to date; the ETag and Last-Modified
+        headers are sent with it.
+    :raises PreconditionFailed: If a precondition failed.
+    """
+    status_code = evaluate(request, etag, last_modified)
+    if status_code == 304:
+        header_items = []
+        if etag is not None:
+            header_items.append(('ETag', etag))
+        if last_modified is not None:
+            header_items.append(('Last-Modified', http_date(last_modified)))
+        raise _errors.NotModified(header_items)
+    elif status_code == 412:
+        raise _errors.PreconditionFailed()
+
+
+def not_modified_response(response):
+    """Build the 304 response that stands for a response."""
+    headers = _message.Headers()
+    for name in NOT_MODIFIED_HEADERS:
+        if name in response.headers:
+            for value in response.headers.get_all_headers(name):
+                headers.add_header(name, value)
+    return _response.Response(
+        304, _response.STATUS_TO_REASON_PHRASE[304], headers, b'',
+    )
+
+
+class ConditionalGet(object):
+    """A response filter that answers conditional GET and HEAD requests.
+
+    Successful (200) responses to GET and HEAD requests are checked against
+    the request's preconditions using their ETag and Last-Modified headers.
+    A response with neither header and a bytes body gets a weak ETag
+    computed from the body; those of ``FrozenResponse``s are cached.
+
+    Responses to other methods pass through untouched, since their endpoints
+    have already acted; those endpoints must call ``check()`` or
+    ``evaluate()`` themselves, before acting.
+
+    :param cache_size:
+        The most ETags of frozen responses' bodies to cache, or None to cache
+        none.
+    :param cache_bytes:
+        The most bytes of bodies the cache may keep alive, as its keys.
+    """
+
+    def __init__(self, cache_size=1024, cache_bytes=16 * 1024 * 1024):
+        if cache_size is None:
+            self.cache = None
+        else:
+            self.cache = _cache.LruCache(
+                cache_size, maxweight=cache_bytes, weigh=_body_size,
+            )
+
+    def __call__(self, request, response):
+        return self.filter_response(request, response)
+
+    def filter_response(self, request, response):
+        if (request.method not in _SAFE_METHODS
+                or response.status_code != 200):
+            return response
+
+        headers = response.headers
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if (etag is None and last_modified is None
+                and isinstance(response.body, bytes)):
+            etag = self._etag(response)
+            response = response.copy()
+            response.headers.set_header('ETag', etag)
+        if last_modified is not None:
+            last_modified = parse_http_date(last_modified)
+
+        status_code = evaluate(request, etag, last_modified)
+        if status_code is None:
+            return response
+        response.close()
+        if status_code == 304:
+            return not_modified_response(response)
+        return _errors.to_simple_text_response(_errors.PreconditionFailed())
+
+    def _etag(self, response):
+        body = response.body
+        if self.cache is None or not isinstance(
+                response, _response.FrozenResponse):
+            return weak_etag(body)
+        # As in wob.http.compression: a frozen response's body is the same
+        # bytes object every time, and bytes cache their hashes.
+        etag = self.cache.get(body)
+        if etag is None:
+            etag = weak_etag(body)
+            self.cache.put(body, etag)
+        return etag
+
+
+def _body_size(body, etag):
+    return len(body)
@@ -3,6 +3,14 @@ from . import response as _response
 
 
 class HttpError(Exception):
+    # Set by __init__ when a reason phrase other than the standard one for the
+    # status code is given.
+    _custom_reason_phrase = None
+    # Whether to_simple_text_response() may keep the responses for errors of
+    # this class around to reuse them; false for errors whose headers vary
+    # with nearly every instance.
+    _reuse_responses = True
+
     def __init__(self, status_code, reason_phrase=None, args=()):
         super(HttpError, self).__init__(*args)
 
@@ -14,14 +22,21 @@ class HttpError(Exception):
         # the class, or allowing the default property defined on this class to
         # look it up dynamically.
         if reason_phrase is not None:
-            self.reason_phrase = reason_phrase
+            self._custom_reason_phrase = reason_phrase
 
     @property
     def reason_phrase(self):
+        if self._custom_reason_phrase is not None:
+            return self._custom_reason_phrase
         return _response.STATUS_TO_REASON_PHRASE[self.status_code]
 
+    def extra_header_items(self):
+        """The headers to add to a response for this error, as a tuple of
+        (name, value) pairs."""
+        return ()
+
     def extra_headers(self):
-        return _message.Headers()
+        return _message.Headers(self.extra_header_items())
 
 
 def _error_class(class_name, status_code):
@@ -36,20 +51,68 @@ def _error_class(class_name, status_code):
         super(type_, self).__init__(None)
 
     type_.__init__ = __init__
+
+    # Build the class's response up front, so the first request to raise the
+    # error doesn't have to.
+    _canned_response(
+        status_code, _response.STATUS_TO_REASON_PHRASE[status_code], (),
+    )
     return type_
 
 
+# Responses from to_simple_text_response(), keyed on the status code, reason
+# phrase and extra header items of the error. They are frozen, so one
+# response serves every error of a kind. Bounded, in case some error class
+# has unboundedly many variants.
+_CANNED_RESPONSES = {}
+_MAX_CANNED_RESPONSES = 1024
+
+
 def to_simple_text_response(error):
-    body = '{} {}\n'.format(error.status_code, error.reason_phrase)
-    body = body.encode('utf-8')
+    """Build a short text/plain response describing an HTTP error.
+
+    The response is a shared ``FrozenResponse``; ``copy()`` it to modify it.
+    (Errors that override ``extra_headers()`` instead of
+    ``extra_header_items()`` get a fresh, modifiable ``Response`` instead.)
+
+    Errors whose status means that a response has no body (e.g., 304 Not
+    Modified) get a response with an empty body.
+    """
+    if (type(error).extra_headers is not HttpError.extra_headers
+            or not error._reuse_responses):
+        return _simple_text_response(
+            error.status_code, error.reason_phrase, error.extra_headers(),
+        )
+    return _canned_response(
+        error.status_code, error.reason_phrase, error.extra_header_items(),
+    )
+
 
+def _canned_response(status_code, reason_phrase, extra_header_items):
+    key = (status_code, reason_phrase, extra_header_items)
+    response = _CANNED_RESPONSES.get(key)
+    if response is None:
+        response = _simple_text_response(
+            status_code, reason_phrase, extra_header_items,
+        ).freeze()
+        if len(_CANNED_RESPONSES) < _MAX_CANNED_RESPONSES:
+            _CANNED_RESPONSES[key] = response
+    return response
+
+
+def _simple_text_response(status_code, reason_phrase, extra_headers):
     headers = _message.Headers()
-    headers.add_header('Content-Type', 'text/plain; charset=utf-8')
-    headers.extend_headers(error.extra_headers())
+    if _response.status_has_no_body(status_code):
+        body = b''
+    else:
+        body = '{} {}\n'.format(status_code, reason_phrase)
+        body = body.encode('utf-8')
+        headers.add_header('Content-Type', 'text/plain; charset=utf-8')
+    headers.extend_headers(extra_headers)
 
     return _response.Response(
-        error.status_code,
-        error.reason_phrase,
+        status_code,
+        reason_phrase,
         headers,
         body,
     )
@@ -59,13 +122,32 @@ class MethodNotAllowed(HttpError):
     status_code = 405
 
     def __init__(self, allow):
-        super(MethodNotAllowed, self).__init__(args=(self.allow,))
+        super(MethodNotAllowed, self).__init__(None, args=(allow,))
         self.allow = allow
 
-    def extra_headers(self):
-        return _message.Headers((
+    def extra_header_items(self):
+        return (
             ('Allow', ', '.join(sorted(self.allow))),
-        ))
+        )
+
+
+class NotModified(HttpError):
+    """Raised to answer a conditional request with 304 Not Modified.
+
+    :param header_items:
+        The (name, value) pairs of the headers to send with it: the ETag and
+        Last-Modified headers, and the like; see ``wob.http.conditional``.
+    """
+    status_code = 304
+    _reuse_responses = False
+
+    def __init__(self, header_items=()):
+        header_items = tuple(header_items)
+        super(NotModified, self).__init__(None, args=(header_items,))
+        self.header_items = header_items
+
+    def extra_header_items(self):
+        return self.header_items
 
 
 BadRequest = _error_class('BadRequest', 400)
@@ -78,13 +160,16 @@ RequestTimeout = _error_class('RequestTimeout', 408)
 Conflict = _error_class('Conflict', 409)
 Gone = _error_class('Gone', 410)
 LengthRequired = _error_class('LengthRequired', 411)
+PreconditionFailed = _error_class('PreconditionFailed', 412)
 PayloadTooLarge = _error_class('PayloadTooLarge', 413)
 UriTooLong = _error_class('UriTooLong', 414)
 UnsupportedMediaType = _error_class('UnsupportedMediaType', 415)
 ExpectationFailed = _error_class('ExpectationFailed', 417)
 UpgradeRequired = _error_class('UpgradeRequired', 426)
+RequestHeaderFieldsTooLarge = _error_class('RequestHeaderFieldsTooLarge', 431)
 InternalServerError = _error_class('InternalServerError', 500)
 NotImplemented_ = _error_class('NotImplemented_', 501)
 BadGateway = _error_class('BadGateway', 502)
 ServiceUnavailable = _error_class('ServiceUnavailable', 503)
 GatewayTimeout = _error_class('GatewayTimeout', 504)
+HttpVersionNotSupported = _error_class('HttpVersionNotSupported', 505)
@@ -0,0 +1,471 @@
+"""Parsed forms of structured request headers.
+
+The Accept family of headers, Cache-Control and User-Agent are parsed into
+immutable objects here; ``Request`` has a property for each (``accept``,
+``cache_control``, ``user_agent``, etc.).
+
+Clients send the same few hundred values of these headers over and over, so
+each ``parse_*()`` function keeps the results for the most recent values in a
+process-wide LRU cache, keyed on the header's value, and shared between
+threads; its ``cache`` attribute is the ``LruCache``, whose counters help
+with sizing it.
+
+Only the first ``MAX_VALUE_LENGTH`` characters of a value are parsed; the
+rest is ignored.
+"""
+
+import collections as _collections
+import re as _re
+
+from .. import cache as _cache
+
+
+# The most values each parse_*() function caches the result of, and the most
+# characters of values it caches in all.
+CACHE_SIZE = 512
+CACHE_CHARACTERS = 256 * 1024
+# The most characters of a value that are parsed.
+MAX_VALUE_LENGTH = 8192
+
+# The pieces of a comma-separated list, and of the parameters of an item:
+# runs of other characters, quoted strings (which may contain commas and
+# semicolons, and run to the end of the value if unterminated), and the
+# separators. No two alternatives can match the same text, so there is no
+# backtracking, and splitting takes linear time whatever the value.
+_LIST_TOKEN = _re.compile(r'[^,"]+|"(?:[^"\\]|\\.)*"?|,')
+_PARAMETER_TOKEN = _re.compile(r'[^;"]+|"(?:[^"\\]|\\.)*"?|;')
+_QUOTED_PAIR = _re.compile(r'\\(.)')
+# Not str.isdigit(), which is also true of digits that int() rejects.
+_DIGITS = _re.compile(r'[0-9]+\Z')
+
+
+# An item of an Accept-family header. The value is lowercased (e.g.,
+# "text/html", "gzip", "en-us"); parameters is a tuple of the (name, value)
+# pairs of its parameters other than "q", with the names lowercased.
+AcceptItem = _collections.namedtuple(
+    'AcceptItem', ('value', 'quality', 'parameters'),
+)
+
+
+class AcceptList(object):
+    """The items of an Accept-family header, in order of quality.
+
+    Items of equal quality keep the order they were sent in.
+
+    >>> accept = parse_accept('text/*;q=0.5, text/html, */*;q=0.1')
+    >>> [item.value for item in accept]
+    ['text/html', 'text/*', '*/*']
+    >>> accept.quality('text/plain')
+    0.5
+    >>> accept.best(['application/json', 'text/plain'])
+    'text/plain'
+
+    :param items: The ``AcceptItem``s.
+    :param kind:
+        How values are matched: "media" (Accept), "language"
+        (Accept-Language), "encoding" (Accept-Encoding, where "identity" is
+        acceptable unless refused), or "token" (Accept-Charset).
+    :param present:
+        Whether the header was sent; if it wasn't, everything is
+        acceptable.
+    """
+
+    def __init__(self, items, kind, present=True):
+        self.items = tuple(sorted(items, key=lambda item: -item.quality))
+        self.kind = kind
+        self.present = present
+
+    def quality(self, offer):
+        """The quality with which the client accepts a value.
+
+        The most specific item matching the value decides; 0.0 means that
+        the value is not acceptable.
+        """
+        if not self.present:
+            return 1.0
+        offer_value, offer_parameters = _value_and_parameters(offer)
+        best_specificity = -1
+        best_quality = 0.0
+        for item in self.items:
+            specificity = _MATCHERS[self.kind](
+                item, offer_value, offer_parameters,
+            )
+            if specificity > best_specificity:
+                best_specificity = specificity
+                best_quality = item.quality
+        if (best_specificity < 0 and self.kind == 'encoding'
+                and offer_value == 'identity'):
+            # Always acceptable, unless refused by name, or by "*;q=0".
+            return 1.0
+        return best_quality
+
+    def best(self, offers):
+        """Pick the most acceptable of the values on offer.
+
+        :param offers: The values available, in order of preference.
+        :returns:
+            The offer with the highest quality (the earliest, among equals),
+            or None if none is acceptable.
+        """
+        best_offer = None
+        best_quality = 0.0
+        for offer in offers:
+            quality = self.quality(offer)
+            if quality > best_quality:
+                best_offer = offer
+                best_quality = quality
+        return best_offer
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return '<{}.{} {!r}>'.format(
+            __name__, type(self).__name__,
+            [(item.value, item.quality) for item in self.items],
+        )
+
+
+def _match_media(item, offer_value, offer_parameters):
+    """How specifically an Accept item matches an offered media type.
+
+    :returns: -1 if it doesn't match at all.
+    """
+    range_type, _, range_subtype = item.value.partition('/')
+    offer_type, _, offer_subtype = offer_value.partition('/')
+    if range_type == '*':
+        return 0
+    if range_type != offer_type:
+        return -1
+    if range_subtype == '*':
+        return 1
+    if range_subtype != offer_subtype:
+        return -1
+    if not item.parameters:
+        return 2
+    if set(item.parameters).issubset(offer_parameters):
+        return 3 + len(item.parameters)
+    return -1
+
+
+def _match_language(item, offer_value, offer_parameters):
+    # "Basic filtering" (RFC 4647): "en" matches "en" and "en-us".
+    language_range = item.value
+    if language_range == '*':
+        return 0
+    if (offer_value == language_range
+            or offer_value.startswith(language_range + '-')):
+        return len(language_range)
+    return -1
+
+
+def _match_token(item, offer_value, offer_parameters):
+    if item.value == '*':
+        return 0
+    if item.value == offer_value:
+        return 1
+    return -1
+
+
+_MATCHERS = {
+    'media': _match_media,
+    'language': _match_language,
+    'token': _match_token,
+    'encoding': _match_token,
+}
+
+
+class CacheControl(object):
+    """The directives of a Cache-Control header.
+
+    >>> cache_control = parse_cache_control('no-cache, max-age=60')
+    >>> 'no-cache' in cache_control, cache_control.max_age
+    (True, 60)
+
+    :param directives:
+        A dict of the directives, by lowercased name, to their values (None
+        for directives without one).
+    """
+
+    def __init__(self, directives):
+        self._directives = directives
+
+    def get(self, name, default=None):
+        """The value of a directive; None if it has none."""
+        return self._directives.get(name.lower(), default)
+
+    @property
+    def max_age(self):
+        """The max-age, in seconds, or None if absent or invalid."""
+        return _seconds(self._directives.get('max-age'))
+
+    @property
+    def no_cache(self):
+        return 'no-cache' in self._directives
+
+    @property
+    def no_store(self):
+        return 'no-store' in self._directives
+
+    def __contains__(self, name):
+        return name.lower() in self._directives
+
+    def __iter__(self):
+        return iter(self._directives)
+
+    def __len__(self):
+        return len(self._directives)
+
+    def __repr__(self):
+        return '<{}.{} {!r}>'.format(
+            __name__, type(self).__name__, self._directives,
+        )
+
+
+# A product of a User-Agent header, e.g., "Firefox/115.0". The version is
+# None if there is none; comments is a tuple of the comments that follow the
+# product, without their parentheses.
+Product = _collections.namedtuple(
+    'Product', ('name', 'version', 'comments'),
+)
+
+
+class UserAgent(object):
+    """A parsed User-Agent header.
+
+    >>> user_agent = parse_user_agent('curl/8.1.2')
+    >>> user_agent.name, user_agent.version
+    ('curl', '8.1.2')
+
+    This only splits the header into products and comments, as RFC 7231
+    defines them; it doesn't guess at which browser or device it is.
+
+    :param value: The header's value, or None if it wasn't sent.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.products = _parse_products(value) if value else ()
+
+    @property
+    def name(self):
+        """The name of the first product, or None."""
+        return self.products[0].name if self.products else None
+
+    @property
+    def version(self):
+        """The version of the first product, or None."""
+        return self.products[0].version if self.products else None
+
+    def __str__(self):
+        return self.value or ''
+
+    def __repr__(self):
+        return '<{}.{} {!r}>'.format(
+            __name__, type(self).__name__, self.value,
+        )
+
+
+def _parse_products(value):
+    products = []
+    position = 0
+    length = len(value)
+    while position < length:
+        character = value[position]
+        if character.isspace():
+            position += 1
+        elif character == '(':
+            comment, position = _parse_comment(value, position)
+            if products:
+                products[-1][2].append(comment)
+        else:
+            end = position
+            while (end < length and not value[end].isspace()
+                   and value[end] != '('):
+                end += 1
+            name, slash, version = value[position:end].partition('/')
+            products.append((name, version if slash else None, []))
+            position = end
+    return tuple(
+        Product(name, version, tuple(comments))
+        for name, version, comments in products
+    )
+
+
+def _parse_comment(value, position):
+    """Parse the (possibly nested) comment starting at value[position].
+
+    :returns:
+        The comment, without its outer parentheses, and the position after
+        it.
+    """
+    depth = 0
+    start = position + 1
+    while position < len(value):
+        character = value[position]
+        if character == '\\':
+            position += 1
+        elif character == '(':
+            depth += 1
+        elif character == ')':
+            depth -= 1
+            if depth == 0:
+                return value[start:position], position + 1
+        position += 1
+    # Unterminated; take the rest.
+    return value[start:], position
+
+
+def _memoized(parse):
+    cache = _cache.LruCache(
+        CACHE_SIZE, maxweight=CACHE_CHARACTERS,
+        weigh=lambda value, parsed: len(value),
+    )
+
+    def memoized(value):
+        if value is None:
+            return parse(None)
+        value = value[:MAX_VALUE_LENGTH]
+        parsed = cache.get(value)
+        if parsed is None:
+            parsed = parse(value)
+            cache.put(value, parsed)
+        return parsed
+
+    memoized.__name__ = parse.__name__
+    memoized.__doc__ = parse.__doc__
+    memoized.cache = cache
+    return memoized
+
+
+def _split(tokens, separator, text):
+    """Split text at the separators outside quoted strings.
+
+    :param tokens: _LIST_TOKEN or _PARAMETER_TOKEN.
+    :returns: The non-empty parts, unstripped.
+    """
+    parts = []
+    part = []
+    for token in tokens.findall(text):
+        if token != separator:
+            part.append(token)
+        elif part:
+            parts.append(''.join(part))
+            part = []
+    if part:
+        parts.append(''.join(part))
+    return parts
+
+
+def _unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return _QUOTED_PAIR.sub(r'\1', value[1:-1])
+    return value
+
+
+def _value_and_parameters(text):
+    """Split "value;name=value;..." into the value and its parameters.
+
+    :returns:
+        The value, lowercased, and a tuple of (name, value) pairs of the
+        parameters, with lowercased names.
+    """
+    parts = _split(_PARAMETER_TOKEN, ';', text)
+    if not parts:
+        return '', ()
+    parameters = []
+    for part in parts[1:]:
+        name, _, parameter_value = part.partition('=')
+        name = name.strip().lower()
+        if name:
+            parameters.append((name, _unquote(parameter_value)))
+    return parts[0].strip().lower(), tuple(parameters)
+
+
+def _quality(text):
+    try:
+        quality = float(text)
+    except ValueError:
+        return 0.0
+    # Also rules out NaN.
+    if not 0.0 <= quality <= 1.0:
+        return 0.0
+    return quality
+
+
+def _accept_parser(kind, header_name):
+    def parse(value):
+        if value is None:
+            return AcceptList((), kind, present=False)
+        items = []
+        for text in _split(_LIST_TOKEN, ',', value):
+            item_value, parameters = _value_and_parameters(text)
+            if not item_value:
+                continue
+            quality = 1.0
+            other_parameters = []
+            for name, parameter_value in parameters:
+                # Parameters after "q" are accept-extensions, which are
+                # ignored.
+                if name == 'q':
+                    quality = _quality(parameter_value)
+                    break
+                other_parameters.append((name, parameter_value))
+            items.append(
+                AcceptItem(item_value, quality, tuple(other_parameters))
+            )
+        return AcceptList(items, kind)
+
+    parse.__name__ = 'parse_' + header_name.lower().replace('-', '_')
+    parse.__doc__ = 'Parse an {} header into an AcceptList.'.format(
+        header_name,
+    )
+    return parse
+
+
+parse_accept = _memoized(_accept_parser('media', 'Accept'))
+parse_accept_encoding = _memoized(
+    _accept_parser('encoding', 'Accept-Encoding'),
+)
+parse_accept_language = _memoized(
+    _accept_parser('language', 'Accept-Language'),
+)
+parse_accept_charset = _memoized(_accept_parser('token', 'Accept-Charset'))
+
+
+def _parse_cache_control(value):
+    """Parse a Cache-Control header into a CacheControl.
+
+    Of a directive given more than once, the first is kept.
+    """
+    directives = {}
+    if value:
+        for text in _split(_LIST_TOKEN, ',', value):
+            name, equals, directive_value = text.partition('=')
+            name = name.strip().lower()
+            if name and name not in directives:
+                directives[name] = (
+                    _unquote(directive_value) if equals else None
+                )
+    return CacheControl(directives)
+
+
+parse_cache_control = _memoized(_parse_cache_control)
+
+
+def _parse_user_agent(value):
+    """Parse a User-Agent header into a UserAgent."""
+    return UserAgent(value)
+
+
+parse_user_agent = _memoized(_parse_user_agent)
+
+
+def _seconds(value):
+    if value is None or not _DIGITS.match(value):
+        return None
+    return int(value)
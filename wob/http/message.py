@@ -1,6 +1,3 @@
-import bisect as _bisect
-import collections as _collections
-
 import six as _6
 
 
@@ -14,58 +11,178 @@ class Headers(object):
     It supports a dict-like interface, but does not inherit from
     ``collections.Mapping`` because it is quirky. (There is no ".values()", for
     example, because I can't imagine any use of it being valid.)
+
+    Looking up, replacing and removing headers by name takes time proportional
+    to the number of headers with that name, not to the number of headers.
+
+    ``copy()`` is copy-on-write: the copy shares its storage with the original
+    until either of them is modified.
     """
-    def __init__(self, headers=()):
-        # a list of (key, value) tuples
-        self._headers = []
-        # map header names to lists of indexes in self._headers where those
-        # headers are; this lets us quickly find a header by name.
-        self._name_to_index = {}
+    __slots__ = ('_names', '_values', '_holes', '_name_to_slots', '_shared')
 
-        self.extend_headers(headers)
+    # Once at least this many removed headers have left holes in the storage,
+    # and they make up at least half of it, the storage is compacted.
+    _MIN_HOLES_TO_COMPACT = 8
+
+    def __init__(self, headers=()):
+        # Parallel lists of the names and values of the headers, in order.
+        # Removing a header leaves a hole (a None name) behind instead of
+        # shifting every header after it; holes are compacted away once there
+        # are enough of them.
+        self._names = []
+        self._values = []
+        self._holes = 0
+        # map lower-cased header names to the slot in the lists above where
+        # that header is, or, if the header appears more than once, to a list
+        # of slots, in order; this lets us quickly find a header by name.
+        self._name_to_slots = {}
+        # True if the storage above may be shared with copies; see copy().
+        self._shared = False
+
+        self._extend_headers(headers)
 
     def add_header(self, name, value):
         """Add a single header to the list of headers."""
-        self._headers.append((name, value))
-        inserted_index = len(self._headers) - 1
+        self._add_header(name, value)
+
+    def _add_header(self, name, value):
+        self._unshare()
+        slot = len(self._names)
+        self._names.append(name)
+        self._values.append(value)
         lower_name = name.lower()
-        if lower_name in self._name_to_index:
-            self._name_to_index[lower_name].append(inserted_index)
+        slots = self._name_to_slots.get(lower_name)
+        if slots is None:
+            self._name_to_slots[lower_name] = slot
+        elif isinstance(slots, list):
+            slots.append(slot)
         else:
-            self._name_to_index[lower_name] = [inserted_index]
+            self._name_to_slots[lower_name] = [slots, slot]
 
     def extend_headers(self, headers):
-        if isinstance(headers, (_collections.Mapping, Headers)):
-            for name, value in _6.iteritems(headers):
-                self.add_header(name, value)
+        self._extend_headers(headers)
+
+    def _extend_headers(self, headers):
+        if isinstance(headers, (_6.moves.collections_abc.Mapping, Headers)):
+            headers = _6.iteritems(headers)
+        for name, value in headers:
+            self._add_header(name, value)
+
+    def set_header(self, name, value):
+        """Set a header, replacing any headers already present by that name.
+
+        The new value takes the place of the first header by that name; if
+        there is no such header, it is added to the end.
+        """
+        self._unshare()
+        slots = self._name_to_slots.get(name.lower())
+        if slots is None:
+            self._add_header(name, value)
+            return
+        if isinstance(slots, list):
+            for slot in slots[:0:-1]:
+                self._remove_slot(slot)
+            slot = slots[0]
         else:
-            for name, value in headers:
-                self.add_header(name, value)
+            slot = slots
+        self._names[slot] = name
+        self._values[slot] = value
+        self._maybe_compact()
+
+    def remove_header(self, name):
+        """Remove every header by the given name, if there are any."""
+        self._unshare()
+        slots = self._name_to_slots.get(name.lower())
+        if slots is None:
+            return
+        if isinstance(slots, list):
+            for slot in slots[::-1]:
+                self._remove_slot(slot)
+        else:
+            self._remove_slot(slots)
+        self._maybe_compact()
 
     def remove_index(self, index):
-        name, _ = self._headers[index]
-        del self._headers[index]
-        new_names_to_indexes = {}
-        for name, indexes in _6.iteritems(self._name_to_index):
-            new_indexes = [
-                idx if idx < index else idx - 1
-                for idx in indexes
-                if idx != index
-            ]
-            new_names_to_indexes[name] = new_indexes
-        self._name_to_index = new_names_to_indexes
+        """Remove the header at the given position in the list of headers.
+
+        Finding a header by its position means skipping over any holes left
+        by earlier removals; prefer remove_header() when you know the name.
+        """
+        self._unshare()
+        self._remove_slot(self._slot_for_index(index))
+        self._maybe_compact()
+
+    def _slot_for_index(self, index):
+        names = self._names
+        index = range(len(names) - self._holes)[index]
+        if not self._holes:
+            return index
+        for slot, name in enumerate(names):
+            if name is not None:
+                if not index:
+                    return slot
+                index -= 1
+
+    def _remove_slot(self, slot):
+        lower_name = self._names[slot].lower()
+        slots = self._name_to_slots[lower_name]
+        if isinstance(slots, list):
+            slots.remove(slot)
+            if len(slots) == 1:
+                self._name_to_slots[lower_name] = slots[0]
+        else:
+            del self._name_to_slots[lower_name]
+        self._names[slot] = None
+        self._values[slot] = None
+        self._holes += 1
+
+    def _maybe_compact(self):
+        holes = self._holes
+        if (holes >= self._MIN_HOLES_TO_COMPACT
+                and holes * 2 >= len(self._names)):
+            self._compact()
+
+    def _compact(self):
+        names = self._names
+        values = self._values
+        self._names = []
+        self._values = []
+        self._holes = 0
+        self._name_to_slots = {}
+        self._shared = False
+        for name, value in _6.moves.zip(names, values):
+            if name is not None:
+                self._add_header(name, value)
+
+    def _unshare(self):
+        """Stop sharing storage with copies, before it is modified."""
+        if self._shared:
+            self._shared = False
+            self._names = list(self._names)
+            self._values = list(self._values)
+            self._name_to_slots = dict(
+                (name, list(slots) if isinstance(slots, list) else slots)
+                for name, slots in _6.iteritems(self._name_to_slots)
+            )
 
     def get_all_headers(self, name):
-        for index in self._name_to_index[name.lower()]:
-            _, value = self._headers[index]
-            yield value
+        slots = self._name_to_slots[name.lower()]
+        if isinstance(slots, list):
+            for slot in slots:
+                yield self._values[slot]
+        else:
+            yield self._values[slots]
 
     def copy(self):
-        if _6.PY2:
-            iter_ = self.iteritems()
-        else:
-            iter_ = self.items()
-        return Headers(iter_)
+        # Skips __init__, and the empty storage it would make, only to be
+        # replaced.
+        new_headers = Headers.__new__(Headers)
+        new_headers._names = self._names
+        new_headers._values = self._values
+        new_headers._holes = self._holes
+        new_headers._name_to_slots = self._name_to_slots
+        new_headers._shared = self._shared = True
+        return new_headers
 
     def __getitem__(self, name):
         if name in self:
@@ -73,28 +190,39 @@ class Headers(object):
         else:
             raise KeyError(name)
 
-    def get(self, name, default):
+    def get(self, name, default=None):
         if name in self:
             return u', '.join(self.get_all_headers(name))
         else:
             return default
 
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self.remove_header(name)
+
     def __contains__(self, name):
-        return name.lower() in self._name_to_index
+        return name.lower() in self._name_to_slots
 
     def __iter__(self):
-        for name, _ in self._headers:
-            yield name
+        for name in self._names:
+            if name is not None:
+                yield name
 
     def __len__(self):
-        return len(self._headers)
+        return len(self._names) - self._holes
+
+    def _iter_items(self):
+        for name, value in _6.moves.zip(self._names, self._values):
+            if name is not None:
+                yield name, value
 
     if _6.PY3:
         def items(self):
-            return iter(self._headers)
+            return self._iter_items()
     else:
         def iteritems(self):
-            return iter(self._headers)
+            return self._iter_items()
 
         def items(self):
             return list(self.iteritems())
@@ -111,32 +239,168 @@ class Headers(object):
         )
 
     def __eq__(self, other):
-        return self._headers == other._headers
+        return list(_6.iteritems(self)) == list(_6.iteritems(other))
 
     def __ne__(self, other):
-        return self._headers != other._headers
+        return not (self == other)
 
 
-def headers_from_wsgi_environment(environ):
-    headers = Headers()
-    for key, value in environ.items():
-        if _6.PY2:
-            key = key.decode('latin1')
+class FrozenHeaders(Headers):
+    """Headers that cannot be modified.
+
+    Since nothing can change them, frozen headers can be shared freely, e.g.
+    between threads, or between every response of a kind. ``copy()`` returns
+    ordinary, modifiable ``Headers``.
+    """
+
+    __slots__ = ()
+
+    def _refuse_modification(self, *args, **kwargs):
+        raise TypeError(
+            'FrozenHeaders cannot be modified; modify a copy() instead.'
+        )
+
+    add_header = _refuse_modification
+    extend_headers = _refuse_modification
+    set_header = _refuse_modification
+    remove_header = _refuse_modification
+    remove_index = _refuse_modification
+    __delitem__ = _refuse_modification
+
+
+class WsgiHeaders(Headers):
+    """A view of the headers in a WSGI environment.
+
+    Nothing is copied out of the environment up front: a header is only
+    looked up, and its name or value decoded, when it is accessed. The first
+    time the view is modified, the headers are copied out of the environment
+    (which is never written to), and the view behaves as ordinary ``Headers``
+    from then on.
+    """
+
+    __slots__ = ('wsgi_environment', '_materialized')
+
+    def __init__(self, wsgi_environment):
+        super(WsgiHeaders, self).__init__()
+        self.wsgi_environment = wsgi_environment
+        self._materialized = False
+
+    def _materialize(self):
+        if not self._materialized:
+            self._materialized = True
+            for name, value in self._iter_environment_items():
+                Headers._add_header(self, name, value)
+
+    def _iter_environment_items(self):
+        for key, value in _6.iteritems(self.wsgi_environment):
+            if _6.PY2:
+                key = key.decode('latin1')
+            if key.startswith(u'HTTP_'):
+                if _6.PY2:
+                    value = value.decode('latin1')
+                yield header_name_from_wsgi_key(key), value
+
+    def _environment_value(self, name):
+        if u'_' in name:
+            # Such a header can't be represented in a WSGI environment.
+            return None
+        value = self.wsgi_environment.get(_wsgi_key_from_header_name(name))
+        if _6.PY2 and value is not None:
             value = value.decode('latin1')
-        if key.startswith(u'HTTP_'):
-            name = key[5:]
-            if not name:
-                raise ValueError('Malformed WSGI key: ' + key)
-            parts = name.split(u'_')
+        return value
 
-            def recap_parts():
-                for part in parts:
-                    yield part[0].upper() + part[1:].lower()
+    def _add_header(self, name, value):
+        self._materialize()
+        super(WsgiHeaders, self)._add_header(name, value)
 
-            name = u'-'.join(recap_parts())
+    def set_header(self, name, value):
+        self._materialize()
+        super(WsgiHeaders, self).set_header(name, value)
 
-            headers.add_header(name, value)
+    def remove_header(self, name):
+        self._materialize()
+        super(WsgiHeaders, self).remove_header(name)
 
+    def remove_index(self, index):
+        self._materialize()
+        super(WsgiHeaders, self).remove_index(index)
+
+    def get_all_headers(self, name):
+        if self._materialized:
+            for value in super(WsgiHeaders, self).get_all_headers(name):
+                yield value
+            return
+
+        value = self._environment_value(name)
+        if value is None:
+            raise KeyError(name.lower())
+        yield value
+
+    def copy(self):
+        if self._materialized:
+            return super(WsgiHeaders, self).copy()
+        return WsgiHeaders(self.wsgi_environment)
+
+    def __contains__(self, name):
+        if self._materialized:
+            return super(WsgiHeaders, self).__contains__(name)
+        return self._environment_value(name) is not None
+
+    def __iter__(self):
+        for name, _ in self._iter_items():
+            yield name
+
+    def __len__(self):
+        if self._materialized:
+            return super(WsgiHeaders, self).__len__()
+        return sum(1 for _ in self._iter_environment_items())
+
+    def _iter_items(self):
+        if self._materialized:
+            return super(WsgiHeaders, self)._iter_items()
+        return self._iter_environment_items()
+
+
+# Memoizes header_name_from_wsgi_key() and _wsgi_key_from_header_name(). The
+# same few header names show up on almost every request; the bound keeps
+# clients that send arbitrary header names from growing these without limit.
+_WSGI_KEY_TO_HEADER_NAME = {}
+_HEADER_NAME_TO_WSGI_KEY = {}
+_MAX_MEMOIZED_HEADER_NAMES = 1024
+
+
+def header_name_from_wsgi_key(key):
+    """Convert a WSGI environment key to the name of the header it holds.
+
+    >>> header_name_from_wsgi_key(u'HTTP_X_FORWARDED_FOR')
+    'X-Forwarded-For'
+    """
+    name = _WSGI_KEY_TO_HEADER_NAME.get(key)
+    if name is not None:
+        return name
+
+    parts = key[5:].split(u'_')
+    if not key.startswith(u'HTTP_') or not all(parts):
+        raise ValueError('Malformed WSGI key: ' + key)
+    name = u'-'.join([part[0].upper() + part[1:].lower() for part in parts])
+    if len(_WSGI_KEY_TO_HEADER_NAME) < _MAX_MEMOIZED_HEADER_NAMES:
+        _WSGI_KEY_TO_HEADER_NAME[key] = name
+    return name
+
+
+def _wsgi_key_from_header_name(name):
+    key = _HEADER_NAME_TO_WSGI_KEY.get(name)
+    if key is None:
+        key = u'HTTP_' + name.upper().replace(u'-', u'_')
+        if len(_HEADER_NAME_TO_WSGI_KEY) < _MAX_MEMOIZED_HEADER_NAMES:
+            _HEADER_NAME_TO_WSGI_KEY[name] = key
+    return key
+
+
+def headers_from_wsgi_environment(environ):
+    headers = Headers()
+    for name, value in WsgiHeaders(environ).items():
+        headers.add_header(name, value)
     return headers
 
 
@@ -146,5 +410,7 @@ class HttpMessage(object):
     Headers and body.
     """
 
+    __slots__ = ('headers',)
+
     def __init__(self, headers):
         self.headers = headers
@@ -1,21 +1,45 @@
 """Representation of a path in a URL."""
 
-import itertools as _itertools
 import re as _re
 
-import six as _six
-
 
 _SLASHES = _re.compile('/+')
 
 
 class Path(object):
-    """A path in a URI."""
+    """A path in a URI.
+
+    A path computes its components and its canonical form at most once; the
+    canonical form of a path is itself canonical, and knows it, so
+    canonicalizing a path that has already been canonicalized is free.
+    """
+
+    __slots__ = ('text', '_components', '_canonical')
 
     def __init__(self, path):
         if not path.startswith('/'):
             raise PathNotAbsolute(path)
         self.text = path
+        # Computed lazily, by the components property and canonicalize().
+        self._components = None
+        self._canonical = None
+
+    @classmethod
+    def from_canonical_components(cls, components):
+        """Build a Path from the components of a canonical path.
+
+        The components must be exactly what the ``components`` property of a
+        canonical path would return (or a slice of them, following the root
+        component); they are not checked.
+
+        >>> Path.from_canonical_components(('', 'a', 'b'))
+        wob.http.path.Path('/a/b')
+        """
+        path = cls.__new__(cls)
+        path.text = '/' + '/'.join(components[1:])
+        path._components = components
+        path._canonical = path
+        return path
 
     def __str__(self):
         return self.text
@@ -27,46 +51,43 @@ class Path(object):
         )
 
     def __eq__(self, other):
-        self_canon = self.canonicalize()
-        other_canon = other.canonicalize()
-        zipped_parts = _six.moves.zip_longest(
-            self_canon.components, other_canon.components,
-        )
-        for self_part, other_part in zipped_parts:
-            if self_part != other_part:
-                return False
-        return True
+        self_components = self.canonicalize().components
+        return self_components == other.canonicalize().components
 
     def __ne__(self, other):
         return not (self == other)
 
+    def __hash__(self):
+        return hash(self.canonicalize().components)
+
     @property
     def components(self):
-        """Returns an iterator over the components of the path.
+        """Returns a tuple of the components of the path.
 
-        The returned iterator returns one string for each component (the parts
+        The returned tuple contains one string for each component (the parts
         between the "/"s) of the path. The root is represented by the special
         string ''.
 
-        >>> list(Path('/a/b/c').components)
-        ['', 'a', 'b', 'c']
-        >>> list(Path('/a/b/c/').components)
-        ['', 'a', 'b', 'c']
-        >>> list(Path('/').components)
-        ['']
+        >>> Path('/a/b/c').components
+        ('', 'a', 'b', 'c')
+        >>> Path('/a/b/c/').components
+        ('', 'a', 'b', 'c')
+        >>> Path('/').components
+        ('',)
 
-        :returns: An iterator over the components of the path.
+        :returns: A tuple of the components of the path.
         """
-        slashes_match = _SLASHES.match(self.text)
-        if slashes_match is not None and slashes_match.end() == len(self.text):
-            # This is a path that represents the root.
-            # e.g, '/', '//', '///', etc.
-            return iter(('',))
-        else:
-            return _itertools.chain(
-                ('',),
-                _SLASHES.split(self.text.strip('/')),
-            )
+        components = self._components
+        if components is None:
+            stripped = self.text.strip('/')
+            if not stripped:
+                # This is a path that represents the root.
+                # e.g, '/', '//', '///', etc.
+                components = ('',)
+            else:
+                components = ('',) + tuple(_SLASHES.split(stripped))
+            self._components = components
+        return components
 
     def canonicalize(self):
         """Canonicalize a path.
@@ -82,13 +103,17 @@ class Path(object):
         * Processes "." as a path component as "this directory". I.e.,
           /foo/./bar and /foo/bar are equivalent.
         """
-        parts = _SLASHES.split(self.text.strip('/'))
-        remaining_parts = []
-        for part in parts:
+        canonical = self._canonical
+        if canonical is not None:
+            return canonical
+
+        components = self.components
+        remaining_parts = ['']
+        for part in components[1:]:
             if part == '.':
                 continue
             elif part == '..':
-                if not remaining_parts:
+                if len(remaining_parts) == 1:
                     raise ValueError(
                         'URL contained a ".." component that could not be'
                         ' applied, because it would traverse higher than "/".'
@@ -97,40 +122,30 @@ class Path(object):
             else:
                 remaining_parts.append(part)
 
-        new_path = '/' + '/'.join(remaining_parts)
-        return Path(new_path)
+        remaining_parts = tuple(remaining_parts)
+        if remaining_parts == components and self.text == (
+                '/' + '/'.join(components[1:])):
+            canonical = self
+        else:
+            canonical = Path.from_canonical_components(remaining_parts)
+        self._canonical = canonical
+        return canonical
 
     def startswith(self, prefix):
-        zipped_paths = _itertools.zip_longest(
-            self.components,
-            prefix.components,
-        )
-        for our_path, prefix in zipped_paths:
-            if prefix is None:
-                return True
-            if our_path != prefix:
-                return False
-        return True
+        prefix_components = prefix.components
+        return self.components[:len(prefix_components)] == prefix_components
 
     def strip_prefix(self, prefix):
         """Strip a prefix from this Path."""
-        zipped_paths = _itertools.zip_longest(
-            self.components,
-            prefix.components,
-        )
-        new_path = []
-        for our_path, prefix_path in zipped_paths:
-            if prefix_path is None:
-                new_path.append(our_path)
-                new_path.extend(our_path for our_path, _ in zipped_paths)
-                break
-
-            if our_path != prefix_path:
-                raise ValueError('{!r} didn\'t start with prefix {!r}'.format(
-                    self, prefix,
-                ))
-
-        return Path('/' + '/'.join(new_path))
+        if not self.startswith(prefix):
+            raise ValueError('{!r} didn\'t start with prefix {!r}'.format(
+                self, prefix,
+            ))
+
+        new_components = ('',) + self.components[len(prefix.components):]
+        if self._canonical is self:
+            return Path.from_canonical_components(new_components)
+        return Path('/' + '/'.join(new_components[1:]))
 
 
 class PathNotAbsolute(ValueError):
@@ -1,46 +1,207 @@
+import copy as _copy
+
+from . import body as _body
+from . import magic_headers as _magic_headers
 from . import message as _message
 from . import path as _path
 
 
+# The default of Request.body_reader()'s max_size; stands for the request's
+# max_body_size.
+_MAX_BODY_SIZE = object()
+
+
 class Request(_message.HttpMessage):
-    def __init__(self, method, application_path, path, headers):
+    """An HTTP request.
+
+    :param body_stream:
+        A file-like object to read the request's body from, or None if the
+        request has no body that can be read; see ``body_reader()``.
+    :param query_string:
+        What follows the "?" of the request target, if anything, undecoded.
+    """
+
+    __slots__ = (
+        'method', 'application_path', 'path', 'query_string', 'body_stream',
+        'max_body_size', 'mount_values', '_parsed_headers',
+    )
+
+    # The default of max_body_size, the most bytes of body that
+    # body_reader() allows by default, or None for no limit. Override it on a
+    # subclass, or set max_body_size on a single request.
+    default_max_body_size = 1024 * 1024
+
+    def __init__(
+            self, method, application_path, path, headers, body_stream=None,
+            query_string=''):
         super(Request, self).__init__(headers)
         self.method = method
         self.application_path = _path.Path(application_path).canonicalize()
         self.path = _path.Path(path).canonicalize()
+        self.query_string = query_string
+        self.body_stream = body_stream
+        self.max_body_size = self.default_max_body_size
+        # Maps header names to (value, parsed value) pairs; see
+        # _parsed_header().
+        self._parsed_headers = {}
 
     def copy(self):
-        return Request(
-            self.method,
-            str(self.application_path),
-            str(self.path),
-            self.headers.copy(),
+        """Copy the request.
+
+        This is cheap: the copy shares the request's paths, which are
+        immutable, its body stream and anything else it was built from (e.g.,
+        a WSGI environment), and its headers, until either request modifies
+        them (see ``Headers.copy()``).
+        """
+        new_request = _copy.copy(self)
+        new_request.headers = self.headers.copy()
+        new_request._parsed_headers = dict(self._parsed_headers)
+        return new_request
+
+    def _parsed_header(self, name, parse):
+        """Parse a header with a ``wob.http.magic_headers`` parser.
+
+        The result is kept on the request, for as long as the header keeps
+        its value; a header that was absent is parsed from None.
+        """
+        value = self.headers.get(name)
+        parsed = self._parsed_headers.get(name)
+        if parsed is None or parsed[0] != value:
+            parsed = self._parsed_headers[name] = (value, parse(value))
+        return parsed[1]
+
+    @property
+    def accept(self):
+        """The Accept header, as a ``magic_headers.AcceptList``."""
+        return self._parsed_header('Accept', _magic_headers.parse_accept)
+
+    @property
+    def accept_encoding(self):
+        """The Accept-Encoding header, as a ``magic_headers.AcceptList``."""
+        return self._parsed_header(
+            'Accept-Encoding', _magic_headers.parse_accept_encoding,
+        )
+
+    @property
+    def accept_language(self):
+        """The Accept-Language header, as a ``magic_headers.AcceptList``."""
+        return self._parsed_header(
+            'Accept-Language', _magic_headers.parse_accept_language,
+        )
+
+    @property
+    def accept_charset(self):
+        """The Accept-Charset header, as a ``magic_headers.AcceptList``."""
+        return self._parsed_header(
+            'Accept-Charset', _magic_headers.parse_accept_charset,
+        )
+
+    @property
+    def cache_control(self):
+        """The Cache-Control header, as a ``magic_headers.CacheControl``."""
+        return self._parsed_header(
+            'Cache-Control', _magic_headers.parse_cache_control,
         )
 
     @property
     def user_agent(self):
-        return _magic_headers.UserAgent(self.headers.get('User-Agent'))
+        """The User-Agent header, as a ``magic_headers.UserAgent``."""
+        return self._parsed_header(
+            'User-Agent', _magic_headers.parse_user_agent,
+        )
+
+    @property
+    def content_length(self):
+        """The length of the body, from the Content-Length header, or None.
+
+        :raises BadRequest: If the header isn't a valid length.
+        """
+        return _body.parse_content_length(self.headers.get('Content-Length'))
+
+    def body_reader(
+            self, max_size=_MAX_BODY_SIZE, timeout=None,
+            chunk_size=_body.DEFAULT_CHUNK_SIZE, require_length=False):
+        """Get a ``wob.http.body.BodyReader`` for the request's body.
+
+        :param max_size:
+            The most bytes the body may have; ``max_body_size`` by default.
+            Pass None for no limit.
+
+        The other parameters are passed to the BodyReader.
+
+        :raises TypeError:
+            If the body can't be read synchronously; e.g., that of a
+            ``wob.http.asgi.AsgiRequest``.
+        """
+        if max_size is _MAX_BODY_SIZE:
+            max_size = self.max_body_size
+        return _body.BodyReader(
+            self.body_stream, self.content_length, max_size=max_size,
+            timeout=timeout, chunk_size=chunk_size,
+            require_length=require_length,
+        )
+
+    def iter_body(self, **kwargs):
+        """Iterate over the body in chunks; see ``BodyReader.iter_chunks()``.
+
+        The keyword arguments are passed to ``body_reader()``.
+        """
+        return self.body_reader(**kwargs).iter_chunks()
+
+    def read_body(self, **kwargs):
+        """Read the whole body into a bytearray; see ``BodyReader.read()``.
+
+        The keyword arguments are passed to ``body_reader()``.
+        """
+        return self.body_reader(**kwargs).read()
 
     def sub_request_for_application(self, app_root):
+        """Get a copy of the request for an application mounted at a prefix.
+
+        :param app_root:
+            The ``Path`` of the prefix, which the request's path must start
+            with; it is moved from the path to the end of the application
+            path.
+        """
         new_path = self.path.strip_prefix(app_root)
         new_request = self.copy()
         new_request.path = new_path
-        new_request.application_path = app_root
+        new_request.application_path = _path.Path.from_canonical_components(
+            self.application_path.components
+            + app_root.canonicalize().components[1:]
+        )
         return new_request
 
 
 class WsgiRequest(Request):
+    __slots__ = ('wsgi_environment',)
+
     def __init__(self, wsgi_environment):
-        headers = _message.headers_from_wsgi_environment(wsgi_environment)
+        headers = _message.WsgiHeaders(wsgi_environment)
         method = wsgi_environment['REQUEST_METHOD']
         application_path = wsgi_environment['SCRIPT_NAME'] or '/'
         path = wsgi_environment['PATH_INFO']
+        # Reading wsgi.input past the Content-Length may block forever, unless
+        # the server says that the stream ends with the body.
+        body_stream = wsgi_environment.get('wsgi.input')
+        if (not wsgi_environment.get('CONTENT_LENGTH')
+                and not wsgi_environment.get('wsgi.input_terminated')):
+            body_stream = None
 
         super(WsgiRequest, self).__init__(
-            method, application_path, path, headers,
+            method, application_path, path, headers, body_stream,
+            wsgi_environment.get('QUERY_STRING', ''),
         )
         self.wsgi_environment = wsgi_environment
 
+    @property
+    def content_length(self):
+        # The WSGI environment holds it under CONTENT_LENGTH, not under an
+        # HTTP_ key.
+        return _body.parse_content_length(
+            self.wsgi_environment.get('CONTENT_LENGTH')
+        )
+
 
 def request_from_wsgi(environment):
     return WsgiRequest(environment)
@@ -1,25 +1,145 @@
+import mmap as _mmap
+import os as _os
+import stat as _stat
+
 import six as _6
 
 from . import message as _message
 
 
 class Response(_message.HttpMessage):
-    def __init__(self, status_code, reason_phrase, headers, body):
+    """An HTTP response.
+
+    The body may be any of:
+
+    * ``bytes``, sent as is;
+    * a ``bytearray``, ``memoryview`` or ``mmap``, sent in slices of
+      ``chunk_size`` bytes without copying the whole thing;
+    * a file object opened in binary mode, which is read ``chunk_size``
+      bytes at a time (or handed to the server's ``wsgi.file_wrapper``, so
+      that it can use ``sendfile()``);
+    * any other iterable of bytes, such as a generator, which is streamed.
+
+    A Content-Length header is added when sending the response if the size of
+    the body is known and the header isn't already present.
+
+    ``close()`` releases the body's resources (e.g., closes a file); it is
+    called once the response has been sent.
+    """
+
+    __slots__ = ('status_code', 'reason_phrase', 'body', 'chunk_size')
+
+    # The default of chunk_size, the most a body that isn't bytes is sliced or
+    # read at a time.
+    default_chunk_size = 64 * 1024
+
+    def __init__(
+            self, status_code, reason_phrase, headers, body, chunk_size=None):
         super(Response, self).__init__(headers)
         self.status_code = status_code
         self.reason_phrase = reason_phrase
-        self.headers = headers
         self.body = body
+        if chunk_size is None:
+            chunk_size = self.default_chunk_size
+        self.chunk_size = chunk_size
 
-    def return_from_wsgi_app(self, start_response):
-        start_response(
-            '{} {}'.format(self.status_code, self.reason_phrase),
-            list(_6.iteritems(self.headers)),
-        )
-        if isinstance(self.body, bytes):
-            return (self.body,)
+    @property
+    def status_line(self):
+        """The status line to send, e.g., "404 Not Found"."""
+        status_code = self.status_code
+        if STATUS_TO_REASON_PHRASE.get(status_code) == self.reason_phrase:
+            return STATUS_LINES[status_code]
+        return '{} {}'.format(status_code, self.reason_phrase)
+
+    @property
+    def content_length(self):
+        """The length of the body, in bytes, or None if it isn't known."""
+        body = self.body
+        if isinstance(body, (bytes, bytearray, _mmap.mmap)):
+            return len(body)
+        elif isinstance(body, memoryview):
+            return body.nbytes
+        elif _is_file(body):
+            return _remaining_file_size(body)
+        else:
+            return None
+
+    def header_list(self):
+        """Return the headers to send, as a list of (name, value) pairs.
+
+        This includes a computed Content-Length header, if one is needed
+        (responses whose status means that they have no body don't get one).
+        """
+        headers = list(_6.iteritems(self.headers))
+        if ('Content-Length' not in self.headers
+                and not status_has_no_body(self.status_code)):
+            content_length = self.content_length
+            if content_length is not None:
+                headers.append(('Content-Length', str(content_length)))
+        return headers
+
+    def iter_body(self):
+        """Iterate over the body in chunks of bytes-like objects.
+
+        Chunks of a ``bytearray``, ``memoryview`` or ``mmap`` body are
+        ``memoryview`` slices of it.
+        """
+        body = self.body
+        chunk_size = self.chunk_size
+        if isinstance(body, bytes):
+            if body:
+                yield body
+        elif isinstance(body, (bytearray, memoryview, _mmap.mmap)):
+            view = memoryview(body)
+            if view.ndim != 1 or view.itemsize != 1:
+                view = view.cast('B')
+            for offset in _6.moves.range(0, len(view), chunk_size):
+                yield view[offset:offset + chunk_size]
+        elif _is_file(body):
+            while True:
+                chunk = body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
         else:
-            return self.body
+            for chunk in body:
+                yield chunk
+
+    def close(self):
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+
+    def return_from_wsgi_app(self, start_response, wsgi_environment=None):
+        """Send this response from a WSGI application.
+
+        :param wsgi_environment:
+            The request's WSGI environment; if given, a file body is sent
+            through the server's ``wsgi.file_wrapper``, if it has one.
+        """
+        start_response(self.status_line, self.header_list())
+        body = self.body
+        if isinstance(body, bytes):
+            return (body,)
+        if (wsgi_environment is not None
+                and 'wsgi.file_wrapper' in wsgi_environment
+                and _is_file(body)):
+            return wsgi_environment['wsgi.file_wrapper'](body, self.chunk_size)
+        return _WsgiBody(self)
+
+    def copy(self):
+        """Return a copy of this response, with a modifiable copy of its
+        headers. The body is shared."""
+        return Response(
+            self.status_code, self.reason_phrase, self.headers.copy(),
+            self.body, chunk_size=self.chunk_size,
+        )
+
+    def freeze(self):
+        """Return a FrozenResponse with the same contents as this one."""
+        return FrozenResponse(
+            self.status_code, self.reason_phrase, self.headers, self.body,
+        )
 
     def __repr__(self):
         return '<{}.{} object at 0x{:x} containing a {} {} response>'.format(
@@ -28,6 +148,98 @@ class Response(_message.HttpMessage):
         )
 
 
+class FrozenResponse(Response):
+    """A response that cannot be modified, with a bytes body.
+
+    Everything needed to send it, down to the status line and header list, is
+    computed once, up front, so a frozen response can be built once and sent
+    any number of times, from any thread. ``copy()`` returns an ordinary,
+    modifiable ``Response``.
+    """
+
+    # status_line is computed in __init__; the slot takes the place of
+    # Response's property.
+    __slots__ = ('status_line', '_header_list', '_wsgi_body', '_frozen')
+
+    def __init__(self, status_code, reason_phrase, headers, body):
+        if not isinstance(body, bytes):
+            raise TypeError('The body of a FrozenResponse must be bytes.')
+        super(FrozenResponse, self).__init__(
+            status_code, reason_phrase, _message.FrozenHeaders(headers), body,
+        )
+        set_attribute = super(FrozenResponse, self).__setattr__
+        set_attribute('status_line', Response.status_line.fget(self))
+        set_attribute('_header_list', tuple(Response.header_list(self)))
+        set_attribute('_wsgi_body', (body,))
+        set_attribute('_frozen', True)
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(
+                'FrozenResponse cannot be modified; modify a copy() instead.'
+            )
+        super(FrozenResponse, self).__setattr__(name, value)
+
+    def header_list(self):
+        return list(self._header_list)
+
+    def return_from_wsgi_app(self, start_response, wsgi_environment=None):
+        start_response(self.status_line, list(self._header_list))
+        return self._wsgi_body
+
+    def freeze(self):
+        return self
+
+    def __reduce__(self):
+        # Restoring the slots one by one would trip __setattr__.
+        return FrozenResponse, (
+            self.status_code, self.reason_phrase, self.headers, self.body,
+        )
+
+
+class _WsgiBody(object):
+    """The iterable returned to a WSGI server for a Response's body.
+
+    WSGI servers want bytes, so this copies each memoryview chunk (but only a
+    chunk at a time), and it closes the response when the server closes it.
+    """
+
+    __slots__ = ('response',)
+
+    def __init__(self, response):
+        self.response = response
+
+    def __iter__(self):
+        for chunk in self.response.iter_body():
+            if not isinstance(chunk, bytes):
+                chunk = bytes(chunk)
+            yield chunk
+
+    def close(self):
+        self.response.close()
+
+
+def status_has_no_body(status_code):
+    """Whether responses with a status code never have a body (RFC 7230,
+    section 3.3)."""
+    return status_code < 200 or status_code in (204, 304)
+
+
+def _is_file(body):
+    return hasattr(body, 'read') and not isinstance(body, _mmap.mmap)
+
+
+def _remaining_file_size(file_):
+    try:
+        stat = _os.fstat(file_.fileno())
+        if not _stat.S_ISREG(stat.st_mode):
+            return None
+        return max(stat.st_size - file_.tell(), 0)
+    except (AttributeError, EnvironmentError, ValueError):
+        # The file has no descriptor (e.g., BytesIO), or isn't seekable.
+        return None
+
+
 def new_response(
         content, mimetype, status_code=200, reason_phrase=None, headers=None):
 
@@ -72,6 +284,7 @@ STATUS_TO_REASON_PHRASE = {
     301: 'Moved Permanently',
     302: 'Found',
     303: 'See Other',
+    304: 'Not Modified',
     305: 'Use Proxy',
     # 306: '(Unused)',
     307: 'Temporary Redirect',
@@ -97,6 +310,7 @@ STATUS_TO_REASON_PHRASE = {
     416: 'Range Not Satisfiable',
     417: 'Expectation Failed',
     426: 'Upgrade Required',
+    431: 'Request Header Fields Too Large',
     500: 'Internal Server Error',
     501: 'Not Implemented',
     502: 'Bad Gateway',
@@ -104,3 +318,10 @@ STATUS_TO_REASON_PHRASE = {
     504: 'Gateway Timeout',
     505: 'HTTP Version Not Supported',
 }
+
+
+# The status line for each of the status codes above, ready to send.
+STATUS_LINES = dict(
+    (status_code, '{} {}'.format(status_code, reason_phrase))
+    for status_code, reason_phrase in _6.iteritems(STATUS_TO_REASON_PHRASE)
+)
@@ -0,0 +1,33 @@
+"""Dispatching requests to endpoints.
+
+Importing the package imports none of its modules; each is imported the
+first time it's used, either with an import statement, or (on Python 3.7 and
+later) as an attribute of the package, e.g., ``wob.routing.router``.
+"""
+
+import importlib as _importlib
+
+
+_SUBMODULES = frozenset((
+    'asgi',
+    'compiled',
+    'metrics',
+    'offload',
+    'path',
+    'response_cache',
+    'router',
+    'tree',
+    'wsgi',
+))
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return _importlib.import_module('.' + name, __name__)
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,32 @@
+"""Helpers for Routers with asynchronous endpoints.
+
+This module requires Python 3.5 or later.
+"""
+
+from ..http import errors as _errors
+
+
+async def filter_awaited_response(router, request, awaitable):
+    """Await an endpoint's response, then apply the router's filters."""
+    response = await awaitable
+    return router.filter_response(request, response)
+
+
+async def measure_awaited_response(awaitable, route_stats, start, timer):
+    """Await an endpoint's response, recording it in a ``RouteStats``.
+
+    The endpoint time covers the time until the response is done, not until
+    the endpoint returned the awaitable.
+
+    :param start: When the endpoint was called, by ``timer()``.
+    """
+    try:
+        return await awaitable
+    except _errors.HttpError as error:
+        route_stats.errors[error.status_code] += 1
+        raise
+    except Exception:
+        route_stats.errors[500] += 1
+        raise
+    finally:
+        route_stats.endpoint_seconds.observe(timer() - start)
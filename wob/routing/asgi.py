@@ -0,0 +1,56 @@
+"""An ASGI application that dispatches requests through a Router.
+
+Endpoints may be ordinary functions or coroutine functions; whatever an
+endpoint returns is awaited if it is awaitable. This lets I/O-bound endpoints
+wait on upstream calls without holding a thread each.
+
+This module requires Python 3.5 or later.
+"""
+
+import inspect as _inspect
+
+from ..http import asgi as _asgi
+from ..http import errors as _errors
+
+
+class AsgiApplication(object):
+    """Serve a Router as an ASGI application.
+
+    :param router: The ``Router`` to dispatch requests with.
+    """
+
+    def __init__(self, router):
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope['type']
+        if scope_type == 'http':
+            await self._handle_http(scope, receive, send)
+        elif scope_type == 'lifespan':
+            await _handle_lifespan(receive, send)
+        else:
+            raise ValueError(
+                'Unsupported ASGI scope type {!r}.'.format(scope_type)
+            )
+
+    async def _handle_http(self, scope, receive, send):
+        request = _asgi.request_from_asgi(scope, receive)
+        try:
+            response = self.router.route_request(request)
+            if _inspect.isawaitable(response):
+                response = await response
+        except _errors.HttpError as error:
+            response = _errors.to_simple_text_response(error)
+        await _asgi.send_response(response, send)
+
+
+async def _handle_lifespan(receive, send):
+    # There is nothing to set up or tear down; acknowledge the events so that
+    # servers that send them don't wait on us.
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,186 @@
+"""Saving compiled route tables, to load instead of building them again.
+
+Building a table of thousands of routes means parsing thousands of path
+rules, and compiling them into a dispatch tree, in every process that serves
+them. ``compiled_router()`` does that once, saves the result to a file, and
+loads it from there from then on, for as long as the sources it was built
+from don't change::
+
+    def build_router():
+        router = Router()
+        router.add_route(path_rule('/users/<user_id:int>'), {'GET': user})
+        # ...
+        return router
+
+    router = compiled_router(
+        build_router, '/var/cache/myapp/routes.pickle', [__file__],
+    )
+
+The table is pickled, so its endpoints must be picklable: functions (or
+other objects) defined at the top level of a module, which must be defined
+by the time the table is loaded. Tables with mounted routers, or with
+offloaded endpoints, can't be saved; ``compiled_router()`` just builds them
+every time.
+
+Loading a table unpickles it, which may run arbitrary code; only load files
+that nobody else can write to.
+"""
+
+import hashlib as _hashlib
+import logging as _logging
+import os as _os
+import pickle as _pickle
+import sys as _sys
+import tempfile as _tempfile
+
+import six as _6
+
+from . import path as _rpath
+from . import router as _router
+from . import tree as _tree
+
+
+_logger = _logging.getLogger(__name__)
+
+# Bumped whenever what's saved changes shape.
+_FORMAT_VERSION = 1
+
+# Objects compared by identity, which pickling would copy; they're saved by
+# name instead.
+_SENTINELS = {
+    'REMAINING_COMPONENTS': _rpath.REMAINING_COMPONENTS,
+    'ANY_METHOD': _router.ANY_METHOD,
+}
+
+
+def source_hash(paths):
+    """Hash the files a route table is built from.
+
+    The hash also covers the version of Python, and the modules of this
+    package that define what's saved, so that a table saved by one version
+    isn't loaded by another.
+
+    :param paths: The paths of the files, e.g., ``[__file__]``.
+    :returns: The hash, as a string of hex digits.
+    """
+    hash_ = _hashlib.sha256()
+    hash_.update('{} {}'.format(_FORMAT_VERSION, _sys.version).encode('utf-8'))
+    for path in [_rpath.__file__, _tree.__file__] + list(paths):
+        with open(_source_path(path), 'rb') as file_:
+            hash_.update(file_.read())
+    return hash_.hexdigest()
+
+
+def save_table(router, path, key):
+    """Compile a router's table, and save it to a file.
+
+    The file is replaced atomically, so processes loading it at the same
+    time see either the old table or the new one.
+
+    :param key:
+        What ``load_table()`` must be given to load it back; e.g., a
+        ``source_hash()``.
+    :raises: Whatever pickling the table raises, if it can't be.
+    """
+    # One snapshot of the table, so that the tree and the names agree.
+    table = router.table
+    tree = table.compile()
+    directory = _os.path.dirname(_os.path.abspath(path))
+    descriptor, temporary_path = _tempfile.mkstemp(dir=directory)
+    try:
+        with _os.fdopen(descriptor, 'wb') as file_:
+            pickler = _Pickler(file_, _pickle.HIGHEST_PROTOCOL)
+            # The key comes first, so that a stale table is rejected without
+            # unpickling it.
+            pickler.dump((_FORMAT_VERSION, key))
+            pickler.dump((tree, table.route_names))
+        _replace(temporary_path, path)
+    except BaseException:
+        _os.remove(temporary_path)
+        raise
+
+
+def load_table(router, path, key):
+    """Load a table saved by ``save_table()`` into a router.
+
+    :returns:
+        True if it was loaded; False if there's no table saved with this key
+        (or it can't be loaded), and the router is unchanged.
+    """
+    try:
+        with open(path, 'rb') as file_:
+            unpickler = _Unpickler(file_)
+            if unpickler.load() != (_FORMAT_VERSION, key):
+                return False
+            tree, route_names = unpickler.load()
+    except (IOError, OSError):
+        return False
+    except Exception:
+        _logger.warning(
+            'Could not load the route table in %s.', path, exc_info=True,
+        )
+        return False
+    router.load_compiled(tree, route_names)
+    return True
+
+
+def compiled_router(build_router, path, sources):
+    """Load a router's table from a file, or build it and save it there.
+
+    :param build_router:
+        A function, called with no arguments, that returns a ``Router`` with
+        the table; it's only called if there's no saved table to load.
+    :param path: The file to save the table in.
+    :param sources:
+        The paths of the files the table is built from; if any of them
+        change, the table is built again. See ``source_hash()``.
+    :returns:
+        The router with the table: a new ``Router()``, if the table was
+        loaded. (Use ``load_table()`` and ``save_table()`` for a router with
+        other options.)
+    """
+    key = source_hash(sources)
+    router = _router.Router()
+    if load_table(router, path, key):
+        return router
+
+    router = build_router()
+    try:
+        save_table(router, path, key)
+    except Exception:
+        _logger.warning(
+            'Could not save the route table in %s.', path, exc_info=True,
+        )
+    return router
+
+
+class _Pickler(_pickle.Pickler):
+    def persistent_id(self, obj):
+        for name, sentinel in _6.iteritems(_SENTINELS):
+            if obj is sentinel:
+                return name
+        return None
+
+
+class _Unpickler(_pickle.Unpickler):
+    def persistent_load(self, persistent_id):
+        try:
+            return _SENTINELS[persistent_id]
+        except KeyError:
+            raise _pickle.UnpicklingError(
+                'Unknown persistent id {!r}.'.format(persistent_id)
+            )
+
+
+def _source_path(path):
+    # Python 2 sets __file__ to the compiled file, if there is one.
+    if path.endswith(('.pyc', '.pyo')) and _os.path.exists(path[:-1]):
+        return path[:-1]
+    return path
+
+
+def _replace(source, destination):
+    if hasattr(_os, 'replace'):
+        _os.replace(source, destination)
+    else:
+        _os.rename(source, destination)
@@ -0,0 +1,308 @@
+"""Per-route request metrics for a Router.
+
+Pass a ``RouteMetrics`` to ``Router(metrics=...)`` and the router records,
+for each route and method:
+
+* the number of requests dispatched,
+* the number of ``HttpError``s raised, by status code,
+* a histogram of the time spent matching the request to the route, and
+* a histogram of the time spent in the endpoint.
+
+Each thread records into its own counters, so recording takes no locks;
+``snapshot()`` adds up every thread's counters. When a thread exits, its
+counters are folded into a shared total, so short-lived threads don't pile
+up. Methods outside ``KNOWN_METHODS`` are all counted as ``OTHER_METHOD``,
+so clients can't grow the metrics by sending made-up methods.
+
+``prometheus_endpoint`` serves the metrics in the Prometheus text format, and
+can be mounted like any endpoint::
+
+    metrics = RouteMetrics()
+    router = Router(metrics=metrics)
+    router.add_route(
+        path_rule('/metrics'), {'GET': metrics.prometheus_endpoint},
+    )
+
+For asynchronous endpoints, the endpoint time runs until the endpoint's
+coroutine finishes; that part requires Python 3.
+"""
+
+import bisect as _bisect
+import collections as _collections
+import threading as _threading
+import timeit as _timeit
+import weakref as _weakref
+
+import six as _6
+
+from ..http import errors as _errors
+from ..http import response as _response
+
+
+# The upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# The route label used for requests that matched no route.
+UNMATCHED_ROUTE = '<unmatched>'
+
+# The methods recorded under their own name; the rest are OTHER_METHOD.
+KNOWN_METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'CONNECT', 'OPTIONS', 'TRACE',
+    'PATCH',
+))
+OTHER_METHOD = 'OTHER'
+
+_timer = _timeit.default_timer
+
+
+class Histogram(object):
+    """Counts of observed values, by bucket.
+
+    ``counts[i]`` is the number of values no greater than ``buckets[i]`` (and
+    greater than ``buckets[i - 1]``); the last count is of the values greater
+    than every bucket. Counts are not cumulative.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[_bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+
+
+class RouteStats(object):
+    """The metrics recorded for a single route and method."""
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = _collections.Counter()
+        self.match_seconds = Histogram(buckets)
+        self.endpoint_seconds = Histogram(buckets)
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.errors.update(other.errors)
+        self.match_seconds.merge(other.match_seconds)
+        self.endpoint_seconds.merge(other.endpoint_seconds)
+
+
+def _merge_stats(totals, stats, buckets):
+    """Add the RouteStats in ``stats`` into those in ``totals``."""
+    for key, route_stats in list(stats.items()):
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = RouteStats(buckets)
+        total.merge(route_stats)
+
+
+class _ThreadStats(object):
+    """Holds a thread's stats in its thread-local storage.
+
+    It goes away with the thread, which is how RouteMetrics notices that
+    the thread has exited.
+    """
+
+    __slots__ = ('stats', '__weakref__')
+
+    def __init__(self):
+        self.stats = {}
+
+
+class RouteMetrics(object):
+    """Collects per-route metrics for a Router.
+
+    :param buckets:
+        The upper bounds, in seconds and in ascending order, of the latency
+        histograms' buckets.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = _threading.local()
+        # Each live thread's stats dict, keyed by a weak reference to its
+        # _ThreadStats; see _thread_stats().
+        self._live_thread_stats = {}
+        # The stats of the threads that have exited, added up.
+        self._exited_thread_stats = {}
+        self._lock = _threading.Lock()
+
+    def _thread_stats(self):
+        """The calling thread's stats, mapping (route, method) to RouteStats.
+
+        Only the calling thread ever writes to it.
+        """
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = self._local.holder = _ThreadStats()
+            holder_ref = _weakref.ref(holder, self._thread_exited)
+            with self._lock:
+                self._live_thread_stats[holder_ref] = holder.stats
+        return holder.stats
+
+    def _thread_exited(self, holder_ref):
+        """Fold the stats of a thread that has exited into the total."""
+        with self._lock:
+            stats = self._live_thread_stats.pop(holder_ref, None)
+            if stats:
+                _merge_stats(self._exited_thread_stats, stats, self.buckets)
+
+    def _route_stats(self, route, method):
+        stats = self._thread_stats()
+        key = (route, method)
+        route_stats = stats.get(key)
+        if route_stats is None:
+            route_stats = stats[key] = RouteStats(self.buckets)
+        return route_stats
+
+    def route_request(self, router, request):
+        """Route a request through ``router``, recording its metrics."""
+        start = _timer()
+        match_result = router.match_request(request)
+        matched = _timer()
+
+        path_rule = getattr(match_result, 'path_rule', None)
+        method = request.method
+        if method not in KNOWN_METHODS:
+            method = OTHER_METHOD
+        route_stats = self._route_stats(path_rule, method)
+        route_stats.requests += 1
+        route_stats.match_seconds.observe(matched - start)
+
+        try:
+            endpoint, match = router.endpoint_for_match(match_result)
+            result = endpoint(request, **match)
+        except _errors.HttpError as error:
+            route_stats.errors[error.status_code] += 1
+            route_stats.endpoint_seconds.observe(_timer() - matched)
+            raise
+        except Exception:
+            route_stats.errors[500] += 1
+            route_stats.endpoint_seconds.observe(_timer() - matched)
+            raise
+
+        if hasattr(result, '__await__'):
+            # Only Python 3 has awaitables, and the module handling them.
+            from . import _async
+            return _async.measure_awaited_response(
+                result, route_stats, matched, _timer,
+            )
+        route_stats.endpoint_seconds.observe(_timer() - matched)
+        return result
+
+    def snapshot(self):
+        """Add up the metrics recorded by every thread.
+
+        :returns:
+            A dict mapping ``(route, method)`` pairs to ``RouteStats``. The
+            route is the ``PathRule`` matched, or ``None`` for requests that
+            matched no route.
+        """
+        totals = {}
+        with self._lock:
+            live_thread_stats = list(self._live_thread_stats.values())
+            _merge_stats(totals, self._exited_thread_stats, self.buckets)
+
+        for thread_stats in live_thread_stats:
+            _merge_stats(totals, thread_stats, self.buckets)
+        return totals
+
+    def prometheus_text(self):
+        """Render a snapshot of the metrics in the Prometheus text format."""
+        rows = sorted(
+            (
+                (_route_label(route), method, route_stats)
+                for (route, method), route_stats
+                in _6.iteritems(self.snapshot())
+            ),
+            key=lambda row: row[:2],
+        )
+        lines = [
+            '# HELP wob_route_requests_total Requests dispatched, by route.',
+            '# TYPE wob_route_requests_total counter',
+        ]
+        for route, method, route_stats in rows:
+            lines.append('wob_route_requests_total{{{}}} {}'.format(
+                _labels(route=route, method=method), route_stats.requests,
+            ))
+
+        lines.extend((
+            '# HELP wob_route_errors_total HTTP errors raised, by route and'
+            ' status.',
+            '# TYPE wob_route_errors_total counter',
+        ))
+        for route, method, route_stats in rows:
+            for status, count in sorted(route_stats.errors.items()):
+                lines.append('wob_route_errors_total{{{}}} {}'.format(
+                    _labels(route=route, method=method, status=status), count,
+                ))
+
+        for name, attribute, description in (
+                ('wob_route_match_seconds', 'match_seconds',
+                 'Time spent matching requests to routes.'),
+                ('wob_route_endpoint_seconds', 'endpoint_seconds',
+                 'Time spent in endpoints.')):
+            lines.append('# HELP {} {}'.format(name, description))
+            lines.append('# TYPE {} histogram'.format(name))
+            for route, method, route_stats in rows:
+                lines.extend(_histogram_lines(
+                    name, getattr(route_stats, attribute),
+                    route=route, method=method,
+                ))
+
+        return '\n'.join(lines) + '\n'
+
+    def prometheus_endpoint(self, request, **kwargs):
+        """An endpoint serving prometheus_text()."""
+        return _response.text_response(
+            _6.text_type(self.prometheus_text()),
+            mimetype='text/plain; version=0.0.4',
+        )
+
+
+def _route_label(route):
+    if route is None:
+        return UNMATCHED_ROUTE
+    return str(route)
+
+
+def _histogram_lines(name, histogram, **labels):
+    cumulative = 0
+    bounds = [repr(bound) for bound in histogram.buckets] + ['+Inf']
+    for bound, count in _6.moves.zip(bounds, histogram.counts):
+        cumulative += count
+        yield '{}_bucket{{{}}} {}'.format(
+            name, _labels(le=bound, **labels), cumulative,
+        )
+    yield '{}_sum{{{}}} {!r}'.format(name, _labels(**labels), histogram.total)
+    yield '{}_count{{{}}} {}'.format(name, _labels(**labels), cumulative)
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(name, _escape_label_value(value))
+        for name, value in sorted(labels.items())
+    )
+
+
+def _escape_label_value(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
@@ -0,0 +1,185 @@
+"""Running CPU-bound endpoints in a pool of processes.
+
+An endpoint that holds the GIL for a long time (rendering a report, making a
+thumbnail) stalls every other request its process is serving. Routes added
+with ``cpu_bound=True`` to a router with an ``OffloadPool`` have their
+endpoints called in the pool's processes instead::
+
+    router = Router(offload_pool=OffloadPool(processes=4, timeout=10))
+    router.add_route(
+        path_rule('/reports/<report_id:int>'), {'GET': render_report},
+        cpu_bound=True,
+    )
+
+The endpoint is called with a snapshot of the request (see
+``snapshot_request()``) and the values matched from the path, and its
+response is sent back; so the endpoint, the matched values and the response
+(including its body, which must be bytes) must all be picklable. That means
+that the endpoint must be a function defined at the top level of a module.
+
+``HttpError``s raised by the endpoint are raised again by the caller; other
+exceptions are raised as ``OffloadError``s, carrying the traceback from the
+pool's process.
+"""
+
+import multiprocessing as _multiprocessing
+import os as _os
+import pickle as _pickle
+import threading as _threading
+import traceback as _traceback
+
+import six as _6
+
+from ..http import errors as _errors
+from ..http import message as _message
+from ..http import request as _request
+
+
+class OffloadError(Exception):
+    """An offloaded endpoint raised an exception other than an HttpError.
+
+    ``args[0]`` is the formatted traceback, from the pool's process.
+    """
+
+
+class OffloadPool(object):
+    """A pool of processes to call CPU-bound endpoints in.
+
+    The processes are started on first use, in the process using the pool;
+    so a pool created before forking (e.g., by a pre-forking server) gives
+    each forked process a pool of its own.
+
+    :param processes: The number of processes; by default, one per CPU.
+    :param timeout:
+        How many seconds to wait for an endpoint's response before giving up
+        with ``GatewayTimeout``; None to wait forever. The endpoint isn't
+        stopped, and keeps its process (and its place among ``max_pending``)
+        until it returns.
+    :param max_pending:
+        The most calls that may be waiting for, or running in, the pool at
+        once; calls beyond that fail right away with ``ServiceUnavailable``.
+        By default, twice the number of processes.
+    """
+
+    def __init__(self, processes=None, timeout=30.0, max_pending=None):
+        if processes is None:
+            processes = _multiprocessing.cpu_count()
+        if max_pending is None:
+            max_pending = 2 * processes
+        self.processes = processes
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = _threading.Lock()
+
+    def offloaded(self, endpoint):
+        """Wrap an endpoint, to call it in the pool."""
+        return _OffloadedEndpoint(self, endpoint)
+
+    def call(self, endpoint, request, match):
+        """Call ``endpoint(snapshot_request(request), **match)`` in the pool.
+
+        :returns: The endpoint's response.
+        :raises ServiceUnavailable: If ``max_pending`` calls are pending.
+        :raises GatewayTimeout: If the endpoint took longer than ``timeout``.
+        :raises OffloadError:
+            If the endpoint raised something other than an HttpError.
+        """
+        snapshot = snapshot_request(request)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise _errors.ServiceUnavailable()
+            pool = self._get_pool()
+            self.pending += 1
+        try:
+            kwargs = {'callback': self._finished}
+            if _6.PY3:
+                # The pool's own failures, e.g., to pickle the response.
+                kwargs['error_callback'] = self._finished
+            async_result = pool.apply_async(
+                _call_endpoint, (endpoint, snapshot, match), **kwargs
+            )
+        except BaseException:
+            self._finished(None)
+            raise
+
+        try:
+            response, error = async_result.get(self.timeout)
+        except _multiprocessing.TimeoutError:
+            raise _errors.GatewayTimeout()
+        if error is not None:
+            raise error
+        return response
+
+    def close(self):
+        """Stop the pool's processes, abandoning any pending calls."""
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    def _get_pool(self):
+        # Called with the lock held.
+        pid = _os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            # A pool inherited across a fork belongs to the parent.
+            self._pool = _multiprocessing.Pool(self.processes)
+            self._pool_pid = pid
+            self.pending = 0
+        return self._pool
+
+    def _finished(self, result):
+        with self._lock:
+            self.pending -= 1
+
+
+class _OffloadedEndpoint(object):
+    """An endpoint wrapped by ``OffloadPool.offloaded()``."""
+
+    def __init__(self, offload_pool, endpoint):
+        self.offload_pool = offload_pool
+        self.endpoint = endpoint
+
+    def __call__(self, request, **match):
+        return self.offload_pool.call(self.endpoint, request, match)
+
+
+def snapshot_request(request):
+    """Copy what an offloaded endpoint gets of a request.
+
+    :returns:
+        A plain ``Request`` with the request's method, application path,
+        path, headers and ``mount_values`` (if it has any), and no body.
+    """
+    snapshot = _request.Request(
+        request.method,
+        request.application_path.text,
+        request.path.text,
+        _message.Headers(_6.iteritems(request.headers)),
+    )
+    mount_values = getattr(request, 'mount_values', None)
+    if mount_values is not None:
+        snapshot.mount_values = mount_values
+    return snapshot
+
+
+def _call_endpoint(endpoint, request, match):
+    """Run in the pool: call the endpoint, and catch what it raises.
+
+    :returns: A pair of the response, and the exception to raise, or None.
+    """
+    try:
+        return endpoint(request, **match), None
+    except _errors.HttpError as error:
+        # Sending back one that can't be unpickled would break the pool.
+        try:
+            _pickle.loads(_pickle.dumps(error, _pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return None, OffloadError(_traceback.format_exc())
+        return None, error
+    except Exception:
+        return None, OffloadError(_traceback.format_exc())
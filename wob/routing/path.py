@@ -1,9 +1,9 @@
 """Routing based on the URL path."""
 
 import abc as _abc
-import itertools as _it
 import re as _re
 import threading as _threading
+import uuid as _uuid
 
 import six as _6
 
@@ -11,10 +11,11 @@ from ..http import path as _path
 
 
 REMAINING_COMPONENTS = object()
-_END = object()
 
 
 class PathMatch(object):
+    __slots__ = ('matched_values', 'remaining')
+
     def __init__(self, matched_values, remaining):
         self.matched_values = matched_values
         self.remaining = remaining
@@ -32,6 +33,56 @@ class PathRule(object):
                     ' path component handlers.'
                 )
         self.prefer_trailing_slash = prefer_trailing_slash
+        # Compiled by build_path(), the first time it's called.
+        self._path_builder = None
+
+    def build_path(self, **values):
+        """Build a path that this rule matches, from the values to match.
+
+        Each value is converted to a path component with its component
+        handler's ``normalize()``, and percent-encoded.
+
+        >>> path_rule('/users/<user_id:int>/').build_path(user_id=7)
+        '/users/7/'
+        >>> path_rule('/files/**').build_path(remaining='/a b/c')
+        '/files/a%20b/c'
+
+        :raises TypeError:
+            If a value is missing for any component handler (or for
+            ``remaining_arg``, if the rule ends in ``REMAINING_COMPONENTS``),
+            or if values are given that the rule has no use for.
+        """
+        path_builder = self._path_builder
+        if path_builder is None:
+            path_builder = self._path_builder = _PathBuilder(self)
+        return path_builder.build(values)
+
+    def __str__(self):
+        """The rule, in the syntax path_rule() accepts.
+
+        >>> str(path_rule('/users/<user_id:int>/files/**'))
+        '/users/<user_id:int>/files/**'
+        """
+        parts = []
+        for component_handler in self.path_component_handlers[1:]:
+            if component_handler is REMAINING_COMPONENTS:
+                parts.append('**')
+            elif isinstance(component_handler, _6.string_types):
+                parts.append(component_handler)
+            else:
+                spec = _handler_type_name(type(component_handler))
+                if component_handler.spec_arguments is not None:
+                    spec += '({})'.format(component_handler.spec_arguments)
+                parts.append('<{}:{}>'.format(component_handler.name, spec))
+        text = '/' + '/'.join(parts)
+        if self.prefer_trailing_slash and parts:
+            text += '/'
+        return text
+
+    def __repr__(self):
+        return '<{}.{} {!r}>'.format(
+            __name__, type(self).__name__, str(self),
+        )
 
     def match(self, path):
         """Determines whether this PathRule matches the given path.
@@ -41,51 +92,165 @@ class PathRule(object):
             containing any matched values from the path.
         """
 
-        path = path.canonicalize()
+        return self._match_components(path.canonicalize().components)
 
-        zipped_path = _it.zip_longest(
-            self.path_component_handlers, path.components,
-            fillvalue=_END,
-        )
+    def match_many(self, paths):
+        """Determine whether this PathRule matches each of many paths.
 
-        matched_values = {}
+        :param paths: An iterable of path strings.
+        :returns:
+            An iterator with, for each path, what ``match()`` would return.
+            Paths that aren't valid (that are not absolute, or that have a
+            ".." above the root) don't match.
+        """
+        for path_text in paths:
+            try:
+                components = _path.Path(path_text).canonicalize().components
+            except ValueError:
+                yield None
+            else:
+                yield self._match_components(components)
 
-        for component_handler, component in zipped_path:
-            if component_handler is _END:
-                return None
-            elif component_handler is REMAINING_COMPONENTS:
+    def _match_components(self, components):
+        handlers = self.path_component_handlers
 
-                def remaining_components():
-                    for _, remaining_component in zipped_path:
-                        yield remaining_component
+        matched_values = {}
 
-                remaining = _path.Path('/' + '/'.join(remaining_components()))
+        for index, component_handler in enumerate(handlers):
+            if component_handler is REMAINING_COMPONENTS:
+                remaining = _path.Path.from_canonical_components(
+                    ('',) + components[index:]
+                )
                 matched_values[self.remaining_arg] = remaining
-                break
-            elif component is _END:
+                return matched_values
+            elif index >= len(components):
                 return None
-            elif isinstance(component_handler, _6.string_types):
+
+            component = components[index]
+            if isinstance(component_handler, _6.string_types):
                 if component_handler != component:
                     return None
             else:
+                if not component_handler.check(component):
+                    return None
                 try:
                     value = component_handler.parse(component)
                 except ValueError:
                     return None
                 matched_values[component_handler.name] = value
 
+        if len(components) != len(handlers):
+            return None
         return matched_values
 
 
+# Characters that needn't be percent-encoded in a path component; see the
+# "pchar" rule in RFC 3986.
+_SAFE_COMPONENT_CHARACTERS = "-._~!$&'()*+,;=:@"
+
+
+def _quote_component(component):
+    if component in ('', '.', '..'):
+        raise ValueError(
+            '{!r} cannot be used as a path component.'.format(component)
+        )
+    return _6.moves.urllib.parse.quote(
+        component, safe=_SAFE_COMPONENT_CHARACTERS,
+    )
+
+
+class _PathBuilder(object):
+    """Builds paths for a PathRule; compiled once per rule.
+
+    The rule's static components are percent-encoded and joined up front, so
+    building a path only has to fill in the values between them, and a rule
+    with only static components is a constant string.
+    """
+
+    def __init__(self, path_rule):
+        # A list of (text, component_handler) pairs: the static text that
+        # comes before each component handler. The last handler is None (the
+        # text is what comes after every handler), or REMAINING_COMPONENTS.
+        self.pieces = []
+        self.names = set()
+        self.remaining_arg = None
+        text = ''
+        for component_handler in path_rule.path_component_handlers[1:]:
+            if isinstance(component_handler, _6.string_types):
+                text += '/' + _quote_component(component_handler)
+            else:
+                self.pieces.append((text + '/', component_handler))
+                text = ''
+                if component_handler is REMAINING_COMPONENTS:
+                    self.remaining_arg = path_rule.remaining_arg
+                    self.names.add(self.remaining_arg)
+                else:
+                    self.names.add(component_handler.name)
+        if self.remaining_arg is None:
+            if path_rule.prefer_trailing_slash or not (text or self.pieces):
+                text += '/'
+            self.pieces.append((text, None))
+        # The path, if it's the same every time.
+        self.constant = None
+        if len(self.pieces) == 1 and not self.names:
+            self.constant = text
+
+    def build(self, values):
+        if self.constant is not None and not values:
+            return self.constant
+        if len(values) != len(self.names) or not self.names.issuperset(values):
+            raise TypeError(
+                'Building this path takes exactly the values {}; got {}.'
+                .format(sorted(self.names), sorted(values))
+            )
+
+        parts = []
+        for text, component_handler in self.pieces:
+            parts.append(text)
+            if component_handler is None:
+                break
+            elif component_handler is REMAINING_COMPONENTS:
+                remaining = values[self.remaining_arg]
+                if not isinstance(remaining, _path.Path):
+                    remaining = _path.Path(remaining)
+                components = remaining.canonicalize().components[1:]
+                if components:
+                    parts.append(
+                        '/'.join(_quote_component(c) for c in components)
+                    )
+                elif len(parts) > 1 or parts[0] != '/':
+                    # No remaining components; don't leave a trailing slash.
+                    parts[-1] = parts[-1][:-1]
+            else:
+                parts.append(_quote_component(component_handler.normalize(
+                    values[component_handler.name]
+                )))
+        return ''.join(parts)
+
+
 # A registry of component handlers, for quick building of PathRule objects.
+# The dict is replaced, never modified, so that path_rule() can read it
+# without taking the lock; the lock only keeps concurrent registrations from
+# losing each other's handlers.
 _global_path_component_handlers = {}
 _global_path_component_handlers_lock = _threading.Lock()
 
 
 def register_path_component_handler(handler_name, handler_class):
+    global _global_path_component_handlers
     with _global_path_component_handlers_lock:
         # TODO: error if keys don't match.
-        _global_path_component_handlers[handler_name] = handler_class
+        handlers = dict(_global_path_component_handlers)
+        handlers[handler_name] = handler_class
+        _global_path_component_handlers = handlers
+
+
+def _handler_type_name(handler_class):
+    for handler_name, registered_class in _6.iteritems(
+            _global_path_component_handlers):
+        if registered_class is handler_class:
+            return handler_name
+    return handler_class.__name__
 
 
 def global_path_component_handler(handler_name):
@@ -96,12 +261,44 @@ def global_path_component_handler(handler_name):
 
 
 _MORE_THAN_ONE_SLASH = _re.compile('/{2,}')
-_PATH_RULE_PART = _re.compile('^<(?P<parser>[^:<>]+):(?P<name>[^:<>]+)>$')
+# What goes between the angle brackets: "name:type" or "name:type(arguments)".
+_HANDLER_SPEC = _re.compile(
+    r'^(?P<name>[^:<>()]+):(?P<type>[^:<>()]+)(?:\((?P<arguments>.*)\))?$'
+)
+
 
 def path_rule(input_str, extra_component_handlers={}):
-    with _global_path_component_handlers_lock:
-        component_handlers = dict(_global_path_component_handlers)
-    component_handlers.update(extra_component_handlers)
+    """Parse a path rule.
+
+    Each component of the rule is one of:
+
+    * a string, which matches itself;
+    * ``<name:type>``, which matches what the component handler registered
+      as ``type`` accepts, passing the value it parses to the endpoint as
+      ``name``;
+    * ``<name:type(arguments)>``, the same, with a handler configured by the
+      arguments (see ``PathComponentHandler.from_spec()``);
+    * ``**``, at the end, which matches any remaining components.
+
+    For example:
+
+    >>> rule = path_rule('/posts/<year:regex([0-9]{4})>/<n:int(min=1)>')
+    >>> sorted(rule.match(_path.Path('/posts/2024/3')).items())
+    [('n', 3), ('year', '2024')]
+    >>> rule.match(_path.Path('/posts/24/3')) is None
+    True
+    >>> rule.match(_path.Path('/posts/2024/0')) is None
+    True
+
+    :param extra_component_handlers:
+        Handler classes to use by type name, besides (or instead of) those
+        registered globally.
+    :raises ValueError: If the rule isn't valid.
+    """
+    component_handlers = _global_path_component_handlers
+    if extra_component_handlers:
+        component_handlers = dict(component_handlers)
+        component_handlers.update(extra_component_handlers)
 
     if not input_str.startswith('/'):
         raise ValueError(
@@ -132,16 +329,15 @@ def path_rule(input_str, extra_component_handlers={}):
     path_components = ['',]
     for component in components:
         if component.startswith('<') and component.endswith('>'):
-            component = component[1:-1]
-            colon_split_result = component.split(':')
-            if len(colon_split_result) != 2:
+            spec = _HANDLER_SPEC.match(component[1:-1])
+            if spec is None:
                 raise ValueError(
                     'A component handler specification must be in the form'
-                    ' "<NAME: TYPE>".')
-            name, handler_type_name = colon_split_result
-            handler_type = component_handlers[handler_type_name]
-            handler = handler_type(name)
-            path_components.append(handler)
+                    ' "<NAME:TYPE>" or "<NAME:TYPE(ARGUMENTS)>".')
+            handler_type = component_handlers[spec.group('type')]
+            path_components.append(handler_type.from_spec(
+                spec.group('name'), spec.group('arguments'),
+            ))
         elif component == '**':
             path_components.append(REMAINING_COMPONENTS)
         else:
@@ -152,16 +348,130 @@ def path_rule(input_str, extra_component_handlers={}):
 
 # Various URL path component handlers below here.
 class PathComponentHandler(object):
-    def __init__(self, name):
+    """Parses a path component into a value for the endpoint.
+
+    A handler declares what components it accepts with ``pattern``, a
+    regular expression that must match the whole component, and
+    ``max_length``; ``check()`` tests a component against them without
+    raising, which is much cheaper than ``parse()`` failing, so routers
+    ``check()`` every component before trying to ``parse()`` it. A handler
+    with neither accepts every component ``parse()`` does.
+
+    :param pattern: If given, replaces the class's ``pattern``.
+    :param max_length:
+        If given, the most characters a component may have, replacing the
+        class's ``max_length``.
+    """
+
+    # A regular expression (a string) that every component the handler
+    # accepts matches in full, or None.
+    pattern = None
+    # The most characters of a component the handler accepts, or None.
+    max_length = None
+    # The arguments given in the rule's "<name:type(arguments)>" syntax, if
+    # any; see from_spec().
+    spec_arguments = None
+    # pattern, compiled; by __init__, or by check() for subclasses that
+    # don't call __init__.
+    _regex = None
+
+    def __init__(self, name, pattern=None, max_length=None):
         self.name = name
+        if pattern is not None:
+            self.pattern = pattern
+        if max_length is not None:
+            self.max_length = int(max_length)
+        if self.pattern is not None:
+            # Compiled now, so that an invalid pattern fails here.
+            self._regex = self._compile_pattern()
+
+    @classmethod
+    def from_spec(cls, name, arguments):
+        """Build a handler from the "<name:type(arguments)>" rule syntax.
+
+        By default, the arguments are comma-separated "key=value" pairs, each
+        passed as a keyword argument (with a string value) to the class; so
+        values can't contain commas.
+
+        :param arguments: The text between the parentheses, or None.
+        :raises ValueError: If the arguments aren't valid.
+        """
+        if arguments is None:
+            return cls(name)
+        kwargs = {}
+        for argument in arguments.split(','):
+            key, equals, value = argument.partition('=')
+            key = key.strip()
+            if not equals or not key:
+                raise ValueError(
+                    'Arguments of {!r} must be "key=value" pairs, not'
+                    ' {!r}.'.format(name, arguments)
+                )
+            kwargs[str(key)] = value.strip()
+        return cls._with_spec(name, arguments, **kwargs)
+
+    @classmethod
+    def _with_spec(cls, name, arguments, *args, **kwargs):
+        try:
+            handler = cls(name, *args, **kwargs)
+        except TypeError as error:
+            raise ValueError(
+                'Invalid arguments for {!r}: {}'.format(name, error)
+            )
+        handler.spec_arguments = arguments
+        return handler
+
+    def check(self, component):
+        """Whether the handler might accept a component; never raises.
+
+        False means that ``parse()`` would certainly reject it.
+        """
+        max_length = self.max_length
+        if max_length is not None and len(component) > max_length:
+            return False
+        regex = self._regex
+        if regex is None:
+            if self.pattern is None:
+                return True
+            regex = self._regex = self._compile_pattern()
+        return regex.match(component) is not None
+
+    def _compile_pattern(self):
+        # Anchored at the end, as re.fullmatch() would be (Python 2 has none).
+        return _re.compile('(?:{})\\Z'.format(self.pattern))
 
     @_abc.abstractmethod
     def parse(self, component):
+        """Parse a component that passed ``check()``.
+
+        :raises ValueError: If the component isn't accepted after all.
+        """
         raise NotImplementedError()
 
     def normalize(self, component_value):
         return str(component_value)
 
+    def __eq__(self, other):
+        # Two handlers of the same type and configuration parse components
+        # identically; the dispatch tree relies on this to share a branch
+        # between the rules that use them.
+        return type(self) is type(other) and (
+            _configuration(self) == _configuration(other)
+        )
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return hash((type(self), self.name))
+
+
+def _configuration(handler):
+    """A handler's attributes, less the ones it caches."""
+    configuration = dict(vars(handler))
+    configuration.pop('_regex', None)
+    return configuration
+
 
 @global_path_component_handler('string')
 class ArbitraryStringHandler(PathComponentHandler):
@@ -169,26 +479,69 @@ class ArbitraryStringHandler(PathComponentHandler):
         return component
 
 
+@global_path_component_handler('regex')
+class RegexHandler(ArbitraryStringHandler):
+    """Accepts components matching a pattern, as strings.
+
+    In a rule, everything between the parentheses is the pattern:
+    ``<slug:regex([a-z0-9-]+)>``.
+    """
+
+    def __init__(self, name, pattern, max_length=None):
+        super(RegexHandler, self).__init__(
+            name, pattern=pattern, max_length=max_length,
+        )
+
+    @classmethod
+    def from_spec(cls, name, arguments):
+        if not arguments:
+            raise ValueError('{!r} needs a pattern.'.format(name))
+        return cls._with_spec(name, arguments, arguments)
+
+
 @global_path_component_handler('int')
 class IntegerHandler(PathComponentHandler):
-    def parse(self, component):
-        return int(component, 10)
-
+    """Accepts decimal integers, optionally between ``min`` and ``max``.
+
+    >>> str(path_rule('/pages/<page:int(min=1,max=100)>'))
+    '/pages/<page:int(min=1,max=100)>'
+    """
+
+    pattern = '-?[0-9]+'
+
+    def __init__(self, name, min=None, max=None, max_length=None):
+        min = None if min is None else int(min)
+        max = None if max is None else int(max)
+        pattern = None
+        if min is not None and min >= 0:
+            pattern = '[0-9]+'
+        super(IntegerHandler, self).__init__(
+            name, pattern=pattern, max_length=max_length,
+        )
+        self.min = min
+        self.max = max
 
-_UUID = _re.compile(
-    '^[0-9A-Za-z]{8}'
-    '-[0-9A-Za-z]{4}'
-    '-[0-9A-Za-z]{4}'
-    '-[0-9A-Za-z]{4}'
-    '-[0-9A-Za-z]{12}$'
-)
+    def parse(self, component):
+        value = int(component, 10)
+        if self.min is not None and value < self.min:
+            raise ValueError('Less than {}.'.format(self.min))
+        if self.max is not None and value > self.max:
+            raise ValueError('More than {}.'.format(self.max))
+        return value
 
 
 @global_path_component_handler('uuid')
 class UuidHandler(PathComponentHandler):
-    def parse(self, component):
-        # be more strict than the python parser.
-        if not _UUID.match(component):
-            raise ValueError('Not a UUID.')
+    # Stricter than uuid.UUID(), which also takes braces, a "urn:uuid:"
+    # prefix, and no hyphens.
+    pattern = (
+        '[0-9A-Fa-f]{8}'
+        '-[0-9A-Fa-f]{4}'
+        '-[0-9A-Fa-f]{4}'
+        '-[0-9A-Fa-f]{4}'
+        '-[0-9A-Fa-f]{12}'
+    )
+    max_length = 36
 
+    def parse(self, component):
         return _uuid.UUID(component)
@@ -0,0 +1,252 @@
+"""A server-side cache of endpoints' responses.
+
+Caching is opt-in, per route: wrap the endpoints whose responses can be
+reused with ``ResponseCache.cached()``::
+
+    cache = ResponseCache(ttl=60)
+    router.add_route(
+        path_rule('/articles/<article_id:int>'),
+        {'GET': cache.cached(article)},
+    )
+
+Responses are cached by method, application path and path, the raw query
+string (the request's ``query_string``), the values matched from the path,
+and the values of the request headers named in the response's Vary header.
+Only GET and HEAD requests are cached, and only 200 responses with a bytes
+body, and without ``Cache-Control: no-store`` or ``private``, or a
+Set-Cookie header. The cached responses are ``FrozenResponse``s, and are
+shared between requests, and threads.
+
+When several requests miss the cache for the same response at once, only
+one of them calls the endpoint; the others wait for it, and share its
+response.
+
+Asynchronous endpoints are called, but their responses are not cached.
+"""
+
+import threading as _threading
+import timeit as _timeit
+
+import six as _6
+
+from .. import cache as _cache
+from ..http import magic_headers as _magic_headers
+
+
+_timer = _timeit.default_timer
+
+_CACHED_METHODS = frozenset(('GET', 'HEAD'))
+_UNCACHEABLE_DIRECTIVES = frozenset(('no-store', 'private'))
+
+# A rough count of the bytes a cached response takes, besides its body.
+_RESPONSE_OVERHEAD = 512
+
+
+class ResponseCache(object):
+    """A cache of responses, shared by any number of endpoints.
+
+    :param ttl: How many seconds a response is cached for, by default.
+    :param maxsize: The most responses to cache.
+    :param max_bytes:
+        The most bytes of responses to cache, counting their bodies and an
+        estimate of their overhead.
+    """
+
+    def __init__(self, ttl=60.0, maxsize=1024, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        # Holds two kinds of entries, both _Entry:
+        #
+        # * (base_key, None) maps to the names of the headers that the
+        #   responses for base_key vary on, and
+        # * (base_key, header_values) maps to a response.
+        #
+        # where base_key is (route, method, path, query string, matched
+        # values).
+        self.entries = _cache.LruCache(
+            maxsize, maxweight=max_bytes, weigh=_entry_size,
+        )
+        # Maps the keys being computed to Events set when they are done.
+        self._in_flight = {}
+        self._lock = _threading.Lock()
+
+    def cached(self, endpoint, route=None, ttl=None):
+        """Wrap an endpoint, to cache its responses.
+
+        :param route:
+            What ``invalidate()`` knows the endpoint's responses by; the
+            endpoint itself, by default.
+        :param ttl: How many seconds to cache its responses, if not ``ttl``.
+        """
+        if route is None:
+            route = endpoint
+        if ttl is None:
+            ttl = self.ttl
+        return _CachedEndpoint(self, endpoint, route, ttl)
+
+    def invalidate(self, route=None, path_prefix=None):
+        """Remove cached responses.
+
+        :param route: If given, only responses of this route are removed.
+        :param path_prefix:
+            If given, only responses to requests whose full paths (the
+            application path followed by the path) start with this string are
+            removed.
+        :returns: The number of responses removed.
+        """
+        removed = 0
+        for key in self.entries.keys():
+            base_key, header_values = key
+            if route is not None and base_key[0] != route:
+                continue
+            if path_prefix is not None and not base_key[2].startswith(
+                    path_prefix):
+                continue
+            if self.entries.pop(key) is not None and header_values is not None:
+                removed += 1
+        return removed
+
+    def clear(self):
+        self.entries.clear()
+
+    def _lookup(self, base_key, request):
+        """Look up a request's response.
+
+        :returns:
+            A pair of the cached response, or None, and the key to coalesce
+            misses on.
+        """
+        now = _timer()
+        vary_entry = self._fresh_entry((base_key, None), now)
+        if vary_entry is None:
+            return None, (base_key, None)
+        key = (base_key, _header_values(request, vary_entry.value))
+        entry = self._fresh_entry(key, now)
+        if entry is None:
+            return None, key
+        return entry.value, key
+
+    def _fresh_entry(self, key, now):
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires < now:
+            self.entries.pop(key)
+            return None
+        return entry
+
+    def _store(self, base_key, request, response, ttl):
+        """Cache a response, if it can be.
+
+        :returns: The response to send: the cached one, or the response.
+        """
+        if not _is_cacheable(response):
+            return response
+        vary = tuple(sorted(set(_vary_names(response))))
+        if '*' in vary:
+            return response
+
+        frozen = response.freeze()
+        expires = _timer() + ttl
+        self.entries.put((base_key, None), _Entry(vary, expires, 0))
+        self.entries.put(
+            (base_key, _header_values(request, vary)),
+            _Entry(frozen, expires, len(frozen.body)),
+        )
+        return frozen
+
+    def _call(self, cached_endpoint, request, match):
+        base_key = (
+            cached_endpoint.route,
+            request.method,
+            _full_path(request),
+            request.query_string,
+            tuple(sorted(_6.iteritems(match))),
+        )
+        response, key = self._lookup(base_key, request)
+        if response is not None:
+            return response
+
+        with self._lock:
+            done = self._in_flight.get(key)
+            leader = done is None
+            if leader:
+                done = self._in_flight[key] = _threading.Event()
+        if not leader:
+            done.wait()
+            response, _ = self._lookup(base_key, request)
+            if response is not None:
+                return response
+            # The response wasn't cacheable (or the endpoint raised); get our
+            # own.
+            return cached_endpoint.endpoint(request, **match)
+
+        try:
+            response = cached_endpoint.endpoint(request, **match)
+            if hasattr(response, '__await__'):
+                return response
+            return self._store(
+                base_key, request, response, cached_endpoint.ttl,
+            )
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+
+
+class _CachedEndpoint(object):
+    """An endpoint wrapped by ``ResponseCache.cached()``."""
+
+    def __init__(self, response_cache, endpoint, route, ttl):
+        self.response_cache = response_cache
+        self.endpoint = endpoint
+        self.route = route
+        self.ttl = ttl
+
+    def __call__(self, request, **match):
+        if request.method not in _CACHED_METHODS:
+            return self.endpoint(request, **match)
+        return self.response_cache._call(self, request, match)
+
+
+class _Entry(object):
+    def __init__(self, value, expires, size):
+        self.value = value
+        self.expires = expires
+        self.size = size
+
+
+def _entry_size(key, entry):
+    return entry.size + _RESPONSE_OVERHEAD
+
+
+def _full_path(request):
+    application_path = request.application_path.text
+    if application_path == '/':
+        return request.path.text
+    return application_path.rstrip('/') + request.path.text
+
+
+def _header_values(request, names):
+    return tuple(request.headers.get(name) for name in names)
+
+
+def _vary_names(response):
+    if 'Vary' not in response.headers:
+        return
+    for value in response.headers.get_all_headers('Vary'):
+        for name in value.split(','):
+            name = name.strip().lower()
+            if name:
+                yield name
+
+
+def _is_cacheable(response):
+    if response.status_code != 200 or not isinstance(response.body, bytes):
+        return False
+    headers = response.headers
+    if 'Set-Cookie' in headers:
+        return False
+    cache_control = _magic_headers.parse_cache_control(
+        headers.get('Cache-Control'),
+    )
+    return not any(
+        directive in cache_control for directive in _UNCACHEABLE_DIRECTIVES
+    )
@@ -1,49 +1,492 @@
 import abc as _abc
+import collections as _collections
+import itertools as _it
+import threading as _threading
 
 import six as _6
 
+from .. import cache as _cache
 from ..http import errors as _errors
+from ..http import path as _path
+from . import path as _rpath
+from . import tree as _tree
+
+
+class RouteTable(object):
+    """An immutable snapshot of a router's routes.
+
+    Tables are never modified, so they can be read from any number of threads
+    without a lock; a router replaces its table, in a single assignment,
+    whenever its routes change. Build one a route at a time with a
+    ``RouteTableBuilder``.
+
+    :param routes:
+        An iterable of ``(path_rule, method_handlers)`` pairs, in priority
+        order.
+    :param route_names: A dict of the names of routes to their path rules.
+    :param tree:
+        The routes' ``DispatchTree``, if it's been compiled already; see
+        ``compile()``.
+    """
+
+    # Numbers every table ever made; a table's generation tells it apart
+    # from the tables that came before it, e.g., in a router's match_cache.
+    # (next() on a count is atomic.)
+    _generations = _it.count()
+
+    def __init__(self, routes=(), route_names=None, tree=None):
+        # A tuple of the (path_rule, method_handlers) pairs; neither it nor
+        # the method_handlers dicts are modified.
+        self.routes = tuple(routes)
+        # Not modified either.
+        self.route_names = dict(route_names or {})
+        self.generation = next(self._generations)
+        self._tree = tree
+
+    def compile(self):
+        """Compile the table into a dispatch tree, or return the one it has.
+
+        The tree is kept on the table. A router's tables are compiled before
+        it publishes them; for other tables, threads compiling the same table
+        at once each build a tree, which are alike, and one of them is kept.
+        """
+        tree = self._tree
+        if tree is None:
+            tree = self._tree = _tree.DispatchTree(self.routes)
+        return tree
+
+    def __len__(self):
+        return len(self.routes)
+
+
+class RouteTableBuilder(object):
+    """Builds a ``RouteTable``, a route at a time.
+
+    Adding a route to a ``Router`` builds and compiles a whole new table, so
+    adding many routes one by one takes time quadratic in their number.
+    Build them here instead, and swap the table into the router::
+
+        builder = RouteTableBuilder(router.table)
+        for path_rule, method_handlers in routes:
+            builder.add_route(path_rule, method_handlers)
+        router.swap_table(builder.build())
+
+    Routes added to the router in the meantime are lost. A builder is not
+    thread-safe.
+
+    :param table: If given, a ``RouteTable`` whose routes to start from.
+    """
+
+    def __init__(self, table=None):
+        self._routes = _collections.OrderedDict(
+            table.routes if table is not None else (),
+        )
+        self._route_names = dict(
+            table.route_names if table is not None else {},
+        )
+
+    def add_route(self, path_rule, method_handlers, name=None):
+        """Add a route; see ``Router.add_route()``.
+
+        Offloaded endpoints must be wrapped with ``OffloadPool.offloaded()``
+        here; there's no ``cpu_bound``.
+        """
+        if name is not None:
+            named_rule = self._route_names.get(name, path_rule)
+            if named_rule is not path_rule:
+                raise ValueError(
+                    'There is already a route named {!r}.'.format(name)
+                )
+            self._route_names[name] = path_rule
+        self._routes[path_rule] = dict(method_handlers)
+
+    def build(self):
+        """Build a compiled ``RouteTable`` of the routes added so far."""
+        table = RouteTable(_6.iteritems(self._routes), self._route_names)
+        table.compile()
+        return table
+
+    def __len__(self):
+        return len(self._routes)
 
 
 class Router(object):
-    """Dispatches incoming requests to "endpoints" to handle them."""
+    """Dispatches incoming requests to "endpoints" to handle them.
+
+    :param match_cache_size:
+        If given, the results of the most recently matched ``(method, path)``
+        pairs, up to this many of them, are cached; see ``match_cache``.
+    :param metrics:
+        If given, a ``wob.routing.metrics.RouteMetrics`` to record per-route
+        metrics of every request routed with ``route_request()``.
+    :param offload_pool:
+        If given, a ``wob.routing.offload.OffloadPool`` to call the endpoints
+        of routes added with ``cpu_bound=True`` in.
+
+    The routes are kept in a compiled ``RouteTable``, which is replaced,
+    never modified, when routes are added. The new table is built and
+    compiled by the thread changing the routes, and then published in a
+    single assignment; matching reads the current table without taking a
+    lock, or compiling anything, so routes can be added (or a whole new table
+    swapped in, see ``swap_table()``) while requests are being served.
+    """
+
+    def __init__(
+            self, match_cache_size=None, metrics=None, offload_pool=None):
+        # The current RouteTable, always compiled; only ever replaced.
+        self._table = RouteTableBuilder().build()
+        # Held by the threads changing the routes, so that they don't lose
+        # each other's routes; never held to match against a table.
+        self._table_lock = _threading.Lock()
+        self.metrics = metrics
+        self.offload_pool = offload_pool
+        # Functions applied, in order, to every response route_request()
+        # returns; see add_response_filter().
+        self.response_filters = []
+        # Caches match_request() results, both matches and misses, keyed on
+        # the table's generation, and the request's method and canonical
+        # path, so that a match computed against an older table is never
+        # returned. Its hit and miss counters are useful for sizing it.
+        if match_cache_size is None:
+            self.match_cache = None
+        else:
+            self.match_cache = _cache.LruCache(match_cache_size)
+
+    @property
+    def table(self):
+        """The current ``RouteTable``, which is compiled already."""
+        return self._table
+
+    @property
+    def routes(self):
+        """The routes, as an ordered dict of path rules to method handlers.
+
+        This is a copy; add routes with ``add_route()``.
+        """
+        return _collections.OrderedDict(self.table.routes)
+
+    @property
+    def route_names(self):
+        """A dict of the names of routes to their path rules (a copy)."""
+        return dict(self.table.route_names)
+
+    def add_route(
+            self, path_rule, method_handlers, name=None, cpu_bound=False):
+        """Add a route.
+
+        Routes may be added while the router is serving requests: a request
+        is matched against the table the router had when matching began,
+        from start to finish. This builds and compiles a new table, in the
+        calling thread, so it takes time in proportion to the number of
+        routes; to add many routes, use a ``RouteTableBuilder``.
+
+        :param name:
+            If given, a name for the route, with which ``build_path()`` can
+            build paths to it.
+        :param cpu_bound:
+            If true, the route's endpoints are called in the router's
+            ``offload_pool``, and must meet the requirements of
+            ``wob.routing.offload``.
+        """
+        if cpu_bound:
+            if self.offload_pool is None:
+                raise ValueError(
+                    'CPU-bound routes need a router with an offload_pool.'
+                )
+            method_handlers = dict(
+                (method, self.offload_pool.offloaded(endpoint))
+                for method, endpoint in _6.iteritems(dict(method_handlers))
+            )
+        with self._table_lock:
+            builder = RouteTableBuilder(self._table)
+            builder.add_route(path_rule, method_handlers, name=name)
+            self._publish(builder.build())
+
+    def swap_table(self, table):
+        """Replace all of the routes with a table's, atomically.
+
+        The table is compiled (if it isn't already) before it's swapped in,
+        so that no request has to; requests being matched against the old
+        table finish with it.
+
+        :param table:
+            A ``RouteTable``; e.g., one from a ``RouteTableBuilder``, or
+            another router's ``table``.
+        """
+        table.compile()
+        with self._table_lock:
+            self._publish(table)
+
+    def _publish(self, table):
+        # Called with the table lock held.
+        self._table = table
+        if self.match_cache is not None:
+            # Entries for older tables can't be hit again; free their space.
+            self.match_cache.clear()
+
+    def add_response_filter(self, response_filter):
+        """Add a function to apply to every response from this router.
+
+        ``response_filter(request, response)`` is called with each response
+        an endpoint returns, and returns the response to send in its place
+        (which may be the same one). Filters are applied in the order they
+        were added, to the responses of asynchronous endpoints too, once
+        they're done. They aren't applied to ``HttpError``s.
+        """
+        self.response_filters.append(response_filter)
+
+    def filter_response(self, request, response):
+        """Apply the response filters to a response."""
+        for response_filter in self.response_filters:
+            response = response_filter(request, response)
+        return response
+
+    def mount(self, prefix_rule, router, name=None):
+        """Mount another router under a path prefix.
+
+        Requests whose paths start with the prefix are dispatched to
+        ``router``, with sub-requests (see
+        ``Request.sub_request_for_application()``) whose paths are what comes
+        after the prefix, and whose application paths end with the prefix.
+        The mount is an ordinary route, so it takes part in matching like any
+        other, for every method.
 
-    def __init__(self):
-        self.routes = {}
+        Any values matched by the prefix are added to the sub-request's
+        ``mount_values`` dict.
 
-    def add_route(self, path_rule, method_handlers):
-        self.routes[path_rule] = dict(method_handlers)
+        :param prefix_rule:
+            A ``PathRule`` for the prefix; it must not end in
+            ``REMAINING_COMPONENTS``.
+        :param router: The ``Router`` to mount.
+        :param name: As for ``add_route()``.
+        """
+        path_rule = _rpath.PathRule(
+            prefix_rule.path_component_handlers
+            + (_rpath.REMAINING_COMPONENTS,),
+            prefix_rule.prefer_trailing_slash,
+        )
+        mount = _Mount(router, path_rule.remaining_arg)
+        self.add_route(path_rule, {ANY_METHOD: mount}, name=name)
+
+    def compile(self):
+        """Get the route table's dispatch tree.
+
+        The table is compiled whenever the routes change, so this costs
+        nothing.
+        """
+        return self._table.compile()
+
+    def load_compiled(self, tree, route_names=None):
+        """Replace the route table with a compiled one.
+
+        :param tree:
+            A ``DispatchTree``, as returned by ``compile()``; e.g., one saved
+            by ``wob.routing.compiled``. Its routes become this router's.
+        :param route_names: The names of the routes, if any.
+        """
+        self.swap_table(RouteTable(tree.routes, route_names, tree))
 
     def match_request(self, request):
-        for path_rule, method_handlers in _6.iteritems(self.routes):
-            match = path_rule.match(request.path)
-            if match is not None:
-                if request.method in method_handlers:
-                    endpoint = method_handlers[request.method]
-                    return _RouteMatch(endpoint, match)
-                elif ANY_METHOD in method_handlers:
-                    endpoint = method_handlers[ANY_METHOD]
-                    return _RouteMatch(endpoint, match)
+        """Find the endpoint that should handle a request.
+
+        :returns:
+            A ``_RouteMatch`` if an endpoint was found, a ``_NoMethod`` if the
+            path matched a route that has no handler for the request's method,
+            or ``NO_PATH`` if no route matches the path. Results may be cached
+            and shared between requests, and must not be modified.
+        """
+        path = request.path.canonicalize()
+        table = self._table
+        match_cache = self.match_cache
+        if match_cache is None:
+            return _match_path(table, request.method, path)
+
+        key = (table.generation, request.method, path.text)
+        result = match_cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = _match_path(table, request.method, path)
+            match_cache.put(key, result)
+        return result
+
+    def match_paths(
+            self, paths, method='GET', processes=None, chunk_size=10000):
+        """Match many paths at once, without building Requests.
+
+        This is meant for offline work, like replaying access logs to find
+        dead routes, or checking the links in a sitemap. The work of matching
+        the components a path shares with the path before it is reused, so
+        sorting the paths first makes this faster.
+
+        :param paths: An iterable of path strings.
+        :param method: The method to match every path with.
+        :param processes:
+            If given, the paths are matched by a pool of this many processes,
+            ``chunk_size`` paths at a time. The router's routes, and the
+            values matched from paths, must be picklable.
+        :returns:
+            An iterator of match results, one for each path, in order; each is
+            what ``match_request()`` would return for a request with the
+            method and path. Paths that aren't valid (that are not absolute,
+            or that have a ".." above the root) give ``NO_PATH``.
+        """
+        tree = self.compile()
+        if processes is None:
+            found_results = tree.lookup_many(
+                _6.moves.map(_canonical_components, paths)
+            )
+            for found in found_results:
+                if found is None:
+                    yield NO_PATH
                 else:
-                    return _NoMethod(match, path_rule, method_handlers)
-        return NO_PATH
+                    _, path_rule, method_handlers, match = found
+                    yield _match_result(
+                        method, path_rule, method_handlers, match,
+                    )
+            return
+
+        # Only imported when needed; it is slow to import.
+        import multiprocessing as _multiprocessing
+        paths = iter(paths)
+        chunks = iter(lambda: list(_it.islice(paths, chunk_size)), [])
+        pool = _multiprocessing.Pool(
+            processes, initializer=_init_match_worker, initargs=(tree,),
+        )
+        try:
+            for chunk_results in pool.imap(_match_chunk, chunks):
+                for found in chunk_results:
+                    if found is None:
+                        yield NO_PATH
+                    else:
+                        order, match = found
+                        path_rule, method_handlers = tree.routes[order]
+                        yield _match_result(
+                            method, path_rule, method_handlers, match,
+                        )
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def build_path(self, route_name, **values):
+        """Build a path to a named route; see ``PathRule.build_path()``.
+
+        :raises KeyError: If there is no route by that name.
+        """
+        return self.table.route_names[route_name].build_path(**values)
 
     def route_request(self, request):
-        match_result = self.match_request(request)
+        """Dispatch a request to its endpoint, and return what it returns.
+
+        If the endpoint is a coroutine function, this returns the coroutine;
+        see ``wob.routing.asgi`` for an application that awaits it.
+        """
+        if self.metrics is not None:
+            response = self.metrics.route_request(self, request)
+        else:
+            endpoint, match = self.endpoint_for_match(
+                self.match_request(request)
+            )
+            response = endpoint(request, **match)
+
+        if not self.response_filters:
+            return response
+        if hasattr(response, '__await__'):
+            # Only Python 3 has awaitables, and the module handling them.
+            from . import _async
+            return _async.filter_awaited_response(self, request, response)
+        return self.filter_response(request, response)
+
+    def endpoint_for_match(self, match_result):
+        """Get the endpoint, and its keyword arguments, for a match.
+
+        :param match_result: A result returned by ``match_request()``.
+        :raises NotFound: If no route matched.
+        :raises MethodNotAllowed:
+            If a route matched, but has no handler for the method.
+        """
         if match_result is NO_PATH:
             raise _errors.NotFound()
         if isinstance(match_result, _NoMethod):
             raise _errors.MethodNotAllowed(
                 sorted(match_result.method_handlers)
             )
-        return match_result.endpoint(request, **match_result.match)
+        return match_result.endpoint, match_result.match
 
 
 NO_PATH = object()
 ANY_METHOD = object()
+_MISSING = object()
+
+
+def _match_path(table, method, path):
+    found = table.compile().lookup(path.components)
+    if found is None:
+        return NO_PATH
+
+    path_rule, method_handlers, match = found
+    return _match_result(method, path_rule, method_handlers, match)
+
+
+def _match_result(method, path_rule, method_handlers, match):
+    if method in method_handlers:
+        endpoint = method_handlers[method]
+        return _RouteMatch(endpoint, match, path_rule)
+    elif ANY_METHOD in method_handlers:
+        endpoint = method_handlers[ANY_METHOD]
+        return _RouteMatch(endpoint, match, path_rule)
+    else:
+        return _NoMethod(match, path_rule, method_handlers)
+
+
+def _canonical_components(path_text):
+    try:
+        return _path.Path(path_text).canonicalize().components
+    except ValueError:
+        return None
+
+
+# The dispatch tree used by a match_paths() worker process.
+_worker_tree = None
+
+
+def _init_match_worker(tree):
+    global _worker_tree
+    _worker_tree = tree
+
+
+def _match_chunk(paths):
+    found_results = _worker_tree.lookup_many(
+        _6.moves.map(_canonical_components, paths)
+    )
+    return [
+        None if found is None else (found[0], found[3])
+        for found in found_results
+    ]
+
+
+class _Mount(object):
+    """The endpoint of a route added by ``Router.mount()``."""
+
+    def __init__(self, router, remaining_arg):
+        self.router = router
+        self.remaining_arg = remaining_arg
+
+    def __call__(self, request, **match):
+        remaining = match.pop(self.remaining_arg)
+        components = request.path.components
+        prefix_length = len(components) - len(remaining.components) + 1
+        sub_request = request.sub_request_for_application(
+            _path.Path.from_canonical_components(components[:prefix_length])
+        )
+        if match:
+            mount_values = dict(getattr(request, 'mount_values', ()))
+            mount_values.update(match)
+            sub_request.mount_values = mount_values
+        return self.router.route_request(sub_request)
 
 
 class _NoMethod(object):
+    __slots__ = ('match', 'path_rule', 'method_handlers')
+
     def __init__(self, match, path_rule, method_handlers):
         self.match = match
         self.path_rule = path_rule
@@ -51,6 +494,9 @@ class _NoMethod(object):
 
 
 class _RouteMatch(object):
-    def __init__(self, endpoint, match):
+    __slots__ = ('endpoint', 'match', 'path_rule')
+
+    def __init__(self, endpoint, match, path_rule=None):
         self.endpoint = endpoint
         self.match = match
+        self.path_rule = path_rule
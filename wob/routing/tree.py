@@ -0,0 +1,242 @@
+"""A compiled dispatch tree over a table of path rules.
+
+Matching a path against every ``PathRule`` in a table, one after another,
+costs time proportional to the number of rules. The tree here merges the
+rules' component handlers into a trie, so that a lookup only walks as deep as
+the path is long:
+
+* static components are dict children of a node,
+* typed component handlers (``IntegerHandler``, etc.) are ordered fallback
+  children, tried after the static child; a component is only parsed by the
+  handlers whose ``check()`` it passes, so the branches it can't match are
+  pruned without parsing (and failing) at all,
+* ``REMAINING_COMPONENTS`` is a terminal wildcard hanging off of a node.
+
+When more than one rule matches a path, the rule that was added to the table
+first wins, exactly as it would if the table were searched in order.
+"""
+
+import six as _6
+
+from ..http import path as _path
+from . import path as _rpath
+
+
+class _Node(object):
+    def __init__(self):
+        # component string -> _Node
+        self.static = {}
+        # a list of [handler, _Node] pairs, in the order they were added.
+        self.dynamic = []
+        # (order, path_rule, method_handlers) of the rule that ends at this
+        # node, or None.
+        self.terminal = None
+        # (order, path_rule, method_handlers) of the rule that matches any
+        # remaining components from this node on, or None.
+        self.remaining = None
+        # The lowest order of any rule at or below this node; used to stop
+        # searching subtrees that cannot beat a match we already have.
+        self.min_order = _INFINITY
+
+    def child_for_handler(self, handler):
+        if isinstance(handler, _6.string_types):
+            child = self.static.get(handler)
+            if child is None:
+                child = self.static[handler] = _Node()
+            return child
+
+        for existing_handler, child in self.dynamic:
+            if existing_handler == handler:
+                return child
+        child = _Node()
+        self.dynamic.append([handler, child])
+        return child
+
+
+_INFINITY = float('inf')
+
+
+class DispatchTree(object):
+    """A trie of path rules, for matching a path against many rules at once.
+
+    :param routes:
+        An iterable of ``(path_rule, method_handlers)`` pairs, in priority
+        order.
+    """
+
+    def __init__(self, routes):
+        # The (path_rule, method_handlers) pairs, indexed by their order.
+        self.routes = tuple(routes)
+        self.root = _Node()
+        for order, (path_rule, method_handlers) in enumerate(self.routes):
+            self._insert(order, path_rule, method_handlers)
+
+    def _insert(self, order, path_rule, method_handlers):
+        entry = (order, path_rule, method_handlers)
+        node = self.root
+        node.min_order = min(node.min_order, order)
+        for handler in path_rule.path_component_handlers:
+            if handler is _rpath.REMAINING_COMPONENTS:
+                if node.remaining is None:
+                    node.remaining = entry
+                return
+            node = node.child_for_handler(handler)
+            node.min_order = min(node.min_order, order)
+        if node.terminal is None:
+            node.terminal = entry
+
+    def lookup(self, components):
+        """Find the first rule matching the given path components.
+
+        :param components:
+            The tuple of components of a canonical path, as returned by
+            ``Path.components``.
+        :returns:
+            ``None`` if no rule matches, otherwise a tuple of ``(path_rule,
+            method_handlers, matched_values)``.
+        """
+        found = _search(self.root, components, 0, {}, _INFINITY)
+        if found is None:
+            return None
+        _, path_rule, method_handlers, matched_values = found
+        return path_rule, method_handlers, matched_values
+
+    def lookup_many(self, components_iterable):
+        """Find the first rule matching each of many paths.
+
+        This gives the same results as calling ``lookup()`` on each path, but
+        the work of matching the components a path shares with the path
+        before it is reused, so sorting the paths first makes this faster.
+
+        :param components_iterable:
+            An iterable of component tuples, as ``lookup()`` takes; ``None``
+            may be given in place of a tuple, and never matches.
+        :returns:
+            An iterator of ``(order, path_rule, method_handlers,
+            matched_values)`` tuples, or ``None`` where nothing matched. The
+            order is the position of the rule in the routes the tree was built
+            from.
+        """
+        # levels[depth] holds the states reached after matching the first
+        # `depth` components of the previous path: a list of (node,
+        # matched_values) pairs, and the REMAINING_COMPONENTS rules hanging off
+        # of those nodes.
+        levels = [_level(((self.root, {}),))]
+        previous = ()
+        for components in components_iterable:
+            if components is None:
+                yield None
+                continue
+
+            shared = 0
+            limit = min(len(components), len(previous))
+            while shared < limit and components[shared] == previous[shared]:
+                shared += 1
+            del levels[shared + 1:]
+            for depth in _6.moves.range(shared, len(components)):
+                states = levels[depth][0]
+                levels.append(_level(_advance(states, components[depth])))
+            previous = components
+
+            yield _best_of_levels(levels, components)
+
+
+def _search(node, components, index, matched_values, best_order):
+    result = None
+
+    remaining = node.remaining
+    if remaining is not None and remaining[0] < best_order:
+        order, path_rule, method_handlers = remaining
+        values = dict(matched_values)
+        values[path_rule.remaining_arg] = (
+            _path.Path.from_canonical_components(('',) + components[index:])
+        )
+        result = (order, path_rule, method_handlers, values)
+        best_order = order
+
+    if index == len(components):
+        terminal = node.terminal
+        if terminal is not None and terminal[0] < best_order:
+            order, path_rule, method_handlers = terminal
+            result = (order, path_rule, method_handlers, matched_values)
+        return result
+
+    component = components[index]
+    child = node.static.get(component)
+    if child is not None and child.min_order < best_order:
+        found = _search(
+            child, components, index + 1, matched_values, best_order,
+        )
+        if found is not None:
+            result = found
+            best_order = found[0]
+
+    for handler, child in node.dynamic:
+        if child.min_order >= best_order or not handler.check(component):
+            continue
+        try:
+            value = handler.parse(component)
+        except ValueError:
+            continue
+        values = dict(matched_values)
+        values[handler.name] = value
+        found = _search(child, components, index + 1, values, best_order)
+        if found is not None:
+            result = found
+            best_order = found[0]
+
+    return result
+
+
+def _level(states):
+    states = list(states)
+    wildcards = [
+        (node.remaining, matched_values)
+        for node, matched_values in states
+        if node.remaining is not None
+    ]
+    return states, wildcards
+
+
+def _advance(states, component):
+    for node, matched_values in states:
+        child = node.static.get(component)
+        if child is not None:
+            yield child, matched_values
+        for handler, child in node.dynamic:
+            if not handler.check(component):
+                continue
+            try:
+                value = handler.parse(component)
+            except ValueError:
+                continue
+            values = dict(matched_values)
+            values[handler.name] = value
+            yield child, values
+
+
+def _best_of_levels(levels, components):
+    best = None
+    best_depth = None
+    for depth, (_, wildcards) in enumerate(levels):
+        for entry, matched_values in wildcards:
+            if best is None or entry[0] < best[0][0]:
+                best = (entry, matched_values)
+                best_depth = depth
+    for node, matched_values in levels[len(components)][0]:
+        entry = node.terminal
+        if entry is not None and (best is None or entry[0] < best[0][0]):
+            best = (entry, matched_values)
+            best_depth = None
+
+    if best is None:
+        return None
+    (order, path_rule, method_handlers), matched_values = best
+    if best_depth is not None:
+        matched_values = dict(matched_values)
+        matched_values[path_rule.remaining_arg] = (
+            _path.Path.from_canonical_components(
+                ('',) + components[best_depth:]
+            )
+        )
+    return order, path_rule, method_handlers, matched_values
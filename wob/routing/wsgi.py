@@ -0,0 +1,25 @@
+"""A WSGI application that dispatches requests through a Router."""
+
+from ..http import errors as _errors
+from ..http import request as _request
+
+
+class WsgiApplication(object):
+    """Serve a Router as a WSGI application.
+
+    Endpoints must return their responses; asynchronous endpoints need
+    ``wob.routing.asgi`` instead.
+
+    :param router: The ``Router`` to dispatch requests with.
+    """
+
+    def __init__(self, router):
+        self.router = router
+
+    def __call__(self, wsgi_environment, start_response):
+        request = _request.request_from_wsgi(wsgi_environment)
+        try:
+            response = self.router.route_request(request)
+        except _errors.HttpError as error:
+            response = _errors.to_simple_text_response(error)
+        return response.return_from_wsgi_app(start_response, wsgi_environment)
@@ -0,0 +1,656 @@
+"""An asyncio HTTP/1.1 server for a Router.
+
+``HttpServer`` serves a Router straight from an asyncio event loop, without
+a WSGI or ASGI server in front of it::
+
+    asyncio.run(HttpServer(router, port=8000).serve_forever())
+
+It supports persistent connections, pipelined requests (answered in order),
+and chunked transfer coding, both of request bodies and of responses whose
+length isn't known up front. Endpoints may be coroutine functions, as with
+``wob.routing.asgi``; ordinary endpoints run on the event loop, and block it
+while they do, so slow ones should be asynchronous, or offloaded (see
+``wob.routing.offload``).
+
+Request heads are parsed straight out of the connection's receive buffer:
+each header name and value is decoded from a ``memoryview`` slice of it,
+with no intermediate bytes objects. A request's body is read in full before
+its endpoint is called (up to ``max_body_size``), and when it is all that is
+in the buffer, the buffer itself becomes the body. Responses are written
+with the status line and headers gathered with the first piece of the body,
+into a single ``writelines()`` call.
+
+A connection that sends nothing for ``idle_timeout`` seconds between
+requests is closed. One that starts a request but takes longer than
+``header_timeout`` seconds to send its head, or sends nothing for
+``idle_timeout`` seconds in the middle of its body, gets a 408 (Request
+Timeout) response, and is then closed.
+
+This module requires Python 3.7 or later.
+"""
+
+import asyncio as _asyncio
+import email.utils as _email_utils
+import inspect as _inspect
+import logging as _logging
+import re as _re
+import time as _time
+import urllib.parse as _urllib_parse
+
+from ..http import body as _body
+from ..http import errors as _errors
+from ..http import message as _message
+from ..http import request as _request
+from ..http import response as _response
+
+
+_logger = _logging.getLogger(__name__)
+
+# The most bytes of a request's request line and headers.
+DEFAULT_MAX_HEAD_SIZE = 64 * 1024
+
+# The most bytes a connection buffers before it stops reading from the
+# socket, until the requests in the buffer are handled.
+_HIGH_WATER = 256 * 1024
+
+# The most bytes of a chunk-size line, extensions included.
+_MAX_CHUNK_SIZE_LINE = 1024
+
+_TOKEN = _re.compile(r"^[!#$%&'*+\-.^_`|~0-9A-Za-z]+$")
+_HEX = _re.compile('^[0-9A-Fa-f]+$')
+_VERSIONS = frozenset(('HTTP/1.0', 'HTTP/1.1'))
+
+# Bytes of optional whitespace.
+_SPACE = 0x20
+_TAB = 0x09
+
+
+class Http11Request(_request.Request):
+    """A request read by an ``HttpServer``.
+
+    :param http_version: "HTTP/1.0" or "HTTP/1.1".
+    :param body: The request's body, as a bytes-like object, or None.
+    :param peer: The address of the client.
+    """
+
+    __slots__ = ('http_version', 'peer')
+
+    def __init__(
+            self, method, path, query_string, http_version, headers, body,
+            peer=None):
+        super(Http11Request, self).__init__(
+            method, '/', path, headers,
+            None if body is None else _BufferStream(body), query_string,
+        )
+        self.http_version = http_version
+        self.peer = peer
+
+
+class HttpServer(object):
+    """Serves a Router over HTTP/1.1, on an asyncio event loop.
+
+    :param router: The ``Router`` to dispatch requests with.
+    :param host: The address to listen on.
+    :param port: The port to listen on; 0 picks a free one.
+    :param idle_timeout:
+        How many seconds a connection may wait before it starts sending a
+        request, or between the pieces of a request's body.
+    :param header_timeout:
+        How many seconds a client has to send a request's head (its request
+        line and headers), once it has started to.
+    :param max_head_size:
+        The most bytes a request's head may have; a larger one gets a 431
+        (Request Header Fields Too Large) response.
+    :param max_body_size:
+        The most bytes a request's body may have, or None for no limit; a
+        larger one gets a 413 (Payload Too Large) response. By default,
+        ``Request.default_max_body_size``.
+    :param reuse_port:
+        Whether to listen with ``SO_REUSEPORT``, so that several processes
+        can serve the same port.
+    """
+
+    def __init__(
+            self, router, host='127.0.0.1', port=8000, idle_timeout=60.0,
+            header_timeout=10.0, max_head_size=DEFAULT_MAX_HEAD_SIZE,
+            max_body_size=_request.Request.default_max_body_size,
+            reuse_port=False):
+        self.router = router
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.header_timeout = header_timeout
+        self.max_head_size = max_head_size
+        self.max_body_size = max_body_size
+        self.reuse_port = reuse_port
+        self.address = None
+        self._server = None
+
+    async def start(self):
+        """Start listening; ``address`` is set once this returns."""
+        loop = _asyncio.get_event_loop()
+        self._server = await loop.create_server(
+            lambda: _Connection(self), self.host, self.port,
+            reuse_port=self.reuse_port or None,
+        )
+        self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """Start listening, if not already, and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        _logger.info(
+            'Listening on http://%s:%d/.', self.address[0], self.address[1],
+        )
+        try:
+            await self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop listening. Open connections are left to finish."""
+        if self._server is not None:
+            self._server.close()
+
+
+class _ConnectionClosed(Exception):
+    """The client closed the connection."""
+
+
+class _Connection(_asyncio.Protocol):
+    """One client connection, serving its requests one after another."""
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.peer = None
+        self.buffer = bytearray()
+        self._loop = _asyncio.get_event_loop()
+        # Set when data (or the end of it) arrives; see _receive().
+        self._data_waiter = None
+        self._eof = False
+        self._closed = False
+        self._reading_paused = False
+        self._can_write = _asyncio.Event()
+        self._can_write.set()
+        self._task = None
+
+    # asyncio.Protocol callbacks.
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.peer = transport.get_extra_info('peername')
+        self._task = self._loop.create_task(self._serve())
+
+    def data_received(self, data):
+        self.buffer += data
+        if len(self.buffer) > _HIGH_WATER and not self._reading_paused:
+            self._reading_paused = True
+            self.transport.pause_reading()
+        self._wake_reader()
+
+    def eof_received(self):
+        self._eof = True
+        self._wake_reader()
+        # Keep the transport open to write the responses still due.
+        return True
+
+    def connection_lost(self, exc):
+        self._closed = True
+        self._eof = True
+        self._wake_reader()
+        # Wake a writer waiting on flow control, so that it sees the close.
+        self._can_write.set()
+
+    def pause_writing(self):
+        self._can_write.clear()
+
+    def resume_writing(self):
+        self._can_write.set()
+
+    # Reading.
+
+    def _wake_reader(self):
+        waiter = self._data_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _receive(self, timeout):
+        """Wait for more data.
+
+        :raises asyncio.TimeoutError: If none arrives in time.
+        :raises _ConnectionClosed: If the client has stopped sending.
+        """
+        if self._eof:
+            raise _ConnectionClosed()
+        if self._reading_paused:
+            self._reading_paused = False
+            self.transport.resume_reading()
+        self._data_waiter = self._loop.create_future()
+        try:
+            await _asyncio.wait_for(self._data_waiter, timeout)
+        finally:
+            self._data_waiter = None
+        if self._closed:
+            raise _ConnectionClosed()
+
+    def _consume(self, size):
+        del self.buffer[:size]
+        if (self._reading_paused and not self._eof
+                and len(self.buffer) <= _HIGH_WATER):
+            self._reading_paused = False
+            self.transport.resume_reading()
+
+    # Serving.
+
+    async def _serve(self):
+        try:
+            while await self._serve_request():
+                pass
+        except _ConnectionClosed:
+            pass
+        except Exception:
+            _logger.exception('Error serving %s.', self.peer)
+        finally:
+            self.transport.close()
+
+    async def _serve_request(self):
+        """Read a request, and send its response.
+
+        :returns: Whether to keep the connection open for another request.
+        """
+        server = self.server
+        # Empty lines before a request line are to be ignored (RFC 7230,
+        # section 3.5).
+        while self.buffer[:2] == b'\r\n':
+            self._consume(2)
+        if not self.buffer:
+            try:
+                await self._receive(server.idle_timeout)
+            except _asyncio.TimeoutError:
+                # An idle connection, not a slow request: close it without
+                # a 408, which the client could take as the response to a
+                # request it sends at the same time (RFC 7230, section
+                # 6.3.1).
+                return False
+            return True
+
+        try:
+            head_end = await self._read_head()
+            method, target, version, header_items = _parse_head(
+                self.buffer, head_end,
+            )
+        except _errors.HttpError as error:
+            return await self._send_error(error)
+        except _asyncio.TimeoutError:
+            return await self._send_error(_errors.RequestTimeout())
+        self._consume(head_end + 4)
+
+        path, _, query_string = target.partition('?')
+        headers = _message.Headers(header_items)
+        keep_alive = _keep_alive(version, headers)
+        try:
+            body = await self._read_body(version, headers)
+            request = Http11Request(
+                method, _urllib_parse.unquote(path, 'latin-1'),
+                query_string, version, headers, body, self.peer,
+            )
+        except _errors.HttpError as error:
+            return await self._send_error(error)
+        except _asyncio.TimeoutError:
+            return await self._send_error(_errors.RequestTimeout())
+        except ValueError:
+            # Not an absolute path, or one with a ".." above the root.
+            return await self._send_error(_errors.BadRequest())
+
+        response = await self._respond(request)
+        return await self._write_response(
+            response, version, method == 'HEAD', keep_alive,
+        )
+
+    async def _read_head(self):
+        """Wait for a whole request head to be in the buffer.
+
+        :returns: The position of the blank line that ends it.
+        """
+        server = self.server
+        deadline = self._loop.time() + server.header_timeout
+        searched = 0
+        while True:
+            # The blank line may straddle the data searched already.
+            head_end = self.buffer.find(b'\r\n\r\n', max(0, searched - 3))
+            if head_end >= 0:
+                if head_end > server.max_head_size:
+                    raise _errors.RequestHeaderFieldsTooLarge()
+                return head_end
+            if len(self.buffer) > server.max_head_size:
+                raise _errors.RequestHeaderFieldsTooLarge()
+            searched = len(self.buffer)
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                raise _asyncio.TimeoutError()
+            await self._receive(timeout)
+
+    async def _read_body(self, version, headers):
+        """Read a request's body out of the buffer, or None if it has none."""
+        transfer_encoding = headers.get('Transfer-Encoding')
+        if transfer_encoding is not None:
+            codings = [
+                coding.strip().lower()
+                for coding in transfer_encoding.split(',')
+            ]
+            # With any other coding last, the body's length can't be known;
+            # and a Content-Length too is a sign of request smuggling.
+            if (codings[-1] != 'chunked' or version != 'HTTP/1.1'
+                    or 'Content-Length' in headers):
+                raise _errors.BadRequest()
+            self._continue(headers)
+            return await self._read_chunked_body()
+
+        if 'Content-Length' not in headers:
+            return None
+        content_lengths = set(headers.get_all_headers('Content-Length'))
+        if len(content_lengths) > 1:
+            raise _errors.BadRequest()
+        content_length = _body.parse_content_length(content_lengths.pop())
+        if content_length is None:
+            # The header was sent, but empty.
+            raise _errors.BadRequest()
+        max_body_size = self.server.max_body_size
+        if max_body_size is not None and content_length > max_body_size:
+            raise _errors.PayloadTooLarge()
+        if len(self.buffer) < content_length:
+            self._continue(headers)
+        while len(self.buffer) < content_length:
+            await self._receive(self.server.idle_timeout)
+        return self._take(content_length)
+
+    async def _read_chunked_body(self):
+        max_body_size = self.server.max_body_size
+        body = bytearray()
+        position = 0
+        while True:
+            line_end = self.buffer.find(b'\r\n', position)
+            if line_end < 0:
+                if len(self.buffer) - position > _MAX_CHUNK_SIZE_LINE:
+                    raise _errors.BadRequest()
+                await self._receive(self.server.idle_timeout)
+                continue
+            size_text = self.buffer[position:line_end].split(b';', 1)[0]
+            size_text = size_text.strip().decode('latin-1')
+            if not _HEX.match(size_text):
+                raise _errors.BadRequest()
+            size = int(size_text, 16)
+
+            if size == 0:
+                # Skip the trailer section, up to the blank line ending it.
+                while True:
+                    end = self.buffer.find(b'\r\n\r\n', line_end)
+                    if end >= 0:
+                        break
+                    if len(self.buffer) - line_end > self.server.max_head_size:
+                        raise _errors.RequestHeaderFieldsTooLarge()
+                    await self._receive(self.server.idle_timeout)
+                self._consume(end + 4)
+                return body
+
+            if max_body_size is not None and len(body) + size > max_body_size:
+                raise _errors.PayloadTooLarge()
+            data_start = line_end + 2
+            data_end = data_start + size
+            while len(self.buffer) < data_end + 2:
+                await self._receive(self.server.idle_timeout)
+            if self.buffer[data_end:data_end + 2] != b'\r\n':
+                raise _errors.BadRequest()
+            body += memoryview(self.buffer)[data_start:data_end]
+            position = data_end + 2
+            # Drop the chunks read so far, now and then, rather than after
+            # every chunk.
+            if position > _HIGH_WATER:
+                self._consume(position)
+                position = 0
+
+    def _take(self, size):
+        """Remove the first ``size`` bytes of the buffer, and return them."""
+        buffer = self.buffer
+        if len(buffer) == size:
+            # The body is all there is; hand over the buffer itself.
+            self.buffer = bytearray()
+            if self._reading_paused and not self._eof:
+                self._reading_paused = False
+                self.transport.resume_reading()
+            return buffer
+        body = bytes(memoryview(buffer)[:size])
+        self._consume(size)
+        return body
+
+    def _continue(self, headers):
+        """Send "100 Continue", if the client waits for one."""
+        expect = headers.get('Expect')
+        if expect is not None and expect.strip().lower() == '100-continue':
+            self.transport.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+    async def _respond(self, request):
+        try:
+            response = self.server.router.route_request(request)
+            if _inspect.isawaitable(response):
+                response = await response
+        except _errors.HttpError as error:
+            response = _errors.to_simple_text_response(error)
+        except Exception:
+            _logger.exception(
+                'Error handling %s %s.', request.method, request.path.text,
+            )
+            response = _errors.to_simple_text_response(
+                _errors.InternalServerError(),
+            )
+        return response
+
+    async def _send_error(self, error):
+        """Send the response to an error, and close the connection.
+
+        :returns: False, for _serve_request() to return.
+        """
+        if not self._closed:
+            await self._write_response(
+                _errors.to_simple_text_response(error), 'HTTP/1.1', False,
+                False,
+            )
+        return False
+
+    # Writing.
+
+    async def _write_response(self, response, version, is_head, keep_alive):
+        """Write a response.
+
+        :returns: Whether the connection can be kept open.
+        """
+        header_items = response.header_list()
+        has_body = not (
+            is_head or _response.status_has_no_body(response.status_code)
+        )
+        chunked = False
+        if has_body and not _has_header(header_items, 'content-length'):
+            if version == 'HTTP/1.1':
+                chunked = True
+                header_items.append(('Transfer-Encoding', 'chunked'))
+            else:
+                # The end of the body is marked by closing the connection.
+                keep_alive = False
+        if not keep_alive:
+            header_items.append(('Connection', 'close'))
+        elif version == 'HTTP/1.0':
+            header_items.append(('Connection', 'keep-alive'))
+        header_items.append(('Date', _http_date()))
+        head = _encode_head(response.status_line, header_items)
+
+        body = response.body
+        try:
+            if not has_body:
+                self.transport.write(head)
+            elif isinstance(body, bytes):
+                self.transport.writelines((head, body))
+            elif hasattr(body, '__aiter__'):
+                pieces = [head]
+                async for chunk in body:
+                    await self._write_chunk(pieces, chunk, chunked)
+                    pieces = []
+                self._write_end(pieces, chunked)
+            else:
+                pieces = [head]
+                for chunk in response.iter_body():
+                    await self._write_chunk(pieces, chunk, chunked)
+                    pieces = []
+                self._write_end(pieces, chunked)
+        finally:
+            if hasattr(body, 'aclose'):
+                await body.aclose()
+            else:
+                response.close()
+        await self._drain()
+        return keep_alive
+
+    async def _write_chunk(self, pieces, chunk, chunked):
+        """Write a piece of a body, after any pieces waiting to be sent."""
+        if not chunk:
+            return
+        if chunked:
+            pieces.append(b'%x\r\n' % len(chunk))
+            pieces.append(chunk)
+            pieces.append(b'\r\n')
+        else:
+            pieces.append(chunk)
+        self.transport.writelines(pieces)
+        await self._drain()
+
+    def _write_end(self, pieces, chunked):
+        if chunked:
+            pieces.append(b'0\r\n\r\n')
+        if pieces:
+            self.transport.writelines(pieces)
+
+    async def _drain(self):
+        if self._closed:
+            raise _ConnectionClosed()
+        if not self._can_write.is_set():
+            await self._can_write.wait()
+            if self._closed:
+                raise _ConnectionClosed()
+
+
+class _BufferStream(object):
+    """A read-only file-like object over a bytes-like object, for bodies."""
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._position = 0
+
+    def readinto(self, buffer):
+        view = self._view[self._position:self._position + len(buffer)]
+        size = len(view)
+        buffer[:size] = view
+        self._position += size
+        return size
+
+    def read(self, size=-1):
+        start = self._position
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(start + size, len(self._view))
+        self._position = end
+        return self._view[start:end].tobytes()
+
+
+def _parse_head(buffer, head_end):
+    """Parse a request head, which ends with the blank line at head_end.
+
+    :returns:
+        The method, request target, HTTP version, and a list of (name, value)
+        pairs of the headers.
+    :raises HttpError: If the head is malformed.
+    """
+    line_end = buffer.find(b'\r\n', 0, head_end)
+    if line_end < 0:
+        line_end = head_end
+    method_end = buffer.find(b' ', 0, line_end)
+    target_end = buffer.find(b' ', method_end + 1, line_end)
+    if method_end <= 0 or target_end <= method_end + 1:
+        raise _errors.BadRequest()
+
+    header_items = []
+    with memoryview(buffer) as view:
+        method = str(view[:method_end], 'latin-1')
+        target = str(view[method_end + 1:target_end], 'latin-1')
+        version = str(view[target_end + 1:line_end], 'latin-1')
+
+        position = line_end + 2
+        while position < head_end:
+            line_end = buffer.find(b'\r\n', position, head_end)
+            if line_end < 0:
+                line_end = head_end
+            colon = buffer.find(b':', position, line_end)
+            # Rejects obsolete line folding (a line starting with
+            # whitespace), and whitespace between a name and its colon, too.
+            if (colon <= position or buffer[position] in (_SPACE, _TAB)
+                    or buffer[colon - 1] in (_SPACE, _TAB)):
+                raise _errors.BadRequest()
+            value_start = colon + 1
+            value_end = line_end
+            while value_start < value_end and buffer[value_start] in (
+                    _SPACE, _TAB):
+                value_start += 1
+            while value_end > value_start and buffer[value_end - 1] in (
+                    _SPACE, _TAB):
+                value_end -= 1
+            header_items.append((
+                str(view[position:colon], 'latin-1'),
+                str(view[value_start:value_end], 'latin-1'),
+            ))
+            position = line_end + 2
+
+    if not _TOKEN.match(method) or not target.startswith('/'):
+        raise _errors.BadRequest()
+    if version not in _VERSIONS:
+        if version.startswith('HTTP/'):
+            raise _errors.HttpVersionNotSupported()
+        raise _errors.BadRequest()
+    return method, target, version, header_items
+
+
+def _keep_alive(version, headers):
+    connection = headers.get('Connection')
+    tokens = ()
+    if connection is not None:
+        tokens = [token.strip().lower() for token in connection.split(',')]
+    if version == 'HTTP/1.1':
+        return 'close' not in tokens
+    return 'keep-alive' in tokens
+
+
+def _has_header(header_items, lowercase_name):
+    return any(name.lower() == lowercase_name for name, _ in header_items)
+
+
+def _encode_head(status_line, header_items):
+    lines = ['HTTP/1.1 ', status_line, '\r\n']
+    for name, value in header_items:
+        lines.append(name)
+        lines.append(': ')
+        lines.append(value)
+        lines.append('\r\n')
+    lines.append('\r\n')
+    return ''.join(lines).encode('latin-1')
+
+
+# The Date header's value, and the second it is for; formatted at most once a
+# second.
+_date = [None, None]
+
+
+def _http_date():
+    now = int(_time.time())
+    if _date[0] != now:
+        _date[1] = _email_utils.formatdate(now, usegmt=True)
+        _date[0] = now
+    return _date[1]
@@ -0,0 +1,374 @@
+"""A pre-forking WSGI server.
+
+The master process loads the application, compiling any router's routes,
+and then forks the workers, so that they share the loaded application's
+memory, copy-on-write. The workers share the master's listening socket,
+and each serves one request at a time. The socket is bound with
+``SO_REUSEPORT``, so another server (e.g., a new version, started before this
+one is stopped) can listen on the same port alongside it.
+
+The master responds to these signals:
+
+* SIGHUP: reload gracefully; load the application anew, start a new set of
+  workers with it, and stop the old ones once they've finished the requests
+  they're serving.
+* SIGTERM, SIGINT: stop gracefully; stop the workers once they've finished
+  the requests they're serving, and exit.
+
+Workers that exit, e.g., after serving ``max_requests`` requests, are
+replaced. Since the listening socket outlives every worker, no connection
+is lost when one exits. Every worker's status is kept in a shared-memory
+``Scoreboard``.
+
+This requires a Unix with ``SO_REUSEPORT`` (e.g., Linux 3.9 or later).
+"""
+
+import gc as _gc
+import importlib as _importlib
+import logging as _logging
+import multiprocessing as _multiprocessing
+import os as _os
+import signal as _signal
+import socket as _socket
+import time as _time
+import wsgiref.simple_server as _simple_server
+
+import six as _6
+
+from ..routing import router as _router
+from ..routing import wsgi as _wsgi
+from . import scoreboard as _scoreboard
+
+
+_logger = _logging.getLogger(__name__)
+
+# How long the master sleeps between checks on its workers, in seconds; and
+# how long a worker waits for a connection before checking whether it should
+# stop.
+_POLL_INTERVAL = 0.1
+
+
+class PreforkServer(object):
+    """A server of a WSGI application with a pool of worker processes.
+
+    :param load_application:
+        A function, called with no arguments, that returns the WSGI
+        application to serve; it is called once on start, and again on every
+        reload. See ``application_loader()``.
+    :param host: The address to listen on.
+    :param port: The port to listen on; 0 picks a free one.
+    :param workers: The number of workers; by default, one per CPU.
+    :param max_requests:
+        If given, each worker exits after serving this many requests, and is
+        replaced; this bounds the damage of leaks.
+    :param graceful_timeout:
+        How many seconds stopping workers get to finish their requests, after
+        which they're killed.
+    """
+
+    def __init__(
+            self, load_application, host='127.0.0.1', port=8000,
+            workers=None, max_requests=None, graceful_timeout=30.0,
+            backlog=128):
+        if not hasattr(_socket, 'SO_REUSEPORT'):
+            raise RuntimeError('SO_REUSEPORT is not available here.')
+        self.load_application = load_application
+        self.host = host
+        self.port = port
+        if workers is None:
+            workers = _multiprocessing.cpu_count()
+        self.workers = workers
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        # While reloading, the old and new workers run side by side.
+        self.scoreboard = _scoreboard.Scoreboard(2 * workers)
+        self.address = None
+        self.application = None
+        # Maps the pid of each worker to its (slot, generation).
+        self._workers = {}
+        self._generation = 0
+        # Maps the pids of the workers asked to stop to when they were asked.
+        self._stopping_since = {}
+        self._stop_requested = False
+        self._reload_requested = False
+        self._listening_socket = None
+
+    def serve_forever(self):
+        """Start the workers, and manage them until told to stop."""
+        self._listening_socket = _listen(
+            (self.host, self.port), self.backlog,
+        )
+        self.address = self._listening_socket.getsockname()[:2]
+
+        self.application = self.load_application()
+        _install_signal_handlers({
+            _signal.SIGTERM: self._request_stop,
+            _signal.SIGINT: self._request_stop,
+            _signal.SIGHUP: self._request_reload,
+        })
+        try:
+            self._wait_until_listening(self._spawn_generation())
+            _logger.info(
+                'Listening on http://%s:%d/ with %d workers.',
+                self.address[0], self.address[1], self.workers,
+            )
+            while not self._stop_requested:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._reload()
+                self._reap_workers()
+                self._kill_overdue_workers()
+                _time.sleep(_POLL_INTERVAL)
+        finally:
+            self._stop_all()
+            self._listening_socket.close()
+
+    def _request_stop(self, signal_number, frame):
+        self._stop_requested = True
+
+    def _request_reload(self, signal_number, frame):
+        self._reload_requested = True
+
+    def _reload(self):
+        _logger.info('Reloading.')
+        try:
+            application = self.load_application()
+        except Exception:
+            _logger.exception('Reloading failed; keeping the old workers.')
+            return
+        self.application = application
+        old_pids = list(self._workers)
+        self._generation += 1
+        # The old workers keep serving until the new ones are ready.
+        self._wait_until_listening(self._spawn_generation())
+        for pid in old_pids:
+            self._stop_worker(pid)
+
+    def _spawn_generation(self):
+        # Objects loaded so far are left alone by the garbage collector, so
+        # that collections in the workers don't write to (and so copy) the
+        # pages they share with the master.
+        if hasattr(_gc, 'freeze'):
+            _gc.freeze()
+        used_slots = set(slot for slot, _ in _6.itervalues(self._workers))
+        free_slots = [
+            slot for slot in range(self.scoreboard.slots)
+            if slot not in used_slots
+        ]
+        return [self._spawn_worker(slot) for slot in free_slots[:self.workers]]
+
+    def _wait_until_listening(self, pids, timeout=10.0):
+        """Wait for workers to be ready to serve (or to exit)."""
+        deadline = _time.time() + timeout
+        waiting = set(pids)
+        while waiting and _time.time() < deadline:
+            for pid in list(waiting):
+                worker = self._workers.get(pid)
+                if worker is None or self.scoreboard.get(worker[0]).state in (
+                        _scoreboard.IDLE, _scoreboard.BUSY):
+                    waiting.discard(pid)
+            self._reap_workers()
+            _time.sleep(_POLL_INTERVAL / 10)
+
+    def _spawn_worker(self, slot):
+        self.scoreboard.update(slot, 0, _scoreboard.STARTING, 0)
+        pid = _os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                _Worker(self, slot).run()
+                exit_code = 0
+            except BaseException:
+                _logger.exception('Worker %d failed.', _os.getpid())
+            finally:
+                _os._exit(exit_code)
+        self._workers[pid] = (slot, self._generation)
+        return pid
+
+    def _reap_workers(self):
+        while self._workers:
+            try:
+                pid, status = _os.waitpid(-1, _os.WNOHANG)
+            except OSError:
+                # No children left.
+                return
+            if pid == 0:
+                return
+            if pid not in self._workers:
+                continue
+            slot, generation = self._workers.pop(pid)
+            self._stopping_since.pop(pid, None)
+            self.scoreboard.clear(slot)
+            if generation == self._generation and not self._stop_requested:
+                if status != 0:
+                    _logger.warning(
+                        'Worker %d exited with status %d; replacing it.',
+                        pid, status,
+                    )
+                    # Don't spin, forking workers that fail right away.
+                    _time.sleep(1)
+                self._spawn_worker(slot)
+
+    def _stop_worker(self, pid):
+        if pid in self._stopping_since:
+            return
+        self._stopping_since[pid] = _time.time()
+        try:
+            _os.kill(pid, _signal.SIGTERM)
+        except OSError:
+            pass
+
+    def _kill_overdue_workers(self):
+        deadline = _time.time() - self.graceful_timeout
+        for pid, since in list(self._stopping_since.items()):
+            if since < deadline:
+                try:
+                    _os.kill(pid, _signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def _stop_all(self):
+        for pid in list(self._workers):
+            self._stop_worker(pid)
+        while self._workers:
+            self._reap_workers()
+            self._kill_overdue_workers()
+            _time.sleep(_POLL_INTERVAL)
+        _logger.info('Stopped.')
+
+
+class _Worker(object):
+    """The loop of a worker process, which runs in the forked child."""
+
+    def __init__(self, server, slot):
+        self.server = server
+        self.slot = slot
+        self.pid = _os.getpid()
+        self.requests = 0
+        self._master_pid = _os.getppid()
+        self._stop_requested = False
+
+    def run(self):
+        server = self.server
+        _install_signal_handlers({
+            _signal.SIGTERM: self._request_stop,
+            # The master handles these, for the whole process group.
+            _signal.SIGINT: _signal.SIG_IGN,
+            _signal.SIGHUP: _signal.SIG_IGN,
+        })
+        http_server = _WorkerHttpServer(self, server._listening_socket)
+        http_server.set_app(server.application)
+        http_server.timeout = _POLL_INTERVAL
+        self._update(_scoreboard.IDLE)
+        try:
+            while not self._stop_requested and (
+                    server.max_requests is None
+                    or self.requests < server.max_requests):
+                http_server.handle_request()
+                # Don't outlive a master that was killed.
+                if _os.getppid() != self._master_pid:
+                    break
+        finally:
+            self._update(_scoreboard.STOPPING)
+
+    def _request_stop(self, signal_number, frame):
+        self._stop_requested = True
+
+    def _update(self, state):
+        self.server.scoreboard.update(
+            self.slot, self.pid, state, self.requests,
+        )
+
+
+class _WorkerHttpServer(_simple_server.WSGIServer):
+    """A WSGIServer that accepts connections on an inherited socket."""
+
+    def __init__(self, worker, listening_socket):
+        self.worker = worker
+        _simple_server.WSGIServer.__init__(
+            self, listening_socket.getsockname()[:2], _RequestHandler,
+            bind_and_activate=False,
+        )
+        self.socket.close()
+        self.socket = listening_socket
+        host, port = self.server_address
+        # What server_bind() would have set up.
+        self.server_name = _socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+
+    def finish_request(self, request, client_address):
+        worker = self.worker
+        worker._update(_scoreboard.BUSY)
+        try:
+            _simple_server.WSGIServer.finish_request(
+                self, request, client_address,
+            )
+        finally:
+            worker.requests += 1
+            worker._update(_scoreboard.IDLE)
+
+
+class _RequestHandler(_simple_server.WSGIRequestHandler):
+    def log_message(self, format, *args):
+        _logger.debug(
+            '%s - %s', self.address_string(), format % args,
+        )
+
+
+def application_loader(target):
+    """Make a ``load_application`` function for a PreforkServer.
+
+    :param target:
+        Where to find the application, as "package.module:attribute". The
+        attribute may be a WSGI application, or a ``Router``, which is served
+        with a ``WsgiApplication``. The routes of the router (or of the
+        ``router`` attribute of the application) are compiled when it's
+        loaded, so that the workers share them.
+    :returns:
+        A function that imports the application's module the first time it
+        is called, and reloads that module (not the modules it imports) each
+        time after.
+    """
+    module_name, _, attribute = target.partition(':')
+    if not module_name or not attribute:
+        raise ValueError(
+            'The application must be given as "module:attribute", not'
+            ' {!r}.'.format(target)
+        )
+    loaded_modules = []
+
+    def load_application():
+        if loaded_modules:
+            module = _6.moves.reload_module(loaded_modules[0])
+        else:
+            module = _importlib.import_module(module_name)
+            loaded_modules.append(module)
+        application = getattr(module, attribute)
+        if isinstance(application, _router.Router):
+            application = _wsgi.WsgiApplication(application)
+        router = getattr(application, 'router', None)
+        if isinstance(router, _router.Router):
+            router.compile()
+        return application
+
+    return load_application
+
+
+def _listen(address, backlog):
+    socket_ = _socket.socket(_socket.AF_INET, _socket.SOCK_STREAM)
+    socket_.setsockopt(_socket.SOL_SOCKET, _socket.SO_REUSEADDR, 1)
+    socket_.setsockopt(_socket.SOL_SOCKET, _socket.SO_REUSEPORT, 1)
+    socket_.bind(address)
+    socket_.listen(backlog)
+    # Every worker waits for the socket to be readable, but only one of them
+    # gets each connection; the others' accept() must fail, not block.
+    socket_.setblocking(False)
+    return socket_
+
+
+def _install_signal_handlers(handlers):
+    for signal_number, handler in _6.iteritems(handlers):
+        _signal.signal(signal_number, handler)
+
@@ -0,0 +1,72 @@
+"""A table of the status of each worker process, in shared memory.
+
+The master process creates the scoreboard before forking, so that every
+worker writes to the same memory; each worker only ever writes to its own
+slot, and reading a slot takes no locks (a reader may see a slot halfway
+through an update, which is fine for monitoring).
+"""
+
+import collections as _collections
+import mmap as _mmap
+import struct as _struct
+import time as _time
+
+
+# The states of a worker.
+EMPTY = 0
+STARTING = 1
+IDLE = 2
+BUSY = 3
+STOPPING = 4
+
+STATE_NAMES = {
+    EMPTY: 'empty',
+    STARTING: 'starting',
+    IDLE: 'idle',
+    BUSY: 'busy',
+    STOPPING: 'stopping',
+}
+
+WorkerStatus = _collections.namedtuple(
+    'WorkerStatus', ('slot', 'pid', 'state', 'requests', 'since'),
+)
+
+# pid, requests served, time of the last change of state, state.
+_SLOT = _struct.Struct('=qQdB7x')
+
+
+class Scoreboard(object):
+    """The status of up to ``slots`` workers.
+
+    The memory is an anonymous shared mapping, so it must be created before
+    the workers are forked.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self._memory = _mmap.mmap(-1, _SLOT.size * slots)
+
+    def update(self, slot, pid, state, requests):
+        _SLOT.pack_into(
+            self._memory, slot * _SLOT.size,
+            pid, requests, _time.time(), state,
+        )
+
+    def clear(self, slot):
+        self.update(slot, 0, EMPTY, 0)
+
+    def get(self, slot):
+        pid, requests, since, state = _SLOT.unpack_from(
+            self._memory, slot * _SLOT.size,
+        )
+        return WorkerStatus(slot, pid, state, requests, since)
+
+    def __iter__(self):
+        """Iterate over the status of every slot that has a worker."""
+        for slot in range(self.slots):
+            status = self.get(slot)
+            if status.state != EMPTY:
+                yield status
+
+    def close(self):
+        self._memory.close()